@@ -1,11 +1,59 @@
 import os
+import io
+import re
+import csv
 import json
 import subprocess
 import sys
 import logging
+import argparse
+import shlex
+import socket
+import socketserver
+import hashlib
+import shutil
+import stat
+import sqlite3
+import tempfile
+import threading
+import queue
+import atexit
+import functools
+import wave
+import struct
+import zlib
+import gzip
+import zipfile
+from abc import ABC, abstractmethod
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from contextlib import contextmanager, redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator, Tuple, get_args
 import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import numpy as np
+except ImportError:  # optional, only the balance report needs it
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only Parquet exports need it
+    pa = pq = None
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11, scaffold manifests must be JSON
+    tomllib = None
 """
 Project Zomboid Mod Manager
 A tool for managing mods, items, recipes, models, and sounds for Project Zomboid.
@@ -14,30 +62,56 @@ A tool for managing mods, items, recipes, models, and sounds for Project Zomboid
 # Constants
 # Path to the registry file that stores mod information
 REGISTRY_FILE = os.path.join("core", "modmanager_registry.json")
+# SQLite registry database used when the sqlite backend is selected
+REGISTRY_DB = os.path.join("core", "modmanager_registry.db")
+# On-disk cache of parsed script files
+PARSE_CACHE_FILE = os.path.join("core", "modmanager_parse_cache.db")
+# Size cap for the parse cache; least recently used files are evicted past it
+PARSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Cached results of the Lua syntax check, keyed by file content hash
+LUA_CHECK_CACHE_FILE = os.path.join("core", "modmanager_lua_checks.db")
+# Environment variable that turns on the Lua check before every install ("1")
+LUA_CHECK_ENV = "MODMANAGER_LUA_CHECK"
+# Persistent inverted index of definition names and property values used by the search command
+SEARCH_INDEX_FILE = os.path.join("core", "modmanager_search.db")
+# What the last export saw, for export --incremental
+EXPORT_STATE_FILE = os.path.join("core", "modmanager_export.db")
+# Environment variable selecting the registry backend ("json" or "sqlite")
+REGISTRY_BACKEND_ENV = "MODMANAGER_REGISTRY_BACKEND"
+# Unix domain socket the daemon listens on
+DAEMON_SOCKET = os.path.join("core", "modmanager.sock")
 # Path to the log file for error tracking
 LOG_FILE = os.path.join("log", "modmanager.log")
-
-# Platform-specific script paths
-SCRIPT_PATHS = {
-    'windows': {
-        'install_mod': os.path.join('core', 'Windows', 'mod', 'install_mod.bat'),
-        'create_item': os.path.join('core', 'Windows', 'create_item.bat'),
-        'create_mod': os.path.join('core', 'Windows', 'mod', 'create_mod.bat'),
-        'mod_manager_help': os.path.join('core', 'Windows', 'mod_manager_help.bat'),
-        'create_recipe': os.path.join('core', 'Windows', 'create_recipe.bat'),
-        'create_model': os.path.join('core', 'Windows', 'create_model.bat'),
-        'create_sound': os.path.join('core', 'Windows', 'create_sound.bat')
-    },
-    'unix': {
-        'install_mod': os.path.join('core', 'Linux', 'mod', 'install_mod.sh'),
-        'create_mod': os.path.join('core', 'Linux', 'mod', 'create_mod.sh'),
-        'create_item': os.path.join('core', 'Linux', 'create_item.sh'),
-        'mod_manager_help': os.path.join('core', 'Linux', 'mod_manager_help.sh'),
-        'create_recipe': os.path.join('core', 'Linux', 'create_recipe.sh'),
-        'create_model': os.path.join('core', 'Linux', 'create_model.sh'),
-        'create_sound': os.path.join('core', 'Linux', 'create_sound.sh')
-    }
-}
+# JSON-lines timing spans of every operation, read by the stats command
+SPANS_FILE = os.path.join("log", "modmanager_spans.jsonl")
+SPANS_MAX_BYTES = 10 * 1024 * 1024
+SPANS_BACKUPS = 5
+# Set to 0 to turn span logging off
+SPANS_ENV = "MODMANAGER_SPANS"
+# Project Zomboid mods folder that mods are installed into
+PZ_MODS_DIR = os.path.join(os.path.expanduser("~"), "Zomboid", "mods")
+# Manifest kept in each installed mod folder describing what was copied there
+INSTALL_MANIFEST = ".modmanager_manifest.json"
+# Files at least this large are copied with copy_file_range/sendfile
+LARGE_FILE_THRESHOLD = 1024 * 1024
+# Name of the per-file size/hash table written into mod archives by pack
+PACK_MANIFEST = ".modmanager_pack.json"
+# Already-compressed formats that pack stores as-is
+PACK_STORED_EXTENSIONS = (".ogg", ".png", ".jpg", ".jpeg", ".mp3", ".bank", ".zip", ".gz")
+# Advisory lock files for media/scripts/*.txt, one per script file, shared by every manager process
+SCRIPT_LOCK_DIR = os.path.join(tempfile.gettempdir(), "modmanager-locks")
+# Chunk size for parallel compression of large files
+PACK_CHUNK_SIZE = 1024 * 1024
+# Environment variable enabling the shared asset store for installs: "1" for the default location or a path
+ASSET_STORE_ENV = "MODMANAGER_ASSET_STORE"
+# Default asset store folder, created next to the mods folder so hardlinks stay on one filesystem
+ASSET_STORE_DIRNAME = ".modmanager_store"
+# Default snapshot folder, next to the mods folder like the asset store
+SNAPSHOT_DIRNAME = ".modmanager_snapshots"
+# Number of automatic snapshots kept per mod folder; installs and script edits take one first when set
+SNAPSHOT_ENV = "MODMANAGER_SNAPSHOTS"
+# Text files editors may rewrite in place; snapshots of an installed copy copy these instead of linking them
+SNAPSHOT_COPY_EXTENSIONS = (".txt", ".lua", ".info", ".xml", ".json", ".ini", ".cfg")
 
 # constant variable defining the types of mods available and their child folders
 MOD_TYPES = {
@@ -92,6 +166,9 @@ MOD_TYPES = {
     ]
 }
 
+# MOD_TYPES whose folders hold assets that installs may share through the asset store
+ASSET_STORE_TYPES = ("Animation", "Clothing", "Fonts", "Textures", "Sound", "Models", "Maps", "Ui")
+
 # Set up logging
 logging.basicConfig(
     filename=LOG_FILE,
@@ -100,450 +177,6081 @@ logging.basicConfig(
     filemode='a'
 )
 
-# Mod manager class
-class ModManager:
-    """
-    Main mod manager class that handles all mod-related operations.
+# Pre-defined recipe categories accepted by create_recipe
+RECIPE_TYPES = ["Standard", "Crafting", "Medical", "Carpentry", "Mechanics"]
+
+# Clip-level sound properties; any other key=value goes on the sound block itself
+SOUND_CLIP_KEYS = ("file", "distanceMax", "reverbFactor", "volume")
+
+
+class _SpanFileHandler(RotatingFileHandler):
+    """RotatingFileHandler writing span dicts as JSON lines.
+
+    It tracks the file size itself and leaves flushing to the listener; the stock
+    emit formats every record twice and seeks to the end to decide on rotation,
+    then flushes after each line.
     """
-    def __init__(self):
-        """Initialize the mod manager with platform detection and registry loading."""
-        self.platform = self._get_platform()
-        self.registry = self.load_config()
-        self.item_types = ["Weapon", "Food", "Clothing", "Literature", "Drainable", "Radio", "Alarm Clock", "Key", "Tool"]
 
-    @staticmethod
-    def _get_platform() -> str:
-        """Detects the platform (Windows or Unix)."""
-        if os.name == 'nt':
-            return 'windows'
-        elif os.name == 'posix':
-            return 'unix'
-        raise EnvironmentError("Unsupported Operating System")
-    
-    def get_script_path(self, script_name: str) -> str:
-        """Get the platform-specific path for a script."""
+    def write_span(self, record: Dict[str, Any]) -> None:
         try:
-            script_path = os.path.abspath(SCRIPT_PATHS[self.platform][script_name])
-            if not os.path.exists(script_path):
-                raise FileNotFoundError(f"Script not found: {script_path}")
-            return script_path
-        except KeyError:
-            raise NotImplementedError(f"Script '{script_name}' not available for platform {self.platform}")
+            line = json.dumps(record, separators=(",", ":")) + "\n"
+            if self.stream is None:
+                self.stream = self._open()
+                self.size = self.stream.seek(0, os.SEEK_END)
+            if self.maxBytes and self.size + len(line) > self.maxBytes:
+                self.doRollover()
+                self.size = 0
+            self.stream.write(line)
+            self.size += len(line)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f"Could not write timing span: {e}")
 
-    def load_config(self) -> Dict[str, Any]:
-        """Load or create the configuration file."""
-        try:
-            if not os.path.exists(REGISTRY_FILE):
-                logging.info("Config file not found. Creating new one.")
-                # Create directory structure if it doesn't exist
-                os.makedirs(os.path.dirname(REGISTRY_FILE), exist_ok=True)
-                # Create file with empty JSON object
-                with open(REGISTRY_FILE, 'w') as f:
-                    json.dump({}, f)
-                return {}
-            
-            with open(REGISTRY_FILE, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            logging.error("Config file is corrupted. Creating new one.")
-            # Overwrite corrupted file with empty JSON
-            with open(REGISTRY_FILE, 'w') as f:
-                json.dump({}, f)
-            return {}
 
-    def save_config(self) -> None:
-        """Save the current configuration to file."""
-        try:
-            with open(REGISTRY_FILE, "w") as f:
-                json.dump(self.registry, f, indent=4)
-            logging.info("Configuration saved successfully.")
-        except Exception as e:
-            logging.error(f"Failed to save configuration: {e}")
-            raise
+class _SpanListener(QueueListener):
+    """QueueListener for span dicts that flushes its handlers whenever the queue runs empty.
 
-    def install_mod(self, mod_name: str) -> None:
-        """Install a mod by invoking the platform-specific install script."""
-        if mod_name not in self.registry:
-            logging.error(f"Mod '{mod_name}' not found in config.")
-            print(f"Error: Mod '{mod_name}' is not registered.")
-            return
+    Spans are queued as plain dicts rather than log records, so neither the timed
+    thread nor the writer pays for LogRecord creation and caller lookup.
+    """
 
-        mod_path = self.registry[mod_name].get("mod_path")
-        if not mod_path or not os.path.isdir(mod_path):
-            logging.error(f"Invalid or missing mod path for '{mod_name}': {mod_path}")
-            print(f"Error: Invalid mod path for '{mod_name}'")
-            return
+    def handle(self, record: Dict[str, Any]) -> None:
+        for handler in self.handlers:
+            handler.write_span(record)
 
+    def dequeue(self, block: bool) -> logging.LogRecord:
         try:
-            script = self.get_script_path('install_mod')
-            
-            if self.platform == 'windows':
-                cmd = [script, mod_name, mod_path]
-            else:
-                cmd = ['bash', script, mod_name, mod_path]
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                handler.flush()
+            return self.queue.get(block)
 
-            subprocess.run(cmd, check=True, shell=False)
-            logging.info(f"Successfully installed mod: {mod_name}")
-            print(f"Successfully installed mod: {mod_name}")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Installation failed for '{mod_name}': {e}")
-            print(f"Installation failed for '{mod_name}'. Check logs for details.")
-        except Exception as e:
-            logging.error(f"Unexpected error during installation: {e}")
-            print(f"An unexpected error occurred: {e}")
 
-    def create_recipe(self, mod_name: str, recipe_name: str, recipe_type: str, result_item: str) -> None:
-        """Create a new recipe for a mod."""
-        if mod_name not in self.registry:
-            print(f"Error: Mod '{mod_name}' is not registered.")
-            return
-        
-        mod_path = os.path.abspath(self.registry[mod_name]["mod_path"])
-        
-        try:
-            script_path = self.get_script_path('create_recipe')
-        except Exception as e:
-            print(f"Error: {e}")
-            return
-        
-        if not os.path.exists(mod_path):
-            print(f"Error: Mod path does not exist: {mod_path}")
-            return
-        
-        recipe_types = ["Standard", "Crafting", "Medical", "Carpentry", "Mechanics"]
-        
-        if recipe_type not in recipe_types:
-            print(f"Error: Invalid recipe type. Choose from: {', '.join(recipe_types)}")
-            return
-        
-        ingredients = []
-        print("\nAdd ingredients for the recipe (type 'done' when finished):")
-        
-        # while loop for capturing user input to be placed in the ingredients array
-        while True:
-            ingredient = input("Ingredient name (or 'done' to finish): ").strip()
-            if ingredient.lower() == 'done':
-                break
-                
-            count = input(f"How many '{ingredient}' are needed? ").strip()
-            try:
-                count = int(count)
-            except ValueError:
-                print("Please enter a valid number.")
-                continue
-                
-            ingredients.append(f"{ingredient}:{count}")
-        
-        if not ingredients:
-            print("Error: At least one ingredient is required.")
-            return
-        
-        ingredients_str = ",".join(ingredients)
-        
-        result_count = input(f"How many '{result_item}' does this recipe produce? ").strip()
-        try:
-            result_count = int(result_count)
-        except ValueError:
-            print("Using default value of 1.")
-            result_count = 1
-        
-        recipe_time = input("How much time does this recipe take (in minutes)? ").strip()
-        try:
-            recipe_time = int(recipe_time)
-        except ValueError:
-            print("Using default value of 100.")
-            recipe_time = 100
-        
-        skill_type = input("Required skill (leave blank for none): ").strip()
-        skill_level = "0"
-        
-        if skill_type:
-            skill_level_input = input(f"Required level for {skill_type}: ").strip()
-            try:
-                skill_level = str(int(skill_level_input))
-            except ValueError:
-                print("Using default value of 0.")
-                skill_level = "0"
-        
-        # try block for constructing and running the actual process to execute the linux/windows scripts
-        try:
-            cmd = [script_path, mod_name, recipe_name, recipe_type, result_item, 
-                  str(result_count), str(recipe_time), ingredients_str]
-            
-            if skill_type:
-                cmd.extend([skill_type, skill_level])
-            else:
-                cmd.extend(["", ""])
-            
-            cmd.append(mod_path)
-            
-            if self.platform == 'unix':
-                cmd.insert(0, 'bash')
-            
-            print(f"Executing: {' '.join(cmd)}")
-            
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-            time.sleep(0.5)
-            
-            print(result.stdout)
-            if result.stderr:
-                print(f"Error output: {result.stderr}")
-            
-            expected_file = os.path.join(mod_path, "media", "scripts", f"{mod_name}_Recipes.txt")
-            if os.path.exists(expected_file):
-                print(f"Successfully created recipe: {recipe_name}")
-                print(f"Recipe file location: {expected_file}")
-            else:
-                print(f"Warning: Recipe created but file not found at expected location: {expected_file}")
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to create recipe: {e}")
-            print(f"Error output: {e.stderr}")
-            logging.error(f"Recipe creation failed for {mod_name}: {e}")
+_span_state = threading.local()
+_span_guard = threading.Lock()
+_span_listener: Optional[_SpanListener] = None
+_span_queue: Optional[QueueHandler] = None
+_span_path: Optional[str] = SPANS_FILE if os.environ.get(SPANS_ENV, "1") != "0" else None
 
-    def create_model(self, mod_name: str, model_name: str) -> None:
-        """Create a new model for a mod."""
-        if mod_name not in self.registry:
-            print(f"Error: Mod '{mod_name}' is not registered")
-            logging.error(f"Mod '{mod_name}' not found in registry")
-            return
 
-        mod_path = self.registry[mod_name]["mod_path"]
-        
-        try:
-            script = self.get_script_path('create_model')
-        except Exception as e:
-            print(f"Error: {e}")
-            return
+def configure_span_log(path: Optional[str]) -> Optional[str]:
+    """Send spans to another JSON-lines file, or nowhere with None; returns the previous path."""
+    global _span_path, _span_listener, _span_queue
+    with _span_guard:
+        previous, _span_path = _span_path, path
+        if _span_listener is not None:
+            _span_queue = None
+            _span_listener.stop()
+            for handler in _span_listener.handlers:
+                handler.close()
+            _span_listener = None
+    return previous
 
-        try:
-            if self.platform == 'windows':
-                cmd = [script, mod_name, mod_path, model_name]
-            else:
-                cmd = ['bash', script, mod_name, mod_path, model_name]
 
-            subprocess.run(cmd, check=True, shell=False)
-            logging.info(f"Successfully created model: {model_name} for mod: {mod_name}")
-            print(f"Successfully created model: {model_name}")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Model creation failed for '{mod_name}': {e}")
-            print(f"Model creation failed for '{mod_name}'. Check logs for details.")
+def _stop_span_log() -> None:
+    configure_span_log(None)
 
-    def create_sound(self, mod_name: str, sound_type: str, sound_name: str, **kwargs) -> None:
-        """Create a new sound for a mod."""
-        if mod_name not in self.registry:
-            print(f"Error: Mod '{mod_name}' is not registered")
-            logging.error(f"Mod '{mod_name}' not found in registry")
-            return
 
-        mod_path = self.registry[mod_name]["mod_path"]
-        
-        try:
-            script_path = self.get_script_path('create_sound')
-        except Exception as e:
-            print(f"Error: {e}")
-            return
+def _emit_span(record: Dict[str, Any]) -> None:
+    """Hand a finished span to the background writer, starting it on first use."""
+    global _span_listener, _span_queue
+    if _span_path is None:
+        return
+    if _span_queue is None:
+        with _span_guard:
+            if _span_listener is None and _span_path is not None:
+                os.makedirs(os.path.dirname(_span_path) or ".", exist_ok=True)
+                handler = _SpanFileHandler(_span_path, maxBytes=SPANS_MAX_BYTES,
+                                           backupCount=SPANS_BACKUPS, encoding="utf-8", delay=True)
+                spans: queue.SimpleQueue = queue.SimpleQueue()
+                _span_listener = _SpanListener(spans, handler)
+                _span_listener.start()
+                _span_queue = QueueHandler(spans)
+                atexit.register(_stop_span_log)
+    span_queue = _span_queue
+    if span_queue is not None:
+        span_queue.enqueue(record)
 
-        ## define arguments in an array and append extra arguments in a key value syntax
-        arguments = [mod_name, sound_type, sound_name, mod_path]
-        for key, value in kwargs.items():
-            arguments.append(f"{key}={value}")
 
-        logging.info(f"Running script: {script_path} with arguments: {arguments}")
-        print(f"Running script: {script_path} with arguments: {arguments}")
+class span:
+    """Time a block and log it as one line of SPANS_FILE.
 
-        # try block that handles the script selection and executes the correct type based on the operating system
-        try:
-            if self.platform == 'windows':
-                cmd = [script_path] + arguments
-            else:
-                cmd = ['bash', script_path] + arguments
+    Spans nest per thread: each record's path names the enclosing operations, e.g.
+    "install_mod/install.apply". The dict returned on entry takes extra fields such
+    as bytes and files, and ok is logged as false when the block raises.
+    """
 
-            subprocess.run(cmd, check=True, shell=False)
-            logging.info(f"Successfully created or updated sound: {sound_name}")
-            print(f"Successfully created or updated sound: {sound_name}")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Failed to run script for '{sound_name}': {e}")
-            print(f"Failed to run script for '{sound_name}'. Check logs for details.")
+    __slots__ = ("operation", "record", "stack", "start")
 
-    def list_recipe_types(self) -> None:
-        """Display all supported recipe types."""
-        recipe_types = ["Standard", "Crafting", "Medical", "Carpentry", "Mechanics"]
-        print("\nSupported Recipe Types:")
-        for i, recipe_type in enumerate(recipe_types, 1):
-            print(f"{i}. {recipe_type}")
+    def __init__(self, operation: str, **fields):
+        self.operation = operation
+        self.record = fields
 
-    def create_mod(self, mod_name: str, mod_path: str) -> None:
-        """Register a new mod in the configuration."""
-        if mod_name in self.registry:
-            logging.warning(f"Mod '{mod_name}' already exists.")
-            print(f"Warning: Mod '{mod_name}' already exists.")
-            return
+    def __enter__(self) -> Dict[str, Any]:
+        stack = getattr(_span_state, "stack", None)
+        if stack is None:
+            stack = _span_state.stack = []
+        stack.append(self.operation)
+        self.stack = stack
+        self.start = time.perf_counter()
+        return self.record
 
-        if not os.path.exists(mod_path):
-            logging.error(f"Invalid path provided: {mod_path}")
-            print(f"Error: The path '{mod_path}' does not exist.")
-            return
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self.start
+        record = self.record
+        if exc_type is not None:
+            record["ok"] = False
+        record["ms"] = round(elapsed * 1000, 3)
+        record["path"] = "/".join(self.stack)
+        self.stack.pop()
+        record["op"] = self.operation
+        record["ts"] = round(time.time() - elapsed, 3)
+        _emit_span(record)
 
-        try:
-            script = self.get_script_path('create_mod')
-            self.registry[mod_name] = {"mod_path": os.path.abspath(os.path.join(mod_path, mod_name))}
-            self.save_config()
 
-            if self.platform == 'windows':
-                subprocess.run([script, mod_name, mod_path], shell=False, check=True)
-            else:
-                subprocess.run(['bash', script, mod_name, mod_path], shell=False, check=True)
-            
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Failed to run mod creation script: {e}")
-            print("Error: Could not run mod setup script.")
-            return
+def _result_failed(result: Any, optional: bool) -> bool:
+    """Whether an operation's result reports a failure.
 
+    That is False, None from an operation declared to return Optional (which returns None
+    on error), or a summary dict, or list of them, with a non-empty "errors" entry.
+    """
+    if result is False or (result is None and optional):
+        return True
+    if isinstance(result, dict):
+        return bool(result.get("errors"))
+    if isinstance(result, list):
+        return any(isinstance(item, dict) and item.get("errors") for item in result)
+    return False
 
-        print("\nAvailable mod types:")
-        for i, mod_type in enumerate(MOD_TYPES.keys(), 1):
-            print(f"{i}. {mod_type}")
 
-        selected_types = []
-        while True:
-            selected = input("Enter a mod type to add (or type 'quit' to finish): ").strip().capitalize()
-            if selected == 'Quit':
-                break
-            if selected not in MOD_TYPES:
-                print(f"Invalid mod type '{selected}'. Try again.")
-                continue
-            selected_types.append(selected)
+def timed(func):
+    """Record a span for every call of a ModManager operation, marking failed results as not ok."""
+    names = func.__code__.co_varnames[:func.__code__.co_argcount]
+    with_mod = len(names) > 1 and names[1] == "mod_name"
+    optional = type(None) in get_args(func.__annotations__.get("return"))
 
-        if selected_types:
-            selected_folders = []
-            for selected in selected_types:
-                selected_folders.extend(MOD_TYPES[selected])
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with span(func.__name__) as record:
+            if with_mod:
+                record["mod"] = args[0] if args else kwargs.get("mod_name")
+            result = func(self, *args, **kwargs)
+            if _result_failed(result, optional):
+                record["ok"] = False
+            return result
+    return wrapper
 
-            try:
-                if self.platform == 'windows':
-                    cmd = [script, mod_name, mod_path] + selected_folders
-                    subprocess.run(cmd, shell=False, check=True)
-                else:
-                    cmd = ['bash', script, mod_name, mod_path] + selected_folders
-                    subprocess.run(cmd, shell=False, check=True)
-                    
-                logging.info(f"Created structure for mod: {mod_name} with folders: {', '.join(selected_folders)}")
-                print(f"Successfully created mod structure for: {mod_name}")
-            except subprocess.CalledProcessError as e:
-                logging.error(f"Failed to create folders for mod '{mod_name}': {e}")
-                print(f"Error creating folders for mod '{mod_name}'.")
 
-        logging.info(f"Created new mod: {mod_name}")
-        print(f"Successfully registered mod: {mod_name}")
+def _parse_window(window: str) -> float:
+    """Turn '90s', '30m', '12h' or '7d' into seconds."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", window)
+    if not match:
+        raise ValueError(f"Invalid time window '{window}', expected e.g. 30m, 12h or 7d")
+    return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
 
-    def register_mod(self, mod_name: str, mod_path: str) -> None:
-        """Register an existing mod in the registry."""
-        if mod_name in self.registry:
-            logging.warning(f"Mod '{mod_name}' already exists in registry.")
-            print(f"Warning: Mod '{mod_name}' already exists in registry.")
-            return
-        
-        full_path = os.path.abspath(mod_path)
-        if not os.path.exists(full_path):
-            logging.error(f"Invalid path provided: {full_path}")
-            print(f"Error: The path '{full_path}' does not exist.")
-            return
-        
-        self.registry[mod_name] = {"mod_path": full_path}
-        self.save_config()
-        
-        logging.info(f"Registered existing mod: {mod_name} at {full_path}")
-        print(f"Successfully registered mod: {mod_name}")
 
-    def flush_registry(self):
-        """Clear the mod registry."""
+def iter_spans(path: str = SPANS_FILE, since: float = 0.0) -> Iterator[Dict[str, Any]]:
+    """Yield span records from a span log and its rotated backups, oldest file first."""
+    files = [f"{path}.{i}" for i in range(SPANS_BACKUPS, 0, -1)] + [path]
+    for name in files:
         try:
-            with open(REGISTRY_FILE, 'w'):
-                print("Flushed registry.")
-        except Exception as e:
-            print(f"Error occurred while flushing registry: {e}")
+            f = open(name, "r", encoding="utf-8")
+        except FileNotFoundError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # a line cut short by a crash or a concurrent rotation
+                    continue
+                if isinstance(record, dict) and record.get("ts", 0) >= since:
+                    yield record
 
-    def create_item(self, mod_name: str, item_type: str, item_name: str) -> None:
-        """Create a new item for a mod."""
-        if mod_name not in self.registry:
-            print(f"Error: Mod '{mod_name}' is not registered.")
-            return
 
-        if item_type not in self.item_types:
-            print(f"Error: Invalid item type. Choose from: {', '.join(self.item_types)}")
-            return
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    return values[max(0, min(len(values) - 1, int(-(-len(values) * percent // 100)) - 1))]
 
-        mod_path = self.registry[mod_name]["mod_path"]
-        
-        try:
-            script_path = self.get_script_path('create_item')
-        except Exception as e:
-            print(f"Error: {e}")
-            return
 
-        try:
-            if self.platform == 'windows':
-                cmd = [script_path, mod_name, item_type, item_name, mod_path]
-            else:
-                cmd = ['bash', script_path, mod_name, item_type, item_name, mod_path]
+def summarize_spans(records, window_seconds: float) -> List[Dict[str, Any]]:
+    """Per span path: count, failures, p50/p95/p99 milliseconds and throughput over the window."""
+    groups: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        group = groups.setdefault(record.get("path") or record.get("op", "?"),
+                                  {"durations": [], "failed": 0, "bytes": 0, "files": 0})
+        group["durations"].append(float(record.get("ms", 0)))
+        group["failed"] += record.get("ok") is False
+        group["bytes"] += record.get("bytes", 0) or 0
+        group["files"] += record.get("files", 0) or 0
 
-            subprocess.run(cmd, check=True, shell=False)
-            print(f"Successfully created {item_type} item: {item_name}")
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to create item: {e}")
-            logging.error(f"Item creation failed for {mod_name}: {e}")
+    summary = []
+    for path, group in sorted(groups.items()):
+        durations = sorted(group["durations"])
+        summary.append({
+            "operation": path,
+            "count": len(durations),
+            "failed": group["failed"],
+            "p50_ms": _percentile(durations, 50),
+            "p95_ms": _percentile(durations, 95),
+            "p99_ms": _percentile(durations, 99),
+            "total_ms": round(sum(durations), 3),
+            "per_minute": round(len(durations) * 60 / window_seconds, 3),
+            "bytes": group["bytes"],
+            "files": group["files"],
+            "mb_per_second": round(group["bytes"] / 1e6 / (sum(durations) / 1000), 3)
+            if group["bytes"] and sum(durations) else None,
+        })
+    return summary
 
-    def list_item_types(self) -> None:
-        """Display all supported item types."""
-        print("\nSupported Item Types:")
-        for i, item_type in enumerate(self.item_types, 1):
-            print(f"{i}. {item_type}")
 
-    def list_mods(self) -> None:
-        """List all registered mods."""
-        if not self.registry:
-            print("No mods registered.")
-            return
+def print_span_stats(window: str = "24h", operation: Optional[str] = None, as_json: bool = False,
+                     path: str = SPANS_FILE) -> List[Dict[str, Any]]:
+    """Print count, p50/p95/p99 and throughput per operation from the span log over a time window."""
+    seconds = _parse_window(window)
+    records = iter_spans(path, since=time.time() - seconds)
+    if operation:
+        records = (record for record in records
+                   if record.get("op") == operation or record.get("path", "").startswith(operation))
+    summary = summarize_spans(records, seconds)
+    if as_json:
+        print(json.dumps(summary, indent=4))
+        return summary
+    if not summary:
+        print(f"No operations recorded in the last {window}.")
+        return summary
 
-        print("\nRegistered Mods:")
-        for i, (mod_name, mod_data) in enumerate(self.registry.items(), 1):
-            print(f"{i}. {mod_name}: {mod_data['mod_path']}")
+    print(f"Operations in the last {window}:")
+    print(f"{'operation':<40} {'count':>7} {'failed':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'per min':>8} {'MB/s':>8}")
+    for row in summary:
+        rate = f"{row['mb_per_second']:.1f}" if row["mb_per_second"] is not None else "-"
+        print(f"{row['operation']:<40} {row['count']:>7} {row['failed']:>6} {row['p50_ms']:>9.2f} "
+              f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['per_minute']:>8.2f} {rate:>8}")
+    return summary
 
-    def delete_mod(self, mod_name: str) -> None:
-        """Remove a mod from the configuration."""
-        if mod_name not in self.registry:
-            print(f"Error: Mod '{mod_name}' not found.")
-            return
 
-        del self.registry[mod_name]
-        self.save_config()
-        print(f"Removed mod: {mod_name}")
+def format_item_block(item_name: str, properties: Optional[Dict[str, Any]] = None) -> str:
+    """Build an item block; properties replace the defaults of the same name (any case) and add the rest."""
+    defaults = {"DisplayName": item_name, "Icon": item_name, "Weight": "1.0",
+                "StaticModel": '""', "WorldStaticModel": '""'}
+    names = {key.lower(): key for key in defaults}
+    extra = {}
+    for key, value in (properties or {}).items():
+        if key.lower() in names:
+            defaults[names[key.lower()]] = value
+        else:
+            extra[key] = value
+    lines = [f"    item {item_name}", "    {"]
+    lines.extend(f"        {key} = {value}," for key, value in defaults.items())
+    lines.extend(f"        {key}={value}," for key, value in extra.items())
+    lines.append("    }")
+    return "\n".join(lines) + "\n"
 
-    def validate_mod_paths(self) -> None:
-        """Check if all registered mod paths still exist."""
-        invalid_mods = []
-        for mod_name, mod_data in self.registry.items():
-            if not os.path.exists(mod_data["mod_path"]):
-                invalid_mods.append(mod_name)
 
-        if invalid_mods:
-            print("Warning: The following mods have invalid paths:")
-            for mod in invalid_mods:
-                print(f"- {mod}")
-            print("Check mod manager registry file for invalid entry.")
-        else:
-            print("All mod paths are valid.")
+def format_recipe_block(recipe_name: str, recipe_type: str, result_item: str, result_count: int,
+                        recipe_time: int, ingredients: List[str], skill_type: str = "",
+                        skill_level: str = "0") -> str:
+    """Build a recipe block for a <mod>_Recipes.txt file."""
+    lines = ["", f"recipe {recipe_name} {{"]
+    for ingredient in ingredients:
+        name, _, count = ingredient.partition(":")
+        if name and count:
+            lines.append(f"    {count} {name},")
+    lines.append(f"    Result:{result_item}={result_count},")
+    lines.append(f"    Time:{recipe_time},")
+    lines.append(f"    Category:{recipe_type},")
+    if skill_type:
+        lines.append(f"    SkillRequired:{skill_type.replace(' ', '')}={skill_level},")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
 
-def display_help():
-    """Display help information."""
-    try:
-        script_path = os.path.abspath(SCRIPT_PATHS[ModManager().platform]['mod_manager_help'])
-        if ModManager().platform == 'windows':
-            subprocess.run([script_path], check=True, shell=False)
+
+def format_model_block(model_name: str) -> str:
+    """Build a model block for models.txt."""
+    return (
+        f"    model {model_name}\n"
+        "    {\n"
+        f"        mesh = WorldItems/{model_name},\n"
+        f"        texture = WorldItems/{model_name},\n"
+        "        scale = 1,\n"
+        "    }\n"
+    )
+
+
+def format_sound_block(sound_name: str, properties: Optional[Dict[str, Any]] = None) -> str:
+    """Build a sound block; clip keys (file, volume, ...) go into its clip block and anything unknown is added."""
+    clip = {
+        "file": f"media/sound/{sound_name}.ogg",
+        "distanceMax": 6,
+        "reverbFactor": 0.1,
+        "volume": 0.7,
+    }
+    sound = {
+        "category": "Player",
+        "loop": "true",
+        "is3D": "true",
+    }
+    extra = []
+    for key, value in (properties or {}).items():
+        if key == "" or value == "":
+            continue
+        if key in SOUND_CLIP_KEYS:
+            clip[key] = value
+        elif key in sound:
+            sound[key] = value
+        else:
+            extra.append(f"        {key} = {value},")
+
+    lines = ["", f"    sound {sound_name} {{"]
+    lines.extend(f"        {key} = {value}," for key, value in sound.items())
+    lines.append("        clip {")
+    lines.extend(f"            {key} = {value}," for key, value in clip.items())
+    lines.append("        }")
+    lines.extend(extra)
+    lines.append("    }")
+    return "\n".join(lines) + "\n"
+
+
+def item_file_header(mod_name: str) -> str:
+    """Module header written at the top of a new items_<Type>.txt file."""
+    return f"module {mod_name} {{\n    imports {{\n        Base\n    }}\n"
+
+
+def sound_file_header(mod_name: str) -> str:
+    """Module header written at the top of a new sounds_<Type>.txt file."""
+    return f"module {mod_name} {{\n"
+
+
+def base_file_header() -> str:
+    """Module header written at the top of new recipe and model files."""
+    return "module Base\n{\n"
+
+
+def format_mod_info(mod_name: str) -> str:
+    """Build the contents of a new mod's mod.info file."""
+    return (
+        f"name={mod_name}\n"
+        f"id={mod_name}\n"
+        f"description=A new Project Zomboid mod called {mod_name}.\n"
+        "poster=poster.png\n"
+        "url=https://theindiestone.com/forums/\n"
+    )
+
+
+def mod_type_folders(mod_types: List[str]) -> List[str]:
+    """Return the media subfolders for a list of MOD_TYPES names."""
+    folders: List[str] = []
+    for mod_type in mod_types:
+        folders.extend(MOD_TYPES[mod_type])
+    return folders
+
+
+def scaffold_mod_tree(mod_name: str, mod_path: str, mod_types: List[str]) -> str:
+    """Create a mod folder with mod.info, a placeholder poster and the media folders of mod_types.
+
+    An existing mod.info or poster.png is left as it is. Returns the mod folder's absolute path.
+    """
+    full_path = os.path.abspath(os.path.join(mod_path, mod_name))
+    media = os.path.join(full_path, "media")
+    os.makedirs(media, exist_ok=True)
+    for file_name, content in (("mod.info", format_mod_info(mod_name)),
+                               ("poster.png", "[Placeholder image file]\n")):
+        try:
+            with open(os.path.join(full_path, file_name), "x", encoding="utf-8") as f:
+                f.write(content)
+        except FileExistsError:
+            pass
+    for folder in mod_type_folders(mod_types):
+        os.makedirs(os.path.join(media, folder), exist_ok=True)
+    return full_path
+
+
+def _find_closing_brace(f) -> int:
+    """Return the byte offset of the module's closing brace, scanning back from the end."""
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    pos = end
+    chunk_size = 4096
+    while pos > 0:
+        start = max(0, pos - chunk_size)
+        f.seek(start)
+        chunk = f.read(pos - start)
+        stripped = chunk.rstrip()
+        if stripped:
+            if not stripped.endswith(b"}"):
+                break
+            return start + len(stripped) - 1
+        pos = start
+    raise ValueError("Existing file does not end with a closing brace.")
+
+
+def _script_lock_path(script_file: str) -> str:
+    """Lock file guarding one script file; kept out of the mod so it is never installed."""
+    key = hashlib.blake2b(os.path.normcase(os.path.abspath(script_file)).encode("utf-8"), digest_size=16)
+    return os.path.join(SCRIPT_LOCK_DIR, f"{key.hexdigest()}.lock")
+
+
+def write_script_blocks(script_file: str, blocks: List[str], header: str) -> int:
+    """Insert blocks before a script file's closing brace and return the bytes written.
+
+    The file is read, extended and replaced through a temp file and rename while an
+    advisory lock on it is held, so parallel managers never interleave or lose edits
+    and a crash leaves either the old or the new file. Creates the file with the
+    given module header when it does not exist yet.
+    """
+    text = "".join(blocks)
+    with span("emit", bytes=len(text), blocks=len(blocks)) as record:
+        directory = os.path.dirname(script_file)
+        os.makedirs(directory, exist_ok=True)
+        with file_lock(_script_lock_path(script_file)):
+            try:
+                with open(script_file, "rb") as f:
+                    content = f.read()
+                    mode = os.fstat(f.fileno()).st_mode & 0o777
+                offset = _find_closing_brace(io.BytesIO(content))
+                data = content[:offset] + (text + "}\n").encode("utf-8")
+            except FileNotFoundError:
+                mode = 0o644
+                data = (header + text + "}\n").encode("utf-8")
+
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(script_file)}.",
+                                       suffix=".modmanager-tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(tmp, mode)
+                os.replace(tmp, script_file)
+            except BaseException:
+                try:
+                    os.remove(tmp)
+                except FileNotFoundError:
+                    pass
+                raise
+        record["written"] = len(data)
+        return len(data)
+
+
+class ScriptWriter:
+    """Write-behind buffer for block insertions into media/scripts/*.txt files.
+
+    Inside deferred(), add() only queues blocks; when the outermost deferred() exits,
+    each touched file is rewritten once with write_script_blocks. Outside it, add()
+    writes straight away. Buffers are per thread, so daemon requests flush only their
+    own edits. before_write, if given, is called with the files about to be written.
+    Messages passed to add() are printed once their file has been written.
+    """
+
+    def __init__(self, before_write=None):
+        self._local = threading.local()
+        self.before_write = before_write
+
+    def _state(self):
+        state = self._local
+        if not hasattr(state, "pending"):
+            state.pending = {}
+            state.depth = 0
+        return state
+
+    def add(self, script_file: str, block: str, header: str, message: Optional[str] = None) -> None:
+        """Queue a block for a script file, writing it now unless writes are deferred."""
+        state = self._state()
+        _, blocks, messages = state.pending.setdefault(script_file, (header, [], []))
+        blocks.append(block)
+        if message:
+            messages.append(message)
+        if not state.depth:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every queued block of this thread and return the bytes written.
+
+        All files are attempted; the first error is raised afterwards.
+        """
+        state = self._state()
+        pending, state.pending = state.pending, {}
+        if pending and self.before_write is not None:
+            self.before_write(list(pending))
+        written, errors = 0, []
+        for script_file, (header, blocks, messages) in pending.items():
+            try:
+                written += write_script_blocks(script_file, blocks, header)
+            except (OSError, ValueError) as e:
+                logging.error(f"Failed to write {len(blocks)} blocks to '{script_file}': {e}")
+                errors.append(e)
+                continue
+            for message in messages:
+                print(message)
+        if errors:
+            raise errors[0]
+        return written
+
+    @contextmanager
+    def deferred(self):
+        """Buffer insertions made in the block and write each touched file once at the end."""
+        state = self._state()
+        state.depth += 1
+        try:
+            yield self
+        finally:
+            state.depth -= 1
+            if not state.depth and state.pending:
+                self.flush()
+
+
+# Bumped whenever parse output changes so cached parse results are invalidated
+PARSER_VERSION = 1
+
+_BRACES = re.compile(r"([{}])")
+
+
+def _strip_block_comments(line: str, in_comment: bool) -> Tuple[str, bool]:
+    """Remove /* ... */ comments from a line, tracking comments that span lines."""
+    kept = []
+    pos = 0
+    while pos < len(line):
+        if in_comment:
+            end = line.find("*/", pos)
+            if end == -1:
+                return "".join(kept), True
+            pos = end + 2
+            in_comment = False
+        else:
+            start = line.find("/*", pos)
+            if start == -1:
+                kept.append(line[pos:])
+                break
+            kept.append(line[pos:start])
+            pos = start + 2
+            in_comment = True
+    return "".join(kept), in_comment
+
+
+def _parse_ingredient(entry: str) -> Dict[str, Any]:
+    """Parse a recipe ingredient line such as '2 Plank', 'Nails=4' or 'keep Hammer'."""
+    words = entry.split(None, 1)
+    keep = False
+    count: Any = 1
+    name = entry
+    if len(words) == 2 and words[0].lower() in ("keep", "destroy"):
+        keep = words[0].lower() == "keep"
+        name = words[1].strip()
+    elif len(words) == 2 and words[0].isdigit():
+        count, name = int(words[0]), words[1].strip()
+    elif "=" in entry:
+        name, _, raw_count = entry.partition("=")
+        name = name.strip()
+        try:
+            count = int(float(raw_count))
+        except ValueError:
+            count = raw_count.strip()
+    return {"item": name, "count": count, "keep": keep}
+
+
+def _add_entries(definition: Dict[str, Any], prefix: List[str], text: str) -> None:
+    """Add the comma-separated entries of a body line to a definition."""
+    entries = text.split(",") if text.count(",") > 1 or text[-1] != "," else [text[:-1]]
+    for entry in entries:
+        entry = entry.strip()
+        if not entry:
+            continue
+        colon = entry.find(":")
+        equals = entry.find("=")
+        if definition["kind"] == "recipe" and not prefix:
+            # recipe properties use 'Key:Value'; everything else is an ingredient
+            if colon > 0 and (equals == -1 or colon < equals):
+                definition["properties"][entry[:colon].strip()] = entry[colon + 1:].strip()
+            else:
+                definition["ingredients"].append(_parse_ingredient(entry))
+            continue
+        if equals > 0:
+            key, value = entry[:equals].rstrip(), entry[equals + 1:].lstrip()
+        elif colon > 0:
+            key, value = entry[:colon].rstrip(), entry[colon + 1:].lstrip()
+        else:
+            key, value = entry, ""
+        if prefix:
+            key = ".".join(prefix + [key])
+        definition["properties"][key] = value
+
+
+def parse_script_lines(lines, path: str = "") -> Iterator[Dict[str, Any]]:
+    """Stream definitions out of Project Zomboid script lines.
+
+    Yields one dict per top-level block inside a module (item, recipe, model, sound, ...)
+    with its kind, name, module, file, line, properties and, for recipes, ingredients.
+    Nested blocks such as a sound's clip are flattened into 'clip.key' properties.
+    """
+    module: Optional[str] = None
+    stack: List[str] = []
+    current: Optional[Dict[str, Any]] = None
+    prefix: List[str] = []
+    pending: Optional[Tuple[str, int]] = None
+    in_comment = False
+
+    for line_no, line in enumerate(lines, 1):
+        if in_comment or "/*" in line:
+            line, in_comment = _strip_block_comments(line, in_comment)
+        if "{" in line or "}" in line:
+            tokens = _BRACES.split(line)
+        else:
+            # fast path for the common 'Key = Value,' body line
+            text = line.strip()
+            if not text:
+                continue
+            if current is not None and pending is None and text[-1] == ",":
+                _add_entries(current, prefix, text)
+                continue
+            tokens = [text]
+
+        for token in tokens:
+            if token == "{":
+                header, header_line = pending if pending else ("", line_no)
+                pending = None
+                words = header.split()
+                if current is not None:
+                    prefix.append(words[0] if words else "")
+                    stack.append("nested")
+                elif words[:1] == ["module"]:
+                    module = " ".join(words[1:])
+                    stack.append("module")
+                elif len(words) >= 2 and module is not None:
+                    current = {
+                        "kind": words[0].lower(),
+                        "name": " ".join(words[1:]),
+                        "module": module,
+                        "file": path,
+                        "line": header_line,
+                        "properties": {},
+                    }
+                    if current["kind"] == "recipe":
+                        current["ingredients"] = []
+                    stack.append("definition")
+                else:
+                    # imports and anything else that is not a named definition
+                    stack.append("block")
+            elif token == "}":
+                if pending and current is not None:
+                    _add_entries(current, prefix, pending[0])
+                pending = None
+                if not stack:
+                    continue
+                context = stack.pop()
+                if context == "definition":
+                    yield current
+                    current = None
+                elif context == "nested":
+                    prefix.pop()
+                elif context == "module":
+                    module = None
+            else:
+                text = token.strip()
+                if not text:
+                    continue
+                if pending and current is not None:
+                    # the previous line was a property without a trailing comma, not a block header
+                    _add_entries(current, prefix, pending[0])
+                pending = None
+                if text.endswith(",") and current is not None:
+                    _add_entries(current, prefix, text)
+                else:
+                    pending = (text, line_no)
+
+
+def iter_script_definitions(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream the definitions of one script file."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        yield from parse_script_lines(f, path)
+
+
+def iter_mod_script_files(mod_path: str) -> Iterator[Tuple[str, int, int]]:
+    """Yield (path, size, mtime_ns) for every .txt file under a mod's media/scripts folder."""
+    scripts_dir = os.path.join(mod_path, "media", "scripts")
+    files, _ = scan_tree(scripts_dir)
+    for rel in sorted(files):
+        if rel.lower().endswith(".txt"):
+            size, mtime = files[rel]
+            yield os.path.join(scripts_dir, *rel.split("/")), size, mtime
+
+
+class ParseCache:
+    """SQLite cache of parsed script files keyed by path, size and mtime.
+
+    A file whose size and mtime match its entry is served without being opened. When only
+    the mtime changed, the content hash decides whether the entry is still valid. Entries
+    are evicted least recently used first once the cache exceeds max_bytes, and the whole
+    cache is dropped when PARSER_VERSION changes. It also keeps content hashes of
+    arbitrary files by path, size and mtime for get_hashes.
+    """
+
+    def __init__(self, path: str = PARSE_CACHE_FILE, max_bytes: int = PARSE_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched: List[Tuple[float, str]] = []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, "
+                              "mtime INTEGER, hash TEXT, data TEXT, bytes INTEGER, last_used REAL)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS hashes (path TEXT PRIMARY KEY, size INTEGER, "
+                              "mtime INTEGER, hash TEXT)")
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'parser_version'").fetchone()
+            if row is None or row[0] != str(PARSER_VERSION):
+                self.conn.execute("DELETE FROM files")
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('parser_version', ?)",
+                                  (str(PARSER_VERSION),))
+
+    def get_definitions(self, path: str, size: int, mtime: int) -> List[Dict[str, Any]]:
+        """Return the parsed definitions of a script file, parsing it only on a cache miss."""
+        with self._lock:
+            row = self.conn.execute("SELECT size, mtime, hash, data FROM files WHERE path = ?",
+                                    (path,)).fetchone()
+        if row is not None and row[0] == size and row[1] == mtime:
+            self.hits += 1
+            self._touched.append((time.time(), path))
+            return json.loads(row[3])
+
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.blake2b(raw, digest_size=20).hexdigest()
+        if row is not None and row[0] == size and row[2] == digest:
+            # touched but unchanged: refresh the stored mtime so the next scan is stat-only
+            self.hits += 1
+            with self._lock, self.conn:
+                self.conn.execute("UPDATE files SET mtime = ?, last_used = ? WHERE path = ?",
+                                  (mtime, time.time(), path))
+            return json.loads(row[3])
+
+        self.misses += 1
+        definitions = list(parse_script_lines(raw.decode("utf-8", errors="replace").splitlines(), path))
+        data = json.dumps(definitions, separators=(",", ":"))
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO files (path, size, mtime, hash, data, bytes, last_used) "
+                              "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              (path, size, mtime, digest, data, len(data), time.time()))
+        return definitions
+
+    def get_hashes(self, files: List[Tuple[str, int, int]], workers: int = 8) -> Dict[str, str]:
+        """Return {path: content hash} for (path, size, mtime_ns) entries.
+
+        Only files whose size or mtime differ from the stored entry are read, in a thread pool.
+        Files that cannot be read are left out.
+        """
+        digests: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(files), 500):
+                chunk = files[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                stored = {row[0]: row[1:] for row in self.conn.execute(
+                    f"SELECT path, size, mtime, hash FROM hashes WHERE path IN ({placeholders})",
+                    [path for path, _, _ in chunk])}
+                for path, size, mtime in chunk:
+                    row = stored.get(path)
+                    if row is not None and row[0] == size and row[1] == mtime:
+                        digests[path] = row[2]
+        self.hits += len(digests)
+
+        missing = [entry for entry in files if entry[0] not in digests]
+        if not missing:
+            return digests
+
+        def hash_entry(entry: Tuple[str, int, int]) -> Optional[Tuple[str, int, int, str]]:
+            try:
+                return entry + (hash_file(entry[0]),)
+            except OSError as e:
+                logging.warning(f"Could not hash {entry[0]}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(missing)))) as pool:
+            rows = [row for row in pool.map(hash_entry, missing) if row is not None]
+        self.misses += len(rows)
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO hashes (path, size, mtime, hash) VALUES (?, ?, ?, ?)", rows)
+        digests.update((path, digest) for path, _, _, digest in rows)
+        return digests
+
+    def flush(self) -> None:
+        """Record pending LRU timestamps and evict entries beyond the size cap."""
+        with self._lock, self.conn:
+            if self._touched:
+                self.conn.executemany("UPDATE files SET last_used = ? WHERE path = ?", self._touched)
+                self._touched = []
+            total = self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM files").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            evict = []
+            for path, size in self.conn.execute("SELECT path, bytes FROM files ORDER BY last_used"):
+                if total <= self.max_bytes:
+                    break
+                evict.append((path,))
+                total -= size
+            self.conn.executemany("DELETE FROM files WHERE path = ?", evict)
+
+    def clear(self) -> None:
+        """Drop every cached file and hash."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("DELETE FROM hashes")
+
+
+class ScriptIndex:
+    """In-memory index of script definitions across mods, kept per file so files can be re-indexed."""
+
+    def __init__(self):
+        self.files: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_name: Dict[str, List[Dict[str, Any]]] = {}
+        self.stats: Dict[str, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(definitions) for definitions in self.files.values())
+
+    def add_file(self, mod_name: str, path: str, definitions: Optional[List[Dict[str, Any]]] = None,
+                 stat: Optional[Tuple[int, int]] = None) -> None:
+        """Index the definitions of a script file, replacing any previous entries for it.
+
+        stat is the (size, mtime_ns) the definitions were read at, used to detect later changes.
+        """
+        self.remove_file(path)
+        if stat is not None:
+            self.stats[path] = stat
+        if definitions is None:
+            definitions = list(iter_script_definitions(path))
+        for definition in definitions:
+            definition["mod"] = mod_name
+            self.by_name.setdefault(definition["name"], []).append(definition)
+        self.files[path] = definitions
+
+    def remove_file(self, path: str) -> None:
+        """Drop every definition that came from a script file."""
+        self.stats.pop(path, None)
+        for definition in self.files.pop(path, []):
+            entries = [d for d in self.by_name.get(definition["name"], []) if d is not definition]
+            if entries:
+                self.by_name[definition["name"]] = entries
+            else:
+                self.by_name.pop(definition["name"], None)
+
+    def find(self, name: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return every definition with this name, optionally of one kind."""
+        entries = self.by_name.get(name, [])
+        if kind:
+            entries = [d for d in entries if d["kind"] == kind]
+        return entries
+
+    def definitions(self, kind: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over every indexed definition, optionally of one kind."""
+        for definitions in self.files.values():
+            for definition in definitions:
+                if kind is None or definition["kind"] == kind:
+                    yield definition
+
+    def duplicates(self, kind: Optional[str] = None) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        """Return (kind, name) pairs that are defined more than once."""
+        found = {}
+        for name, entries in self.by_name.items():
+            by_kind: Dict[str, List[Dict[str, Any]]] = {}
+            for definition in entries:
+                if kind is None or definition["kind"] == kind:
+                    by_kind.setdefault(definition["kind"], []).append(definition)
+            for def_kind, same in by_kind.items():
+                if len(same) > 1:
+                    found[(def_kind, name)] = same
+        return found
+
+
+# Bump when the search index layout or tokenizer changes; the index is then rebuilt
+SEARCH_INDEX_VERSION = 1
+
+_SEARCH_TOKEN = re.compile(r"[A-Za-z0-9]+")
+_SEARCH_CAMEL = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+_SEARCH_FILTER = re.compile(r"^([A-Za-z_][\w.]*)(>=|<=|!=|=|>|<)(.*)$")
+_SEARCH_FIELD = re.compile(r"^([A-Za-z_][\w.]*):(.+)$")
+
+
+@functools.lru_cache(maxsize=65536)
+def search_terms(text: str) -> frozenset:
+    """Split text into lowercase search terms, adding the parts of camelCase words.
+
+    'Base.HuntingKnife' gives base, huntingknife, hunting and knife. Plain numbers are
+    left out; numeric values are searched with property filters instead.
+    """
+    terms = set()
+    for token in _SEARCH_TOKEN.findall(text):
+        if token.isdigit():
+            continue
+        terms.add(token.lower())
+        parts = _SEARCH_CAMEL.findall(token)
+        if len(parts) > 1:
+            terms.update(part.lower() for part in parts if not part.isdigit())
+    return frozenset(terms)
+
+
+def _definition_postings(definition: Dict[str, Any]) -> set:
+    """Return the (term, field) pairs a definition is found under."""
+    postings = set()
+    for field, text in [("name", definition["name"])] + \
+            [(key.lower(), str(value)) for key, value in definition["properties"].items()] + \
+            [("ingredient", ingredient["item"]) for ingredient in definition.get("ingredients", [])]:
+        for term in search_terms(text):
+            postings.add((term, field))
+    return postings
+
+
+def _search_number(value: str) -> Optional[float]:
+    """Return a property value as a number for range filters, or None."""
+    if not value or value[0] not in "0123456789-+.":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _trigrams(term: str, anchored: bool = True) -> set:
+    """Return the trigrams of a term, with ^ and $ marking its ends when anchored."""
+    if anchored:
+        term = f"^{term}$"
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+def _within_distance(a: str, b: str, limit: int) -> bool:
+    """Return whether the edit distance between a and b is at most limit."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+def parse_search_query(words: List[str], fuzzy: bool = False) -> List[Dict[str, Any]]:
+    """Turn search words into conditions that must all match.
+
+    A word is a term (axe), a prefix (axe*), a substring (*axe*) or a fuzzy term (axe~),
+    optionally limited to one field (DisplayName:axe, ingredient:Plank). Key>value,
+    >=, <, <=, = and != compare property values, numerically when both sides are numbers.
+    """
+    conditions = []
+    for word in words:
+        word = word.strip()
+        if not word:
+            continue
+        match = _SEARCH_FILTER.match(word)
+        if match:
+            key, op, value = match.groups()
+            if op in (">", ">=", "<", "<=") and _search_number(value) is None:
+                raise ValueError(f"'{word}' needs a number to compare with")
+            conditions.append({"type": "filter", "key": key.lower(), "op": op, "value": value})
+            continue
+        field = None
+        match = _SEARCH_FIELD.match(word)
+        if match:
+            field, word = match.group(1).lower(), match.group(2)
+        mode = "fuzzy" if fuzzy else "exact"
+        if word.startswith("*") and word.endswith("*") and len(word) > 1:
+            mode, word = "substring", word[1:-1]
+        elif word.endswith("*"):
+            mode, word = "prefix", word[:-1]
+        elif word.endswith("~"):
+            mode, word = "fuzzy", word[:-1]
+        tokens = [token.lower() for token in _SEARCH_TOKEN.findall(word) if not token.isdigit()]
+        if not tokens:
+            raise ValueError(f"Nothing to search for in '{word}'; compare numbers with a filter such as Weight=2")
+        for i, token in enumerate(tokens):
+            # only the last token of 'fire ax*' is a prefix; the others must match whole
+            token_mode = mode if mode not in ("prefix", "substring") or i == len(tokens) - 1 else "exact"
+            if token_mode == "substring" and len(token) < 3:
+                raise ValueError(f"Substring searches need at least 3 characters: '*{token}*'")
+            conditions.append({"type": "term", "field": field, "term": token, "mode": token_mode})
+    return conditions
+
+
+class SearchIndex:
+    """Persistent SQLite inverted index of the definitions in registered mods.
+
+    Definitions are found by the terms of their name, property values and recipe
+    ingredients, and filtered on property values. sync() re-indexes only script files
+    whose size or mtime changed, so the index stays current between runs.
+    """
+
+    def __init__(self, path: str = SEARCH_INDEX_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        version = f"{PARSER_VERSION}.{SEARCH_INDEX_VERSION}"
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # a full build touches most index pages; a bigger page cache keeps those writes in memory
+            self.conn.execute("PRAGMA cache_size = -65536")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'index_version'").fetchone()
+            if row is None or row[0] != version:
+                for table in ("files", "defs", "postings", "props", "grams"):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('index_version', ?)", (version,))
+            self.conn.execute("CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, "
+                              "mod TEXT, size INTEGER, mtime INTEGER)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS defs (id INTEGER PRIMARY KEY, file INTEGER, "
+                              "kind TEXT, module TEXT, name TEXT, line INTEGER, data TEXT)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS defs_file ON defs (file)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS postings (term TEXT, field TEXT, def INTEGER, "
+                              "PRIMARY KEY (term, field, def)) WITHOUT ROWID")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS props (def INTEGER, key TEXT, value TEXT, num REAL, "
+                              "PRIMARY KEY (def, key)) WITHOUT ROWID")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS props_key ON props (key, num)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS grams (gram TEXT, term TEXT, "
+                              "PRIMARY KEY (gram, term)) WITHOUT ROWID")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM defs").fetchone()[0]
+
+    def sync(self, files: List[Tuple[str, str, int, int]], load) -> Tuple[List[str], List[str]]:
+        """Bring the index in line with files, a list of (mod, path, size, mtime_ns).
+
+        load(path, size, mtime) returns the definitions of a changed file. Returns the
+        (changed or added, removed) file paths.
+        """
+        with self._lock:
+            indexed = {row[0]: row[1:] for row in self.conn.execute("SELECT path, mod, size, mtime FROM files")}
+        changed = [(mod, path, size, mtime) for mod, path, size, mtime in files
+                   if indexed.get(path) != (mod, size, mtime)]
+        seen = {path for _, path, _, _ in files}
+        removed = [path for path in indexed if path not in seen]
+        if not changed and not removed:
+            return [], []
+
+        parsed = []
+        for mod, path, size, mtime in changed:
+            try:
+                parsed.append((mod, path, size, mtime, load(path, size, mtime)))
+            except OSError as e:
+                logging.error(f"Could not index script file {path}: {e}")
+        with self._lock, self.conn:
+            for path in removed:
+                self._remove_file(path)
+            next_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM defs").fetchone()[0] + 1
+            defs, postings, props, words, moved, stale = [], [], [], set(), [], []
+            for mod, path, size, mtime, definitions in parsed:
+                row = self.conn.execute("SELECT id, mod FROM files WHERE path = ?", (path,)).fetchone()
+                # definitions that are unchanged apart from their line keep their rows, so adding
+                # one item to a large file only indexes that item
+                old: Dict[Tuple[str, str, str, str], List[Tuple[int, int]]] = {}
+                if row is not None and row[1] == mod:
+                    file_id = row[0]
+                    for def_id, kind, module, name, line, data in self.conn.execute(
+                            "SELECT id, kind, module, name, line, data FROM defs WHERE file = ?", (file_id,)):
+                        old.setdefault((kind, module, name, data), []).append((def_id, line))
+                    self.conn.execute("UPDATE files SET size = ?, mtime = ? WHERE id = ?", (size, mtime, file_id))
+                else:
+                    self._remove_file(path)
+                    file_id = self.conn.execute("INSERT INTO files (path, mod, size, mtime) VALUES (?, ?, ?, ?)",
+                                                (path, mod, size, mtime)).lastrowid
+                for definition in definitions:
+                    data = {"properties": definition["properties"]}
+                    if "ingredients" in definition:
+                        data["ingredients"] = definition["ingredients"]
+                    data = json.dumps(data, separators=(",", ":"))
+                    same = old.get((definition["kind"], definition.get("module"), definition["name"], data))
+                    if same:
+                        def_id, line = same.pop()
+                        if line != definition["line"]:
+                            moved.append((definition["line"], def_id))
+                        continue
+                    defs.append((next_id, file_id, definition["kind"], definition.get("module"),
+                                 definition["name"], definition["line"], data))
+                    for term, field in _definition_postings(definition):
+                        postings.append((term, field, next_id))
+                        if term.isalpha():
+                            words.add(term)
+                    for key, value in {key.lower(): str(value) for key, value in definition["properties"].items()}.items():
+                        props.append((next_id, key, value, _search_number(value)))
+                    next_id += 1
+                stale.extend((def_id, *key) for key, entries in old.items() for def_id, _ in entries)
+            self._remove_definitions(stale)
+            self.conn.executemany("UPDATE defs SET line = ? WHERE id = ?", moved)
+            # inserting in key order keeps the B-tree writes sequential
+            postings.sort()
+            self.conn.executemany("INSERT INTO defs VALUES (?, ?, ?, ?, ?, ?, ?)", defs)
+            self.conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?)", postings)
+            self.conn.executemany("INSERT OR IGNORE INTO props VALUES (?, ?, ?, ?)", props)
+            # substring and fuzzy matching only cover words; numbered names such as Axe12 are
+            # still found whole, by prefix and by their camelCase parts. Words are never dropped
+            # from the gram table; stale ones simply match nothing.
+            self.conn.executemany("INSERT OR IGNORE INTO grams VALUES (?, ?)",
+                                  sorted((gram, word) for word in words for gram in _trigrams(word)))
+        return [path for _, path, _, _, _ in parsed], removed
+
+    def _remove_definitions(self, rows: List[Tuple[int, str, str, str, str]]) -> None:
+        """Drop (id, kind, module, name, data) definitions; the caller holds the lock and the transaction."""
+        postings, props = [], []
+        for def_id, kind, module, name, data in rows:
+            definition = dict(json.loads(data), kind=kind, module=module, name=name)
+            postings.extend((term, field, def_id) for term, field in _definition_postings(definition))
+            props.extend((def_id, key.lower()) for key in definition["properties"])
+        self.conn.executemany("DELETE FROM postings WHERE term = ? AND field = ? AND def = ?", sorted(postings))
+        self.conn.executemany("DELETE FROM props WHERE def = ? AND key = ?", props)
+        self.conn.executemany("DELETE FROM defs WHERE id = ?", [(row[0],) for row in rows])
+
+    def _remove_file(self, path: str) -> None:
+        """Drop a file and its definitions; the caller holds the lock and the transaction."""
+        row = self.conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            self._remove_definitions(self.conn.execute("SELECT id, kind, module, name, data FROM defs "
+                                                       "WHERE file = ?", row).fetchall())
+            self.conn.execute("DELETE FROM files WHERE id = ?", row)
+
+    def clear(self) -> None:
+        """Drop every indexed file."""
+        with self._lock, self.conn:
+            for table in ("files", "defs", "postings", "props", "grams"):
+                self.conn.execute(f"DELETE FROM {table}")
+
+    def _expand(self, term: str, mode: str) -> List[str]:
+        """Return the indexed terms a substring or fuzzy query term stands for."""
+        if mode == "substring":
+            grams = _trigrams(term, anchored=False)
+            rows = self.conn.execute(f"SELECT term FROM grams WHERE gram IN ({','.join('?' * len(grams))}) "
+                                     "GROUP BY term HAVING COUNT(*) = ?", (*grams, len(grams)))
+            return [row[0] for row in rows if term in row[0]]
+        # fuzzy: one edit per 4 characters, at most 2, then a shared-trigram prefilter
+        limit = min(2, len(term) // 4)
+        if not limit:
+            return [term]
+        grams = _trigrams(term)
+        rows = self.conn.execute(f"SELECT term FROM grams WHERE gram IN ({','.join('?' * len(grams))}) "
+                                 "GROUP BY term HAVING COUNT(*) >= ? AND length(term) BETWEEN ? AND ?",
+                                 (*grams, max(1, len(grams) - 3 * limit), len(term) - limit, len(term) + limit))
+        return [row[0] for row in rows if _within_distance(term, row[0], limit)]
+
+    def _condition_sql(self, condition: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """Return a SELECT of the definition ids matching one condition."""
+        if condition["type"] == "filter":
+            key, op, value = condition["key"], condition["op"], condition["value"]
+            number = _search_number(value)
+            if number is not None:
+                return f"SELECT def FROM props WHERE key = ? AND num {op} ?", [key, number]
+            if op == "=":
+                return "SELECT def FROM props WHERE key = ? AND value = ? COLLATE NOCASE", [key, value]
+            if op == "!=":
+                return "SELECT def FROM props WHERE key = ? AND value != ? COLLATE NOCASE", [key, value]
+            raise ValueError(f"Cannot compare {key} {op} '{value}'")
+
+        field_sql, field_params = (" AND field = ?", [condition["field"]]) if condition["field"] else ("", [])
+        term, mode = condition["term"], condition["mode"]
+        if mode == "prefix":
+            return (f"SELECT def FROM postings WHERE term >= ? AND term < ?{field_sql}",
+                    [term, term + "\uffff", *field_params])
+        terms = [term] if mode == "exact" else self._expand(term, mode)
+        if not terms:
+            return "SELECT NULL WHERE 0", []
+        return (f"SELECT def FROM postings WHERE term IN ({','.join('?' * len(terms))}){field_sql}",
+                [*terms, *field_params])
+
+    def search(self, conditions: List[Dict[str, Any]], kind: Optional[str] = None, mod: Optional[str] = None,
+               limit: int = 50) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return (total matches, first limit definitions) matching every condition."""
+        with self._lock:
+            parts, params = [], []
+            for condition in conditions:
+                sql, values = self._condition_sql(condition)
+                parts.append(sql)
+                params.extend(values)
+            where, where_params = [], []
+            if parts:
+                where.append(f"defs.id IN ({' INTERSECT '.join(parts)})")
+                where_params.extend(params)
+            if kind:
+                where.append("kind = ?")
+                where_params.append(kind.lower())
+            if mod:
+                where.append("file IN (SELECT id FROM files WHERE mod = ?)")
+                where_params.append(mod)
+            where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+            # sort and count the matching ids in one pass, then read only the rows that are shown
+            rows = self.conn.execute(f"SELECT kind, module, name, mod, path, line, data, total FROM "
+                                     f"(SELECT id AS page_id, COUNT(*) OVER () AS total FROM defs{where_sql} "
+                                     "ORDER BY name, file, line LIMIT ?) JOIN defs ON defs.id = page_id "
+                                     "JOIN files ON files.id = defs.file ORDER BY name, defs.file, line",
+                                     (*where_params, max(1, limit))).fetchall()
+        total = rows[0][-1] if rows else 0
+        results = []
+        for kind_, module, name, mod_name, path, line, data, _ in rows[:limit]:
+            definition = {"kind": kind_, "name": name, "module": module, "mod": mod_name, "file": path, "line": line}
+            definition.update(json.loads(data))
+            results.append(definition)
+        return total, results
+
+
+def _item_names(reference: str) -> List[str]:
+    """Split an item reference like 'Base.Plank/Log=2' into bare item names."""
+    reference = reference.split("=", 1)[0].split(";", 1)[0].strip()
+    if not reference or reference.startswith("["):
+        # tag lookups such as [Recipe.GetItemTypes.Hammer] are resolved by the game at runtime
+        return []
+    return [name.strip().rsplit(".", 1)[-1] for name in reference.split("/") if name.strip()]
+
+
+class RecipeGraph:
+    """Dependency graph between items and recipes, maintained one script file at a time.
+
+    Only item definitions and recipes are used. Items are matched by bare name, so
+    'Base.Plank' and 'Plank' refer to the same item.
+    """
+
+    def __init__(self):
+        self.file_items: Dict[str, List[str]] = {}
+        self.file_recipes: Dict[str, List[Dict[str, Any]]] = {}
+        self.item_counts: Dict[str, int] = {}
+
+    def update_file(self, path: str, definitions: List[Dict[str, Any]]) -> None:
+        """Replace the items and recipes contributed by one script file."""
+        self.remove_file(path)
+        items = []
+        recipes = []
+        for definition in definitions:
+            if definition["kind"] == "item":
+                items.append(definition["name"])
+            elif definition["kind"] == "recipe":
+                recipes.append({
+                    "name": definition["name"],
+                    "mod": definition.get("mod"),
+                    "file": path,
+                    "line": definition["line"],
+                    "ingredients": [names for names in
+                                    (_item_names(ingredient["item"]) for ingredient in definition.get("ingredients", []))
+                                    if names],
+                    "results": _item_names(definition["properties"].get("Result", "")),
+                })
+        for name in items:
+            self.item_counts[name] = self.item_counts.get(name, 0) + 1
+        self.file_items[path] = items
+        self.file_recipes[path] = recipes
+
+    def remove_file(self, path: str) -> None:
+        """Drop everything a script file contributed."""
+        for name in self.file_items.pop(path, []):
+            self.item_counts[name] -= 1
+            if not self.item_counts[name]:
+                del self.item_counts[name]
+        self.file_recipes.pop(path, None)
+
+    def recipes(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over every recipe in the graph."""
+        for recipes in self.file_recipes.values():
+            yield from recipes
+
+    def analyze(self) -> Dict[str, Any]:
+        """Report unknown ingredients/results, item cycles and items no recipe chain can reach.
+
+        Items that no recipe produces count as obtainable; an item produced only by recipes
+        whose ingredients can never all be obtained is unreachable.
+        """
+        known = self.item_counts
+        unknown_ingredients = []
+        unknown_results = []
+        producers: Dict[str, List[int]] = {}
+        edges: Dict[str, set] = {}
+        recipes = list(self.recipes())
+
+        for recipe_id, recipe in enumerate(recipes):
+            for alternatives in recipe["ingredients"]:
+                if not any(name in known for name in alternatives):
+                    unknown_ingredients.append((recipe, "/".join(alternatives)))
+            if not recipe["results"]:
+                unknown_results.append((recipe, ""))
+            for result in recipe["results"]:
+                if result not in known:
+                    unknown_results.append((recipe, result))
+                producers.setdefault(result, []).append(recipe_id)
+                for alternatives in recipe["ingredients"]:
+                    for name in alternatives:
+                        edges.setdefault(name, set()).add(result)
+
+        return {
+            "items": len(known),
+            "recipes": len(recipes),
+            "unknown_ingredients": unknown_ingredients,
+            "unknown_results": unknown_results,
+            "cycles": self._cycles(edges),
+            "unreachable": self._unreachable(recipes, producers),
+        }
+
+    @staticmethod
+    def _cycles(edges: Dict[str, set]) -> List[List[str]]:
+        """Return the strongly connected item groups that form cycles (iterative Tarjan)."""
+        index_of: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        on_stack = set()
+        stack: List[str] = []
+        cycles = []
+        counter = 0
+        for root in edges:
+            if root in index_of:
+                continue
+            work = [(root, iter(edges.get(root, ())))]
+            index_of[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in index_of:
+                        index_of[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(edges.get(child, ()))))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index_of[child])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in edges.get(node, ()):
+                        cycles.append(sorted(component))
+        return cycles
+
+    def _unreachable(self, recipes: List[Dict[str, Any]], producers: Dict[str, List[int]]) -> List[str]:
+        """Return defined items that can only come from recipes that can never be crafted."""
+        remaining = [len(recipe["ingredients"]) for recipe in recipes]
+        # every ingredient slot gets a global number so satisfied slots fit in one bytearray
+        slot_owner: List[int] = []
+        watchers: Dict[str, List[int]] = {}
+        for recipe_id, recipe in enumerate(recipes):
+            for alternatives in recipe["ingredients"]:
+                slot = len(slot_owner)
+                slot_owner.append(recipe_id)
+                for name in alternatives:
+                    watchers.setdefault(name, []).append(slot)
+        satisfied = bytearray(len(slot_owner))
+
+        available = {name for name in self.item_counts if name not in producers}
+        queue = list(available)
+        for recipe_id, count in enumerate(remaining):
+            if count == 0:
+                queue.extend(name for name in recipes[recipe_id]["results"] if name not in available)
+                available.update(recipes[recipe_id]["results"])
+        while queue:
+            name = queue.pop()
+            for slot in watchers.get(name, ()):
+                if satisfied[slot]:
+                    continue
+                satisfied[slot] = 1
+                recipe_id = slot_owner[slot]
+                remaining[recipe_id] -= 1
+                if remaining[recipe_id] == 0:
+                    for result in recipes[recipe_id]["results"]:
+                        if result not in available:
+                            available.add(result)
+                            queue.append(result)
+        return sorted(name for name in self.item_counts if name not in available)
+
+
+# Percentiles reported per property and item type by the balance report
+BALANCE_PERCENTILES = (5, 25, 50, 75, 95)
+
+_ITEM_FILE = re.compile(r"^items_(.+)\.txt$", re.IGNORECASE)
+
+
+def _item_group(definition: Dict[str, Any], item_types: Dict[str, str]) -> str:
+    """Return the item type an item is compared within: its Type property, else its items_<Type>.txt file.
+
+    item_types maps lowercased, space-free type names to their display spelling.
+    """
+    declared = str(definition["properties"].get("Type", "")).strip()
+    if not declared:
+        match = _ITEM_FILE.match(os.path.basename(definition.get("file", "")))
+        declared = match.group(1) if match else "Other"
+    return item_types.get(declared.lower().replace(" ", ""), declared)
+
+
+def load_balance_columns(definitions, item_types: List[str], properties: Optional[List[str]] = None,
+                         item_type: Optional[str] = None) -> Dict[str, Any]:
+    """Collect the numeric properties of item definitions into flat NumPy columns.
+
+    Every numeric value becomes one entry of the value/prop/item arrays; items carry their
+    item type (group) and mod as integer codes. Types follow the order of item_types.
+    """
+    type_names = {name.lower().replace(" ", ""): name for name in item_types}
+    wanted = set(properties) if properties else None
+    items: List[Tuple[str, str, str, int]] = []
+    group_codes: Dict[str, int] = {}
+    mod_codes: Dict[str, int] = {}
+    prop_codes: Dict[str, int] = {}
+    item_group, item_mod, value_item, value_prop, values = [], [], [], [], []
+    for definition in definitions:
+        if definition["kind"] != "item":
+            continue
+        group = _item_group(definition, type_names)
+        if item_type and group.lower().replace(" ", "") != item_type.lower().replace(" ", ""):
+            continue
+        row = len(items)
+        items.append((definition["name"], definition.get("mod", ""), definition.get("file", ""), definition["line"]))
+        item_group.append(group_codes.setdefault(group, len(group_codes)))
+        item_mod.append(mod_codes.setdefault(definition.get("mod", ""), len(mod_codes)))
+        for key, raw in definition["properties"].items():
+            if wanted is not None and key not in wanted:
+                continue
+            number = _search_number(str(raw))
+            if number is None:
+                continue
+            value_item.append(row)
+            value_prop.append(prop_codes.setdefault(key, len(prop_codes)))
+            values.append(number)
+
+    # known item types first, in item_types order, then the rest alphabetically
+    order = {name: i for i, name in enumerate(item_types)}
+    groups = sorted(group_codes, key=lambda name: (order.get(name, len(order)), name))
+    group_remap = np.empty(max(len(groups), 1), dtype=np.int64)
+    for new, name in enumerate(groups):
+        group_remap[group_codes[name]] = new
+    value = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(value)
+    return {
+        "items": items,
+        "groups": groups,
+        "mods": list(mod_codes),
+        "properties": list(prop_codes),
+        "item_group": group_remap[np.asarray(item_group, dtype=np.int64)] if items else np.zeros(0, np.int64),
+        "item_mod": np.asarray(item_mod, dtype=np.int64),
+        "item": np.asarray(value_item, dtype=np.int64)[finite],
+        "prop": np.asarray(value_prop, dtype=np.int64)[finite],
+        "value": value[finite],
+    }
+
+
+def _grouped_percentiles(keys, values, n_keys: int, percents, by_value=None) -> Any:
+    """Return an (n_keys, len(percents)) array of linearly interpolated percentiles per key.
+
+    All keys are handled by one sort; keys without values get NaN. by_value is
+    np.argsort(values), which can be shared between calls.
+    """
+    counts = np.bincount(keys, minlength=n_keys)
+    result = np.full((n_keys, len(percents)), np.nan)
+    if not len(values):
+        return result
+    if by_value is None:
+        by_value = np.argsort(values)
+    # a stable sort by key keeps the value order within each key; on 16-bit keys NumPy uses a radix sort
+    key_type = np.uint16 if n_keys <= 1 << 16 else np.int64
+    sorted_values = values[by_value[np.argsort(keys[by_value].astype(key_type), kind="stable")]]
+    starts = np.cumsum(counts) - counts
+    last = np.maximum(counts, 1) - 1
+    position = last[:, None] * (np.asarray(percents, dtype=np.float64)[None, :] / 100)
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, last[:, None])
+    fraction = position - low
+    low_values = sorted_values[np.minimum(starts[:, None] + low, len(values) - 1)]
+    high_values = sorted_values[np.minimum(starts[:, None] + high, len(values) - 1)]
+    result = low_values + (high_values - low_values) * fraction
+    result[counts == 0] = np.nan
+    return result
+
+
+def _grouped_mean_std(keys, values, n_keys: int) -> Tuple[Any, Any, Any]:
+    """Return the (count, mean, population std) of values per key."""
+    counts = np.bincount(keys, minlength=n_keys)
+    safe = np.maximum(counts, 1)
+    mean = np.bincount(keys, weights=values, minlength=n_keys) / safe
+    std = np.sqrt(np.bincount(keys, weights=(values - mean[keys]) ** 2, minlength=n_keys) / safe)
+    return counts, mean, std
+
+
+def _number(value: Any) -> Optional[float]:
+    """Round a NumPy number for the report, turning NaN into None."""
+    value = float(value)
+    return None if value != value else round(value, 6)
+
+
+def compute_balance(columns: Dict[str, Any], z_threshold: float = 3.0) -> Dict[str, Any]:
+    """Compute per-type percentiles, z-score outliers and per-mod comparisons for balance columns."""
+    groups, mods, properties = columns["groups"], columns["mods"], columns["properties"]
+    value, prop, item = columns["value"], columns["prop"], columns["item"]
+    n_groups, n_mods = max(len(groups), 1), max(len(mods), 1)
+    n_keys = max(len(properties), 1) * n_groups
+    # one key per (property, item type), and per (property, item type, mod)
+    key = prop * n_groups + columns["item_group"][item]
+    mod_key = key * n_mods + columns["item_mod"][item]
+
+    counts, mean, std = _grouped_mean_std(key, value, n_keys)
+    by_value = np.argsort(value)
+    percentiles = _grouped_percentiles(key, value, n_keys, (0,) + BALANCE_PERCENTILES + (100,), by_value)
+    deviation = value - mean[key]
+    z = np.divide(deviation, std[key], out=np.zeros_like(value), where=std[key] > 0)
+    mod_counts, mod_mean, _ = _grouped_mean_std(mod_key, value, n_keys * n_mods)
+    mod_median = _grouped_percentiles(mod_key, value, n_keys * n_mods, (50,), by_value)[:, 0]
+
+    stats = []
+    for k in np.nonzero(counts)[0]:
+        row = {"property": properties[k // n_groups], "type": groups[k % n_groups], "count": int(counts[k]),
+               "mean": _number(mean[k]), "std": _number(std[k]), "min": _number(percentiles[k, 0])}
+        for i, percent in enumerate(BALANCE_PERCENTILES, 1):
+            row[f"p{percent}"] = _number(percentiles[k, i])
+        row["max"] = _number(percentiles[k, -1])
+        stats.append(row)
+    stats.sort(key=lambda row: (row["property"].lower(), groups.index(row["type"])))
+
+    by_mod = []
+    for k in np.nonzero(mod_counts)[0]:
+        base = k // n_mods
+        median = percentiles[base, 1 + BALANCE_PERCENTILES.index(50)]
+        by_mod.append({
+            "property": properties[base // n_groups], "type": groups[base % n_groups], "mod": mods[k % n_mods],
+            "count": int(mod_counts[k]), "mean": _number(mod_mean[k]), "p50": _number(mod_median[k]),
+            # how far the mod's average sits from the type's average, in standard deviations
+            "mean_z": _number((mod_mean[k] - mean[base]) / std[base]) if std[base] > 0 else 0.0,
+            "p50_ratio": _number(mod_median[k] / median) if median else None,
+        })
+    by_mod.sort(key=lambda row: (row["property"].lower(), groups.index(row["type"]), row["mod"]))
+
+    outliers = []
+    flagged = np.nonzero(np.abs(z) > z_threshold)[0]
+    for i in flagged[np.argsort(-np.abs(z[flagged]), kind="stable")]:
+        name, mod_name, path, line = columns["items"][item[i]]
+        outliers.append({"item": name, "mod": mod_name, "type": groups[columns["item_group"][item[i]]],
+                         "property": properties[prop[i]], "value": _number(value[i]), "z": _number(z[i]),
+                         "file": path, "line": line})
+
+    return {"items": len(columns["items"]), "values": int(len(value)), "z_threshold": z_threshold,
+            "stats": stats, "mods": by_mod, "outliers": outliers}
+
+
+BALANCE_CSV_FIELDS = ["section", "property", "type", "mod", "item", "count", "mean", "std", "min"] + \
+    [f"p{percent}" for percent in BALANCE_PERCENTILES] + ["max", "mean_z", "p50_ratio", "value", "z", "file", "line"]
+
+
+def write_balance_report(report: Dict[str, Any], path: str) -> None:
+    """Write a balance report as JSON, or as one CSV table with a section column when path ends in .csv."""
+    if not path.lower().endswith(".csv"):
+        atomic_write_json(path, report, indent=2)
+        return
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=BALANCE_CSV_FIELDS)
+            writer.writeheader()
+            for section, rows in (("stats", report["stats"]), ("mod", report["mods"]), ("outlier", report["outliers"])):
+                for row in rows:
+                    writer.writerow(dict(row, section=section))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# Bumped whenever export records change shape so the next incremental export starts over
+EXPORT_VERSION = 1
+# Records per Parquet row group; bounds how many records an export holds in memory
+EXPORT_BATCH_ROWS = 10_000
+
+
+def iter_export_files(registry: Dict[str, Any], mod_names: Optional[List[str]] = None) -> Iterator[Tuple[str, str, str, int, int]]:
+    """Yield (mod, mod path, script path, size, mtime_ns) for the script files of registered mods."""
+    for mod_name in mod_names if mod_names else sorted(registry):
+        mod_path = registry.get(mod_name, {}).get("mod_path")
+        if mod_path and os.path.isdir(mod_path):
+            for path, size, mtime in iter_mod_script_files(mod_path):
+                yield mod_name, mod_path, path, size, mtime
+
+
+def export_record(mod_name: str, rel_file: str, definition: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a parsed definition into an export record with its mod, file and line."""
+    record = {"mod": mod_name, "kind": definition["kind"], "module": definition["module"],
+              "name": definition["name"], "file": rel_file, "line": definition["line"],
+              "properties": definition["properties"]}
+    if "ingredients" in definition:
+        record["ingredients"] = definition["ingredients"]
+    return record
+
+
+class ExportState:
+    """SQLite record of what the last export saw.
+
+    Keeps each script file's size and mtime, so unchanged files are skipped without being
+    read, and a hash of each of its definitions, so a changed file yields only the
+    definitions that were added, changed or removed.
+    """
+
+    def __init__(self, path: str = EXPORT_STATE_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mod TEXT, "
+                              "size INTEGER, mtime INTEGER, run INTEGER)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS defs (path TEXT, key TEXT, hash TEXT, stub TEXT, "
+                              "PRIMARY KEY (path, key)) WITHOUT ROWID")
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'export_version'").fetchone()
+            if row is None or row[0] != str(EXPORT_VERSION):
+                self.conn.execute("DELETE FROM files")
+                self.conn.execute("DELETE FROM defs")
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('export_version', ?)",
+                                  (str(EXPORT_VERSION),))
+        self.stats = {"files": 0, "read": 0, "records": 0, "added": 0, "changed": 0, "removed": 0}
+
+    def records(self, files, load, incremental: bool = False,
+                mod_names: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield export records for (mod, mod path, path, size, mtime) files and record what was seen.
+
+        Without incremental every definition is yielded; with it only the ones added,
+        changed or removed since the last export, each with a 'change' field. load(path,
+        size, mtime) returns a file's definitions. Files of mods outside mod_names are left
+        alone. The new state is only kept once commit() is called after the last record,
+        and is rolled back if the records are not all consumed.
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'run'").fetchone()
+        run = int(row[0]) + 1 if row else 1
+        self.stats = dict.fromkeys(self.stats, 0)
+        finished = False
+        try:
+            for mod_name, mod_path, path, size, mtime in files:
+                self.stats["files"] += 1
+                row = self.conn.execute("SELECT size, mtime FROM files WHERE path = ?", (path,)).fetchone()
+                unchanged = row is not None and row[0] == size and row[1] == mtime
+                if unchanged:
+                    self.conn.execute("UPDATE files SET mod = ?, run = ? WHERE path = ?", (mod_name, run, path))
+                    if incremental:
+                        continue
+                self.stats["read"] += 1
+                rel_file = os.path.relpath(path, mod_path).replace(os.sep, "/")
+                try:
+                    definitions = load(path, size, mtime)
+                except OSError as e:
+                    logging.error(f"Could not parse script file {path}: {e}")
+                    # keep its old size, mtime and definitions so the next export reads it again
+                    if row is not None:
+                        self.conn.execute("UPDATE files SET run = ? WHERE path = ?", (run, path))
+                    continue
+                if unchanged:
+                    for definition in definitions:
+                        self.stats["records"] += 1
+                        yield export_record(mod_name, rel_file, definition)
+                    continue
+
+                old = {key: (digest, stub) for key, digest, stub in self.conn.execute(
+                    "SELECT key, hash, stub FROM defs WHERE path = ?", (path,))}
+                rows = []
+                seen: Dict[str, int] = {}
+                for definition in definitions:
+                    record = export_record(mod_name, rel_file, definition)
+                    name = f"{record['kind']} {record['module']}.{record['name']}"
+                    seen[name] = seen.get(name, 0) + 1
+                    key = f"{name}#{seen[name]}"
+                    digest = hashlib.blake2b(json.dumps(record, sort_keys=True).encode("utf-8"),
+                                             digest_size=16).hexdigest()
+                    stub = {field: record[field] for field in ("mod", "kind", "module", "name", "file", "line")}
+                    rows.append((path, key, digest, json.dumps(stub)))
+                    previous = old.pop(key, None)
+                    if not incremental:
+                        self.stats["records"] += 1
+                        yield record
+                    elif previous is None or previous[0] != digest:
+                        change = "added" if previous is None else "changed"
+                        self.stats[change] += 1
+                        self.stats["records"] += 1
+                        yield dict(record, change=change)
+                if incremental:
+                    for _, stub in old.values():
+                        self.stats["removed"] += 1
+                        self.stats["records"] += 1
+                        yield dict(json.loads(stub), change="removed")
+                self.conn.execute("DELETE FROM defs WHERE path = ?", (path,))
+                self.conn.executemany("INSERT INTO defs (path, key, hash, stub) VALUES (?, ?, ?, ?)", rows)
+                # only now that its definitions are recorded does the file count as seen at this size and mtime
+                self.conn.execute("INSERT OR REPLACE INTO files (path, mod, size, mtime, run) VALUES (?, ?, ?, ?, ?)",
+                                  (path, mod_name, size, mtime, run))
+
+            # files that are gone: everything they defined was removed
+            scope = ""
+            params: List[Any] = [run]
+            if mod_names:
+                scope = f" AND mod IN ({','.join('?' * len(mod_names))})"
+                params.extend(mod_names)
+            gone = [path for (path,) in self.conn.execute(f"SELECT path FROM files WHERE run < ?{scope}", params)]
+            for path in gone:
+                if incremental:
+                    for (stub,) in self.conn.execute("SELECT stub FROM defs WHERE path = ?", (path,)).fetchall():
+                        self.stats["removed"] += 1
+                        self.stats["records"] += 1
+                        yield dict(json.loads(stub), change="removed")
+                self.conn.execute("DELETE FROM defs WHERE path = ?", (path,))
+                self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('run', ?)", (str(run),))
+            finished = True
+        finally:
+            if not finished:
+                self.conn.rollback()
+
+    def commit(self) -> None:
+        """Keep the state recorded by the last records() run, once its output is safely written."""
+        self.conn.commit()
+
+    def rollback(self) -> None:
+        """Drop the state recorded by the last records() run."""
+        self.conn.rollback()
+
+    def clear(self) -> None:
+        """Forget every export, so the next incremental export lists every definition as added."""
+        with self.conn:
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("DELETE FROM defs")
+
+
+def write_jsonl_records(records, f) -> int:
+    """Write records to a text stream as JSON Lines and return how many were written."""
+    count = 0
+    for record in records:
+        f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        count += 1
+    return count
+
+
+def _export_schema(incremental: bool) -> Any:
+    fields = [("mod", pa.string()), ("kind", pa.string()), ("module", pa.string()), ("name", pa.string()),
+              ("file", pa.string()), ("line", pa.int32()), ("properties", pa.map_(pa.string(), pa.string())),
+              ("ingredients", pa.list_(pa.struct([("item", pa.string()), ("count", pa.string()),
+                                                  ("keep", pa.bool_())])))]
+    if incremental:
+        fields.append(("change", pa.string()))
+    return pa.schema(fields)
+
+
+def write_parquet_records(records, path: str, incremental: bool = False) -> int:
+    """Write records to a Parquet file, one row group per EXPORT_BATCH_ROWS records, and return the count.
+
+    Ingredient counts are stored as strings since a few recipes use non-numeric ones.
+    """
+    schema = _export_schema(incremental)
+    count = 0
+    batch: List[Dict[str, Any]] = []
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for record in records:
+            row = dict(record)
+            row["properties"] = list(record.get("properties", {}).items()) if "properties" in record else None
+            if "ingredients" in record:
+                row["ingredients"] = [dict(ingredient, count=str(ingredient["count"]))
+                                      for ingredient in record["ingredients"]]
+            batch.append(row)
+            count += 1
+            if len(batch) >= EXPORT_BATCH_ROWS:
+                writer.write_table(pa.Table.from_pylist(batch, schema))
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema))
+    return count
+
+
+# Columns with a fixed meaning in import files; any other column on an item row becomes a property
+IMPORT_ITEM_FIELDS = ("kind", "mod", "type", "name", "properties")
+IMPORT_RECIPE_FIELDS = ("kind", "mod", "type", "name", "result", "result_count", "time",
+                        "ingredients", "skill", "skill_level")
+
+
+def iter_import_rows(source_path: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], str]]:
+    """Stream (line number, row, error) tuples from a CSV or JSONL import file."""
+    extension = os.path.splitext(source_path)[1].lower()
+    with open(source_path, "r", newline="", encoding="utf-8") as f:
+        if extension in (".jsonl", ".ndjson"):
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, None, f"Invalid JSON: {e}"
+                    continue
+                if not isinstance(row, dict):
+                    yield line_no, None, "Row is not a JSON object"
+                    continue
+                yield line_no, row, ""
+        elif extension == ".csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                # drop blank cells so optional columns fall back to their defaults
+                yield reader.line_num, {k: v for k, v in row.items() if k and v not in (None, "")}, ""
+        else:
+            raise ValueError(f"Unsupported import file type '{extension}'. Use .csv or .jsonl")
+
+
+def _parse_ingredients(value: Any) -> List[str]:
+    """Normalize an ingredients cell ("Plank:2,Nails:4" or a JSON list) to name:count strings."""
+    if isinstance(value, str):
+        parts = [part.strip() for part in value.split(",") if part.strip()]
+    elif isinstance(value, list):
+        parts = [str(part).strip() for part in value]
+    else:
+        raise ValueError("ingredients must be a string or a list")
+
+    ingredients = []
+    for part in parts:
+        name, _, count = part.partition(":")
+        if not name or not count:
+            raise ValueError(f"Invalid ingredient '{part}', expected name:count")
+        try:
+            ingredients.append(f"{name.strip()}:{int(count)}")
+        except ValueError:
+            raise ValueError(f"Invalid count for ingredient '{name}'")
+    return ingredients
+
+
+SOUND_EXTENSIONS = (".ogg", ".wav")
+
+
+def _probe_riff(f) -> Dict[str, Any]:
+    """Read channels, rate and length from a RIFF/WAVE header by walking its chunks."""
+    f.seek(0)
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+    channels = rate = block_align = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        chunk_id, size = header[:4], struct.unpack("<I", header[4:])[0]
+        if chunk_id == b"fmt ":
+            fmt = f.read(size)
+            if len(fmt) < 16:
+                raise ValueError("truncated fmt chunk")
+            _, channels, rate, _, block_align = struct.unpack("<HHIIH", fmt[:14])
+            if size % 2:
+                f.seek(1, os.SEEK_CUR)
+        elif chunk_id == b"data":
+            if not channels or not rate or not block_align:
+                raise ValueError("data chunk before fmt chunk")
+            return {"format": "wav", "channels": channels, "sample_rate": rate,
+                    "duration": size / block_align / rate}
+        else:
+            f.seek(size + size % 2, os.SEEK_CUR)
+    raise ValueError("no data chunk")
+
+
+def _probe_ogg(f) -> Dict[str, Any]:
+    """Read channels, rate and length of an Ogg Vorbis (or Opus) file.
+
+    The first page carries the codec identification header; the length is the
+    granule position of the stream's last page divided by the sample rate.
+    """
+    page = f.read(27)
+    if len(page) < 27 or page[:4] != b"OggS":
+        raise ValueError("not an Ogg file")
+    serial = page[14:18]
+    segments = f.read(page[26])
+    packet = f.read(min(sum(segments), 64))
+    if packet[:7] == b"\x01vorbis" and len(packet) >= 16:
+        channels = packet[11]
+        rate = struct.unpack("<I", packet[12:16])[0]
+        codec, granule_rate, pre_skip = "vorbis", rate, 0
+    elif packet[:8] == b"OpusHead" and len(packet) >= 16:
+        channels = packet[9]
+        pre_skip = struct.unpack("<H", packet[10:12])[0]
+        rate = struct.unpack("<I", packet[12:16])[0] or 48000
+        # Opus granule positions always count 48 kHz samples
+        codec, granule_rate = "opus", 48000
+    else:
+        raise ValueError("unsupported Ogg codec (expected Vorbis or Opus)")
+    if not channels or not granule_rate:
+        raise ValueError("invalid codec header")
+
+    size = f.seek(0, os.SEEK_END)
+    f.seek(max(0, size - 65536))
+    tail = f.read()
+    granule = None
+    position = tail.rfind(b"OggS")
+    while position >= 0:
+        if len(tail) - position >= 27 and tail[position + 14:position + 18] == serial:
+            granule = struct.unpack("<q", tail[position + 6:position + 14])[0]
+            if granule >= 0:
+                break
+        position = tail.rfind(b"OggS", 0, position)
+    if granule is None or granule < 0:
+        raise ValueError("no final Ogg page found")
+    return {"format": codec, "channels": channels, "sample_rate": rate,
+            "duration": max(0, granule - pre_skip) / granule_rate}
+
+
+def probe_audio(path: str) -> Dict[str, Any]:
+    """Return format, channels, sample_rate and duration (seconds) of an .ogg or .wav file.
+
+    Raises ValueError for files that are not valid audio.
+    """
+    with open(path, "rb") as f:
+        if path.lower().endswith(".wav"):
+            try:
+                with wave.open(f) as w:
+                    return {"format": "wav", "channels": w.getnchannels(), "sample_rate": w.getframerate(),
+                            "duration": w.getnframes() / w.getframerate()}
+            except (wave.Error, EOFError, ZeroDivisionError):
+                # wave only reads PCM; float and extensible WAVs still have a plain fmt chunk
+                return _probe_riff(f)
+        return _probe_ogg(f)
+
+
+def _sound_name(file_name: str) -> str:
+    """Script identifier for an audio file: its name without extension, other characters as '_'."""
+    return re.sub(r"\W", "_", os.path.splitext(file_name)[0], flags=re.ASCII)
+
+
+def check_sound_type(type_name: str) -> str:
+    """Return a sound type for a sounds_<Type>.txt file name, raising ValueError unless it is one plain name."""
+    if not type_name or ".." in type_name or any(char in type_name for char in "/\\:\0"):
+        raise ValueError(f"invalid sound type '{type_name}'")
+    return type_name
+
+
+def load_sound_sidecar(path: str) -> Dict[str, Dict[str, Any]]:
+    """Load per-file sound overrides from a CSV or JSONL file keyed by its 'file' column.
+
+    Rows match an audio file by relative path, file name or sound name; any other
+    columns (volume, loop, distanceMax, type, ...) override the generated block.
+    """
+    overrides: Dict[str, Dict[str, Any]] = {}
+    for line_no, row, error in iter_import_rows(path):
+        if error:
+            raise ValueError(f"{path} line {line_no}: {error}")
+        key = str(row.pop("file", "")).strip()
+        if not key:
+            raise ValueError(f"{path} line {line_no}: missing 'file' column")
+        overrides[key.replace("\\", "/")] = {k: str(v) for k, v in row.items()}
+    return overrides
+
+
+def _mod_types_from(value: Any, where: str) -> List[str]:
+    """Normalize a manifest 'types' value to a list of MOD_TYPES names."""
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        raise ValueError(f"{where}: 'types' must be a list of mod types")
+    mod_types = [str(mod_type).capitalize() for mod_type in value]
+    invalid = [mod_type for mod_type in mod_types if mod_type not in MOD_TYPES]
+    if invalid:
+        raise ValueError(f"{where}: unknown mod type(s) {', '.join(invalid)}")
+    return mod_types
+
+
+def load_scaffold_manifest(path: str) -> List[Dict[str, Any]]:
+    """Read a JSON or TOML scaffold manifest into [{name, path, types}, ...].
+
+    The top level may set default 'path' and 'types' for its 'mods' list. Each mod is a
+    name or a table with 'name' and optional 'path', 'types' and 'count'; with a count
+    the name is a pattern such as "Weapons{n}" expanded for n = 1..count. Relative paths
+    are resolved from the manifest's folder.
+    """
+    if path.lower().endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("TOML manifests need Python 3.11 or newer; use a .json manifest")
+        with open(path, "rb") as f:
+            manifest = tomllib.load(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {"mods": manifest}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("mods"), list):
+        raise ValueError(f"{path}: expected a 'mods' list")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    default_path = str(manifest.get("path", "."))
+    default_types = _mod_types_from(manifest.get("types", []), path)
+    mods: List[Dict[str, Any]] = []
+    seen = set()
+    for i, entry in enumerate(manifest["mods"], 1):
+        where = f"{path} mod {i}"
+        if isinstance(entry, str):
+            entry = {"name": entry}
+        if not isinstance(entry, dict) or not str(entry.get("name", "")).strip():
+            raise ValueError(f"{where}: missing 'name'")
+        pattern = str(entry["name"]).strip()
+        mod_path = os.path.join(base_dir, str(entry.get("path", default_path)))
+        mod_types = _mod_types_from(entry["types"], where) if "types" in entry else default_types
+        count = entry.get("count")
+        if count is None:
+            names = [pattern]
+        elif isinstance(count, int) and count > 0 and "{n}" in pattern:
+            names = [pattern.replace("{n}", str(n)) for n in range(1, count + 1)]
+        else:
+            raise ValueError(f"{where}: 'count' needs a positive integer and a name containing {{n}}")
+        for name in names:
+            if name in (".", "..") or os.path.basename(name) != name or "/" in name:
+                raise ValueError(f"{where}: invalid mod name '{name}'")
+            if name in seen:
+                raise ValueError(f"{where}: mod '{name}' is listed more than once")
+            seen.add(name)
+            mods.append({"name": name, "path": mod_path, "types": mod_types})
+    return mods
+
+
+# Bump when check_lua_source changes so cached results are thrown away
+LUA_CHECKER_VERSION = 1
+# Below this many files the check runs in-process; starting workers would cost more than it saves
+LUA_POOL_MIN_FILES = 16
+
+# Only the tokens that matter for balance: comments and strings (skipped whole), block keywords and brackets
+_LUA_TOKEN = re.compile(
+    r"--\[(=*)\[|--[^\n]*|\[(=*)\["
+    r"""|"(?:[^"\\\n]|\\z\s*|\\[\s\S])*"|'(?:[^'\\\n]|\\z\s*|\\[\s\S])*'|["']"""
+    r"|\b(function|if|while|for|repeat|do|end|until|elseif|else)\b|[(){}\[\]]"
+)
+_LUA_CLOSED_BY_END = {"function", "if", "do", "while do", "for do"}
+_LUA_BRACKETS = {")": "(", "}": "{", "]": "["}
+_LUA_BRACKETS_CLOSE = {opener: closer for closer, opener in _LUA_BRACKETS.items()}
+
+
+def check_lua_source(text: str) -> List[Tuple[int, str]]:
+    """Check Lua source for unfinished strings and comments and unbalanced blocks and brackets.
+
+    Returns (line, message) errors. Checking stops at the first error, as anything after
+    an unbalanced block would only repeat it.
+    """
+    def line_of(pos: int) -> int:
+        return text.count("\n", 0, pos) + 1
+
+    # (opener, position); 'while' and 'for' become 'while do' and 'for do' once their 'do' is seen
+    stack: List[Tuple[str, int]] = []
+    pos = 0
+    if text.startswith("#"):
+        # shebang line
+        pos = text.find("\n") + 1 or len(text)
+    search = _LUA_TOKEN.search
+    while True:
+        match = search(text, pos)
+        if match is None:
+            break
+        token = match.group(0)
+        start, pos = match.start(), match.end()
+        first = token[0]
+        if first == "-" or (first == "[" and match.group(2) is not None):
+            level = match.group(1) if first == "-" else match.group(2)
+            if level is None:
+                continue
+            end = text.find(f"]{level}]", pos)
+            if end == -1:
+                kind = "long comment" if first == "-" else "long string"
+                return [(line_of(start), f"unfinished {kind} (missing ']{level}]')")]
+            pos = end + len(level) + 2
+        elif first in "\"'":
+            if len(token) == 1:
+                return [(line_of(start), f"unfinished string (missing {first})")]
+        elif match.group(3):
+            if token in ("function", "if", "repeat", "while", "for"):
+                stack.append((token, start))
+            elif token == "do":
+                if stack and stack[-1][0] in ("while", "for"):
+                    stack[-1] = (f"{stack[-1][0]} do", stack[-1][1])
+                else:
+                    stack.append(("do", start))
+            elif token == "end":
+                if not stack:
+                    return [(line_of(start), "'end' without an open block")]
+                opener, opened = stack.pop()
+                if opener not in _LUA_CLOSED_BY_END:
+                    expected = {"repeat": "until", "while": "do", "for": "do"}.get(opener, _LUA_BRACKETS_CLOSE.get(opener))
+                    return [(line_of(start), f"'end' found, but '{opener}' on line {line_of(opened)} "
+                                             f"needs '{expected}' first")]
+            elif token == "until":
+                if not stack or stack[-1][0] != "repeat":
+                    return [(line_of(start), "'until' without 'repeat'")]
+                stack.pop()
+            elif not stack or stack[-1][0] != "if":
+                return [(line_of(start), f"'{token}' outside an 'if' block")]
+        elif first in "({[":
+            stack.append((first, start))
+        else:
+            if not stack or stack[-1][0] != _LUA_BRACKETS[first]:
+                if not stack:
+                    return [(line_of(start), f"'{first}' without an opening '{_LUA_BRACKETS[first]}'")]
+                opener, opened = stack[-1]
+                return [(line_of(start), f"'{first}' found, but '{opener.split()[0]}' on line {line_of(opened)} "
+                                         "is still open")]
+            stack.pop()
+
+    if stack:
+        opener, opened = stack[-1]
+        closer = _LUA_BRACKETS_CLOSE.get(opener) or ("until" if opener == "repeat" else "end")
+        return [(line_of(opened), f"'{opener.split()[0]}' is never closed (missing '{closer}')")]
+    return []
+
+
+
+def _check_lua_file(path: str) -> Tuple[str, str, Optional[List[Tuple[int, str]]]]:
+    """Check one .lua file; returns (path, content hash, errors), with errors None if it cannot be read.
+
+    Runs in worker processes.
+    """
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError as e:
+        logging.error(f"Could not read {path}: {e}")
+        return path, "", None
+    # latin-1 maps every byte to one character, so nothing fails to decode and offsets stay byte offsets
+    return path, hashlib.blake2b(raw, digest_size=20).hexdigest(), check_lua_source(raw.decode("latin-1"))
+
+
+class LuaCheckCache:
+    """SQLite cache of Lua check results keyed by file content hash."""
+
+    def __init__(self, path: str = LUA_CHECK_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS results (hash TEXT PRIMARY KEY, errors TEXT)")
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'checker_version'").fetchone()
+            if row is None or row[0] != str(LUA_CHECKER_VERSION):
+                self.conn.execute("DELETE FROM results")
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('checker_version', ?)",
+                                  (str(LUA_CHECKER_VERSION),))
+
+    def get_many(self, digests: List[str]) -> Dict[str, List[Tuple[int, str]]]:
+        """Return the cached errors of every known content hash."""
+        found = {}
+        digests = list(digests)
+        with self._lock:
+            for i in range(0, len(digests), 500):
+                chunk = digests[i:i + 500]
+                for digest, errors in self.conn.execute(
+                        f"SELECT hash, errors FROM results WHERE hash IN ({','.join('?' * len(chunk))})", chunk):
+                    found[digest] = [tuple(error) for error in json.loads(errors)]
+        return found
+
+    def put_many(self, results: Dict[str, List[Tuple[int, str]]]) -> None:
+        """Store the errors of checked content hashes."""
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO results (hash, errors) VALUES (?, ?)",
+                                  [(digest, json.dumps(errors)) for digest, errors in results.items()])
+
+
+def iter_mod_lua_files(mod_path: str) -> Iterator[str]:
+    """Yield every .lua file under a mod's media/lua folder."""
+    lua_dir = os.path.join(mod_path, "media", "lua")
+    files, _ = scan_tree(lua_dir)
+    for rel in sorted(files):
+        if rel.lower().endswith(".lua"):
+            yield os.path.join(lua_dir, *rel.split("/"))
+
+
+def check_lua_files(paths: List[str], cache: Optional[LuaCheckCache] = None,
+                    workers: Optional[int] = None) -> Dict[str, Any]:
+    """Check .lua files, reusing cached results for unchanged content and a process pool for the rest.
+
+    Returns {"errors": {path: [(line, message)]}, "files", "cached", "checked", "unreadable"}.
+    """
+    summary: Dict[str, Any] = {"errors": {}, "files": len(paths), "cached": 0, "checked": 0, "unreadable": []}
+    digests: Dict[str, str] = {}
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                digests[path] = hashlib.blake2b(f.read(), digest_size=20).hexdigest()
+        except OSError as e:
+            logging.error(f"Could not read {path}: {e}")
+            summary["unreadable"].append(path)
+    cached = cache.get_many(set(digests.values())) if cache is not None else {}
+    todo = [path for path, digest in digests.items() if digest not in cached]
+    for path, digest in digests.items():
+        if digest in cached and cached[digest]:
+            summary["errors"][path] = cached[digest]
+    summary["cached"] = len(digests) - len(todo)
+
+    fresh: Dict[str, List[Tuple[int, str]]] = {}
+    workers = workers or os.cpu_count() or 1
+    if len(todo) >= LUA_POOL_MIN_FILES and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_check_lua_file, todo, chunksize=max(1, len(todo) // (workers * 4))))
+    else:
+        results = [_check_lua_file(path) for path in todo]
+    for path, digest, errors in results:
+        if errors is None:
+            summary["unreadable"].append(path)
+            continue
+        fresh[digest] = errors
+        if errors:
+            summary["errors"][path] = errors
+    summary["checked"] = len(fresh)
+    if cache is not None and fresh:
+        cache.put_many(fresh)
+    return summary
+
+
+def print_lua_errors(errors: Dict[str, List[Tuple[int, str]]]) -> None:
+    """Print Lua check errors as path:line: message."""
+    for path in sorted(errors):
+        for line, message in errors[path]:
+            print(f"{path}:{line}: {message}")
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = None) -> None:
+    """Write JSON to a temp file in the same folder, fsync it and rename it over path."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            # one write of the encoded document is much faster than json.dump's many small writes
+            f.write(json.dumps(data, indent=indent))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def file_lock(lock_path: str):
+    """Hold an exclusive advisory lock on lock_path, shared by all manager processes."""
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def scan_tree(root: str) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+    """Walk a directory with os.scandir.
+
+    Returns ({relative file path: (size, mtime_ns)}, [relative directory paths]) using '/' separators.
+    """
+    files: Dict[str, Tuple[int, int]] = {}
+    dirs: List[str] = []
+    stack = [("", root)]
+    while stack:
+        rel_dir, abs_dir = stack.pop()
+        try:
+            entries = os.scandir(abs_dir)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with entries:
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(rel)
+                    stack.append((rel, entry.path))
+                elif entry.is_file():
+                    st = entry.stat()
+                    files[rel] = (st.st_size, st.st_mtime_ns)
+    return files, dirs
+
+
+def hash_file(path: str) -> str:
+    """Return the BLAKE2b content hash of a file."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _kernel_copy(in_fd: int, out_fd: int, size: int) -> int:
+    """Copy with os.copy_file_range or os.sendfile and return the number of bytes copied."""
+    for name in ("copy_file_range", "sendfile"):
+        if not hasattr(os, name):
+            continue
+        copied = 0
+        try:
+            while copied < size:
+                if name == "copy_file_range":
+                    sent = os.copy_file_range(in_fd, out_fd, size - copied, copied, copied)
+                else:
+                    sent = os.sendfile(out_fd, in_fd, copied, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+            return copied
+        except OSError:
+            # unsupported for this filesystem pair; partial output is kept and finished by the caller
+            if copied:
+                return copied
+    return 0
+
+
+def fast_copy(src: str, dst: str) -> None:
+    """Copy a file via a temp file and rename, preserving mode and mtime."""
+    tmp = f"{dst}.modmanager-tmp"
+    with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        copied = _kernel_copy(fsrc.fileno(), fdst.fileno(), size) if size >= LARGE_FILE_THRESHOLD else 0
+        if copied < size:
+            fsrc.seek(copied)
+            fdst.seek(copied)
+            shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+    shutil.copystat(src, tmp)
+    os.replace(tmp, dst)
+
+
+def load_install_manifest(target_dir: str) -> Dict[str, Any]:
+    """Load the install manifest of an installed mod, or an empty one."""
+    try:
+        with open(os.path.join(target_dir, INSTALL_MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if isinstance(manifest, dict):
+            return manifest
+    except FileNotFoundError:
+        pass
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Ignoring unreadable install manifest in {target_dir}: {e}")
+    return {"files": {}, "dirs": []}
+
+
+def save_install_manifest(target_dir: str, manifest: Dict[str, Any]) -> None:
+    """Atomically write the install manifest of an installed mod."""
+    atomic_write_json(os.path.join(target_dir, INSTALL_MANIFEST), manifest)
+
+
+def manifest_hashes(target_dir: str, installed_copy: bool = False) -> Dict[str, Tuple[int, int, str]]:
+    """Return {relative path: (size, mtime_ns, hash)} recorded in an install manifest.
+
+    The mtimes are those of the source files, or of the installed copies with installed_copy.
+    """
+    known = {}
+    for rel, entry in load_install_manifest(target_dir).get("files", {}).items():
+        if entry.get("hash"):
+            mtime = entry.get("target_mtime", entry.get("mtime")) if installed_copy else entry.get("mtime")
+            known[rel] = (entry["size"], mtime, entry["hash"])
+    return known
+
+
+def plan_install(source_dir: str, target_dir: str) -> Dict[str, Any]:
+    """Compare a mod folder with its installed copy and manifest.
+
+    Files whose size and mtime match the manifest (and whose installed copy is untouched)
+    are skipped without being read; otherwise the content hash decides whether to copy.
+    """
+    manifest = load_install_manifest(target_dir)
+    old_files = manifest.get("files", {})
+    source_files, source_dirs = scan_tree(source_dir)
+    target_files, _ = scan_tree(target_dir)
+
+    plan: Dict[str, Any] = {
+        "source": source_dir,
+        "target": target_dir,
+        "added": [],
+        "changed": [],
+        "touched": [],
+        "removed": [],
+        "unchanged": 0,
+        "dirs": source_dirs,
+        "old_dirs": manifest.get("dirs", []),
+        "files": {},
+        "bytes": 0,
+    }
+    for rel, (size, mtime) in source_files.items():
+        old = old_files.get(rel)
+        installed = target_files.get(rel)
+        # files linked from the asset store keep the blob's mtime, recorded as target_mtime
+        target_ok = old is not None and installed == (old["size"], old.get("target_mtime", old["mtime"]))
+        if target_ok and old["size"] == size and old["mtime"] == mtime:
+            plan["files"][rel] = old
+            plan["unchanged"] += 1
+            continue
+
+        digest = hash_file(os.path.join(source_dir, rel))
+        plan["files"][rel] = {"size": size, "mtime": mtime, "hash": digest}
+        if target_ok and old["size"] == size and old["hash"] == digest:
+            # same content with a new mtime: only the timestamps need updating
+            plan["touched"].append(rel)
+            if "target_mtime" in old:
+                plan["files"][rel]["target_mtime"] = old["target_mtime"]
+        elif installed is None:
+            plan["added"].append(rel)
+            plan["bytes"] += size
+        else:
+            plan["changed"].append(rel)
+            plan["bytes"] += size
+
+    plan["removed"] = [rel for rel in old_files if rel not in source_files and rel in target_files]
+    return plan
+
+
+def apply_install_plan(plan: Dict[str, Any], asset_store: Optional["AssetStore"] = None) -> None:
+    """Apply a plan from plan_install and write the new manifest.
+
+    With an asset store, asset files are linked from the store instead of copied,
+    including unchanged ones that an earlier install copied; plan["linked"] and
+    plan["linked_bytes"] count them and plan["copied"] counts the files copied.
+    """
+    source_dir, target_dir = plan["source"], plan["target"]
+    os.makedirs(target_dir, exist_ok=True)
+    for rel in plan.get("new_dirs", plan["dirs"]):
+        os.makedirs(os.path.join(target_dir, rel), exist_ok=True)
+
+    to_copy = plan["added"] + plan["changed"]
+    if asset_store is not None:
+        pending = set(to_copy)
+        to_link = [rel for rel, entry in plan["files"].items()
+                   if asset_store.accepts(rel) and (rel in pending or "target_mtime" not in entry)]
+        plan["linked"] = plan["linked_bytes"] = plan["copied"] = 0
+        linkable = True
+        for rel in to_link:
+            if not linkable and rel not in pending:
+                continue
+            entry = plan["files"][rel]
+            dst = os.path.join(target_dir, rel)
+            method = asset_store.link(os.path.join(source_dir, rel), dst, entry["hash"])
+            if method == "copy":
+                # the store cannot link here, so leave already installed copies alone
+                linkable = False
+                entry.pop("target_mtime", None)
+                plan["copied"] += 1
+                continue
+            entry["target_mtime"] = os.stat(dst).st_mtime_ns
+            plan["linked"] += 1
+            plan["linked_bytes"] += entry["size"]
+        to_copy = [rel for rel in to_copy if not asset_store.accepts(rel)]
+
+    for rel in to_copy:
+        fast_copy(os.path.join(source_dir, rel), os.path.join(target_dir, rel))
+    plan["copied"] = plan.get("copied", 0) + len(to_copy)
+    for rel in plan["touched"]:
+        if "target_mtime" in plan["files"][rel]:
+            # a link shares the blob's timestamps; the manifest already records them
+            continue
+        mtime = plan["files"][rel]["mtime"]
+        os.utime(os.path.join(target_dir, rel), ns=(mtime, mtime))
+
+    finish_install_plan(plan)
+
+
+def finish_install_plan(plan: Dict[str, Any]) -> None:
+    """Delete files and folders the plan dropped and write the new manifest."""
+    source_dir, target_dir = plan["source"], plan["target"]
+    for rel in plan["removed"]:
+        try:
+            os.remove(os.path.join(target_dir, rel))
+        except FileNotFoundError:
+            pass
+    # drop folders that were removed from the source, deepest first, if nothing else lives there
+    current_dirs = set(plan["dirs"])
+    for rel in sorted(plan["old_dirs"], key=len, reverse=True):
+        if rel not in current_dirs:
+            try:
+                os.rmdir(os.path.join(target_dir, rel))
+            except OSError:
+                pass
+
+    save_install_manifest(target_dir, {"source": source_dir, "files": plan["files"], "dirs": plan["dirs"]})
+
+
+def plan_sync(source_dir: str, target_dir: str, manifest_files: Dict[str, Any],
+              previous: Dict[str, Tuple[int, int]], current: Dict[str, Tuple[int, int]],
+              previous_dirs: List[str], current_dirs: List[str]) -> Dict[str, Any]:
+    """Build an install plan from two snapshots of the source folder instead of rescanning the target.
+
+    manifest_files is the install manifest's file table; it is updated in place for the
+    files the plan copies or deletes.
+    """
+    plan: Dict[str, Any] = {
+        "source": source_dir,
+        "target": target_dir,
+        "added": [],
+        "changed": [],
+        "touched": [],
+        "removed": [rel for rel in previous if rel not in current],
+        "unchanged": 0,
+        "dirs": current_dirs,
+        "old_dirs": previous_dirs,
+        "files": manifest_files,
+        "bytes": 0,
+    }
+    for rel, stat in current.items():
+        if previous.get(rel) == stat:
+            continue
+        size, mtime = stat
+        (plan["changed"] if rel in previous else plan["added"]).append(rel)
+        plan["bytes"] += size
+        manifest_files[rel] = {"size": size, "mtime": mtime, "hash": hash_file(os.path.join(source_dir, rel))}
+    for rel in plan["removed"]:
+        manifest_files.pop(rel, None)
+    plan["unchanged"] = len(current) - len(plan["added"]) - len(plan["changed"])
+    known_dirs = set(previous_dirs)
+    plan["new_dirs"] = [rel for rel in current_dirs if rel not in known_dirs]
+    return plan
+
+
+def print_install_plan(plan: Dict[str, Any]) -> None:
+    """Print the file-level diff of an install plan."""
+    for rel in sorted(plan["added"]):
+        print(f"+ {rel}")
+    for rel in sorted(plan["changed"]):
+        print(f"~ {rel}")
+    for rel in sorted(plan["removed"]):
+        print(f"- {rel}")
+    print(f"{len(plan['added'])} added, {len(plan['changed'])} changed, {len(plan['removed'])} removed, "
+          f"{plan['unchanged'] + len(plan['touched'])} unchanged ({plan['bytes']} bytes to copy)")
+
+
+# 1980-01-01 00:00, the earliest DOS timestamp; every archive entry uses it so packs are reproducible
+_ZIP_DOS_TIME, _ZIP_DOS_DATE = 0, (1 << 5) | 1
+_ZIP64_LIMIT = (1 << 31) - 1
+_ZIP_UTF8_FLAG = 0x800
+
+
+class ZipStreamWriter:
+    """Write a zip archive entry by entry with fixed timestamps and modes.
+
+    Unlike zipfile it accepts data the caller has already deflated, which lets pack
+    compress large files in parallel chunks. The output must be seekable: each local
+    header is rewritten with the CRC and sizes once its data is written.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.entries: List[Tuple[bytes, int, int, int, int, int, int]] = []
+
+    def _local_header(self, name: bytes, method: int, crc: int, compressed: int, size: int, zip64: bool) -> bytes:
+        extra = struct.pack("<HHQQ", 1, 16, size, compressed) if zip64 else b""
+        return struct.pack("<IHHHHHIIIHH", 0x04034b50, 45 if zip64 else 20, _ZIP_UTF8_FLAG, method,
+                           _ZIP_DOS_TIME, _ZIP_DOS_DATE, crc,
+                           0xFFFFFFFF if zip64 else compressed, 0xFFFFFFFF if zip64 else size,
+                           len(name), len(extra)) + name + extra
+
+    def add_dir(self, name: str) -> None:
+        """Add an empty directory entry."""
+        self.write_entry(name.rstrip("/") + "/", zipfile.ZIP_STORED, 0, 0o40755, lambda f: (0, 0, 0))
+
+    def write_entry(self, name: str, method: int, size: int, mode: int, write_data) -> None:
+        """Add an entry whose data is written by write_data(f) -> (crc, compressed size, size)."""
+        encoded = name.encode("utf-8")
+        zip64 = size > _ZIP64_LIMIT
+        offset = self.f.tell()
+        self.f.write(self._local_header(encoded, method, 0, 0, size, zip64))
+        crc, compressed, size = write_data(self.f)
+        end = self.f.tell()
+        self.f.seek(offset)
+        self.f.write(self._local_header(encoded, method, crc, compressed, size, zip64))
+        self.f.seek(end)
+        self.entries.append((encoded, method, crc, compressed, size, offset, mode))
+
+    def close(self) -> None:
+        """Write the central directory."""
+        cd_start = self.f.tell()
+        for name, method, crc, compressed, size, offset, mode in self.entries:
+            fields = []
+            if size > _ZIP64_LIMIT or compressed > _ZIP64_LIMIT:
+                fields += [size, compressed]
+                size = compressed = 0xFFFFFFFF
+            if offset > _ZIP64_LIMIT:
+                fields.append(offset)
+                offset = 0xFFFFFFFF
+            extra = struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields) if fields else b""
+            needed = 45 if fields else 20
+            attributes = (mode << 16) | (0x10 if name.endswith(b"/") else 0)
+            self.f.write(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014b50, (3 << 8) | needed, needed,
+                                     _ZIP_UTF8_FLAG, method, _ZIP_DOS_TIME, _ZIP_DOS_DATE, crc, compressed, size,
+                                     len(name), len(extra), 0, 0, 0, attributes, offset) + name + extra)
+        cd_end = self.f.tell()
+        count, cd_size = len(self.entries), cd_end - cd_start
+        if count >= 0xFFFF or cd_start > _ZIP64_LIMIT or cd_size > _ZIP64_LIMIT:
+            self.f.write(struct.pack("<IQHHIIQQQQ", 0x06064b50, 44, 45, 45, 0, 0, count, count, cd_size, cd_start))
+            self.f.write(struct.pack("<IIQI", 0x07064b50, 0, cd_end, 1))
+        self.f.write(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+                                 min(cd_size, 0xFFFFFFFF), min(cd_start, 0xFFFFFFFF), 0))
+
+
+def _deflate_chunk(data: bytes, level: int, last: bool) -> bytes:
+    """Raw-deflate one chunk; non-final chunks end on a sync flush so the pieces concatenate."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _pack_file(path: str, size: int, stored: bool, level: int, pool: ThreadPoolExecutor,
+               window: int, digest) -> Any:
+    """Return a write_data callback streaming one file into an archive."""
+    def write_data(out) -> Tuple[int, int, int]:
+        crc = compressed = total = 0
+        with open(path, "rb") as f:
+            if stored:
+                for chunk in iter(lambda: f.read(PACK_CHUNK_SIZE), b""):
+                    crc = zlib.crc32(chunk, crc)
+                    digest.update(chunk)
+                    out.write(chunk)
+                    total += len(chunk)
+                return crc, total, total
+
+            # independent chunks compressed on the pool, written in order; at most `window` are in flight
+            chunks = max(1, -(-size // PACK_CHUNK_SIZE))
+            pending: deque = deque()
+            for index in range(chunks):
+                chunk = f.read(PACK_CHUNK_SIZE)
+                crc = zlib.crc32(chunk, crc)
+                digest.update(chunk)
+                total += len(chunk)
+                last = index == chunks - 1
+                if chunks == 1:
+                    pending.append(_deflate_chunk(chunk, level, last))
+                else:
+                    pending.append(pool.submit(_deflate_chunk, chunk, level, last))
+                while len(pending) > window or (last and pending):
+                    data = pending.popleft()
+                    data = data if isinstance(data, bytes) else data.result()
+                    out.write(data)
+                    compressed += len(data)
+        return crc, compressed, total
+    return write_data
+
+
+def pack_tree(source_dir: str, archive_path: str, prefix: str, workers: int = 4, level: int = 6) -> Dict[str, Any]:
+    """Stream a folder into a reproducible zip archive under prefix/.
+
+    Entries are sorted and carry fixed timestamps and modes, so the same content always
+    gives the same bytes. Already-compressed media is stored; files larger than one chunk
+    are deflated in parallel chunks. A size/hash table for install change detection is
+    written as PACK_MANIFEST at the archive root.
+    """
+    files, dirs = scan_tree(source_dir)
+    files = {rel: stat for rel, stat in files.items() if rel not in (INSTALL_MANIFEST, PACK_MANIFEST)}
+    entries = sorted([(rel, True) for rel in dirs] + [(rel, False) for rel in files])
+    table: Dict[str, Dict[str, Any]] = {}
+    summary = {"archive": archive_path, "files": len(files), "dirs": len(dirs), "bytes": 0, "compressed": 0}
+
+    os.makedirs(os.path.dirname(os.path.abspath(archive_path)), exist_ok=True)
+    tmp = f"{archive_path}.modmanager-tmp"
+    try:
+        with open(tmp, "wb") as f, ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            writer = ZipStreamWriter(f)
+            for rel, is_dir in entries:
+                name = f"{prefix}/{rel}"
+                if is_dir:
+                    writer.add_dir(name)
+                    continue
+                path = os.path.join(source_dir, rel)
+                size = files[rel][0]
+                stored = rel.lower().endswith(PACK_STORED_EXTENSIONS)
+                mode = 0o100755 if os.access(path, os.X_OK) else 0o100644
+                digest = hashlib.blake2b(digest_size=20)
+                start = f.tell()
+                writer.write_entry(name, zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED, size, mode,
+                                   _pack_file(path, size, stored, level, pool, workers * 2, digest))
+                entry = writer.entries[-1]
+                table[rel] = {"size": entry[4], "hash": digest.hexdigest()}
+                summary["bytes"] += entry[4]
+                summary["compressed"] += f.tell() - start
+
+            manifest = json.dumps({"mod": prefix, "files": table, "dirs": sorted(dirs)},
+                                  sort_keys=True).encode("utf-8")
+            writer.write_entry(PACK_MANIFEST, zipfile.ZIP_DEFLATED, len(manifest), 0o100644,
+                               lambda out: (zlib.crc32(manifest), out.write(_deflate_chunk(manifest, level, True)),
+                                            len(manifest)))
+            writer.close()
+        os.replace(tmp, archive_path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return summary
+
+
+_DRIVE_PREFIX = re.compile(r"^[A-Za-z]:")
+
+
+def check_archive_mod_name(name: Any) -> str:
+    """Return an archive's mod folder name, raising ValueError unless it is one plain path component."""
+    if (not isinstance(name, str) or name in ("", ".", "..") or "/" in name or "\\" in name
+            or "\0" in name or _DRIVE_PREFIX.match(name)):
+        raise ValueError(f"unsafe mod folder name in archive: {name!r}")
+    return name
+
+
+def check_archive_path(rel: Any) -> str:
+    """Return a relative path from a pack table, raising ValueError if it could leave the mod folder."""
+    if (not isinstance(rel, str) or not rel or rel.startswith("/") or "\\" in rel or "\0" in rel
+            or _DRIVE_PREFIX.match(rel) or ".." in rel.split("/")):
+        raise ValueError(f"unsafe path in archive: {rel!r}")
+    return rel
+
+
+def read_pack_manifest(archive: zipfile.ZipFile) -> Dict[str, Any]:
+    """Return the pack table of an archive, rebuilt from the zip listing for archives made elsewhere.
+
+    Rebuilt tables have no hashes, so every file counts as changed on install.
+    """
+    try:
+        with archive.open(PACK_MANIFEST) as f:
+            pack = json.load(f)
+        check_archive_mod_name(pack["mod"])
+        return pack
+    except KeyError:
+        pass
+    names = [info.filename for info in archive.infolist()]
+    roots = {name.split("/", 1)[0] for name in names}
+    if len(roots) != 1 or not all("/" in name for name in names):
+        raise ValueError("archive must contain a single top-level mod folder")
+    prefix = check_archive_mod_name(roots.pop())
+    files, dirs = {}, []
+    for info in archive.infolist():
+        rel = info.filename[len(prefix) + 1:].rstrip("/")
+        if not rel:
+            continue
+        if info.is_dir():
+            dirs.append(rel)
+        else:
+            files[rel] = {"size": info.file_size, "hash": None}
+    return {"mod": prefix, "files": files, "dirs": dirs}
+
+
+def plan_archive_install(archive_path: str, pack: Dict[str, Any], target_dir: str) -> Dict[str, Any]:
+    """Compare a pack table with an installed mod folder, like plan_install does for a source folder."""
+    for rel in list(pack["files"]) + list(pack["dirs"]):
+        check_archive_path(rel)
+
+    manifest = load_install_manifest(target_dir)
+    old_files = manifest.get("files", {})
+    target_files, _ = scan_tree(target_dir)
+    plan: Dict[str, Any] = {
+        "source": archive_path,
+        "target": target_dir,
+        "prefix": pack["mod"],
+        "added": [],
+        "changed": [],
+        "touched": [],
+        "removed": [],
+        "unchanged": 0,
+        "dirs": pack["dirs"],
+        "old_dirs": manifest.get("dirs", []),
+        "files": {},
+        "bytes": 0,
+    }
+    for rel, entry in pack["files"].items():
+        old = old_files.get(rel)
+        installed = target_files.get(rel)
+        target_ok = old is not None and installed == (old["size"], old.get("target_mtime", old["mtime"]))
+        if target_ok and entry["hash"] and old["size"] == entry["size"] and old["hash"] == entry["hash"]:
+            plan["files"][rel] = old
+            plan["unchanged"] += 1
+            continue
+        plan["files"][rel] = dict(entry)
+        (plan["added"] if installed is None else plan["changed"]).append(rel)
+        plan["bytes"] += entry["size"]
+
+    plan["removed"] = [rel for rel in old_files if rel not in pack["files"] and rel in target_files]
+    return plan
+
+
+def apply_archive_plan(archive: zipfile.ZipFile, plan: Dict[str, Any]) -> None:
+    """Extract the files a plan from plan_archive_install marks as new or changed.
+
+    Every file is extracted next to its target and checked against the size and hash of
+    the pack table first; the installed files are only replaced once all of them match.
+    """
+    target_dir = plan["target"]
+    os.makedirs(target_dir, exist_ok=True)
+    for rel in plan["dirs"]:
+        os.makedirs(os.path.join(target_dir, rel), exist_ok=True)
+
+    extracted = []
+    try:
+        for rel in plan["added"] + plan["changed"]:
+            dst = os.path.join(target_dir, rel)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            tmp = f"{dst}.modmanager-tmp"
+            extracted.append((tmp, dst))
+            digest = hashlib.blake2b(digest_size=20)
+            size = 0
+            with archive.open(f"{plan['prefix']}/{rel}") as fsrc, open(tmp, "wb") as fdst:
+                for chunk in iter(lambda: fsrc.read(PACK_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    fdst.write(chunk)
+            expected = plan["files"][rel]
+            if size != expected["size"] or (expected["hash"] and digest.hexdigest() != expected["hash"]):
+                raise ValueError(f"{rel} does not match the archive's pack table")
+            plan["files"][rel] = {"size": size, "hash": digest.hexdigest()}
+    except BaseException:
+        for tmp, _ in extracted:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+        raise
+
+    for (tmp, dst), rel in zip(extracted, plan["added"] + plan["changed"]):
+        os.replace(tmp, dst)
+        plan["files"][rel]["mtime"] = os.stat(dst).st_mtime_ns
+
+    finish_install_plan(plan)
+
+
+# ioctl number of FICLONE (Linux reflink) from <linux/fs.h>
+_FICLONE = 0x40049409
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """Clone src into a new file dst sharing its extents (btrfs, XFS); False where unsupported."""
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        try:
+            os.remove(dst)
+        except FileNotFoundError:
+            pass
+        return False
+
+
+class AssetStore:
+    """Content-addressed store holding one blob per file hash.
+
+    Installed asset files become hardlinks (or reflinks) to the blob, so mods
+    shipping the same textures or sounds share one copy on disk. Blobs are
+    read-only and installs always replace files instead of writing into them,
+    so a shared blob is never modified through one of its links.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        # MOD_TYPES asset folders; scripts and Lua are small and edited often, so they are always copied
+        self.prefixes = tuple(f"media/{folder}/" for mod_type in ASSET_STORE_TYPES for folder in MOD_TYPES[mod_type])
+
+    def accepts(self, rel_path: str) -> bool:
+        """Whether a file of an installed mod belongs in the store."""
+        return rel_path.startswith(self.prefixes)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def add(self, src: str, digest: str) -> str:
+        """Copy a file into the store unless its blob already exists, and return the blob path."""
+        blob = self.blob_path(digest)
+        if os.path.exists(blob):
+            return blob
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(blob), prefix=".blob-")
+        try:
+            with open(src, "rb") as fsrc, os.fdopen(fd, "wb") as fdst:
+                shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+            shutil.copystat(src, tmp)
+            if os.name != "nt":
+                os.chmod(tmp, 0o444)
+            os.replace(tmp, blob)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        return blob
+
+    def link(self, src: str, dst: str, digest: str) -> str:
+        """Install src at dst from its blob; returns 'hardlink', 'reflink' or 'copy'."""
+        blob = self.add(src, digest)
+        if os.path.exists(dst) and os.path.samefile(blob, dst):
+            return "hardlink"
+        tmp = f"{dst}.modmanager-tmp"
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        try:
+            os.link(blob, tmp)
+            os.replace(tmp, dst)
+            return "hardlink"
+        except OSError:
+            # other filesystem than the store, or the blob has too many links
+            pass
+        if _reflink(blob, tmp):
+            os.replace(tmp, dst)
+            return "reflink"
+        fast_copy(src, dst)
+        return "copy"
+
+    def gc(self, dry_run: bool = False) -> Dict[str, int]:
+        """Delete blobs no installed file links to and report what the store saves.
+
+        Reflinked copies do not count as links; they keep their data when the blob goes.
+        """
+        report = {"blobs": 0, "removed": 0, "freed": 0, "stored": 0, "saved": 0}
+        for rel, _ in scan_tree(self.root)[0].items():
+            path = os.path.join(self.root, rel)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if st.st_nlink <= 1:
+                report["removed"] += 1
+                report["freed"] += st.st_size
+                if not dry_run:
+                    if os.name == "nt":
+                        os.chmod(path, 0o644)
+                    os.remove(path)
+                continue
+            report["blobs"] += 1
+            report["stored"] += st.st_size
+            # one blob stands in for every installed link to it
+            report["saved"] += st.st_size * (st.st_nlink - 2)
+        return report
+
+
+class SnapshotStore:
+    """Numbered snapshots of mod folders under root/<mod>/<id>/, with a snapshot.json listing their files.
+
+    Files are reflinked where the filesystem supports it and copied otherwise; a file that
+    has not changed since the previous snapshot of the folder is linked to that snapshot's
+    copy instead. Only with link, meant for the installed copy the manager owns and only
+    ever replaces (temp file and rename), are files hardlinked to the live folder, since an
+    edit made in place would change the snapshot too. Text files editors may rewrite in
+    place and files already linked elsewhere, such as asset store blobs whose link count
+    AssetStore.gc relies on, are still copied then. Restores never link into the folder.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._reflinks: Optional[bool] = None
+
+    def path(self, snapshot: Dict[str, Any]) -> str:
+        return os.path.join(self.root, snapshot["mod"], str(snapshot["id"]))
+
+    def list(self, mod_name: str, folder: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the snapshots of a mod, optionally of one folder, oldest first."""
+        snapshots = []
+        try:
+            entries = os.scandir(os.path.join(self.root, mod_name))
+        except FileNotFoundError:
+            return snapshots
+        with entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    with open(os.path.join(entry.path, "snapshot.json"), "r", encoding="utf-8") as f:
+                        snapshot = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logging.warning(f"Ignoring unreadable snapshot {entry.path}: {e}")
+                    continue
+                if folder is None or snapshot["folder"] == folder:
+                    snapshots.append(snapshot)
+        return sorted(snapshots, key=lambda snapshot: snapshot["id"])
+
+    def _place(self, src: str, dst: str, link: bool = False) -> str:
+        """Create dst with src's content and mtime; returns 'reflink', 'hardlink' or 'copy'.
+
+        src is only hardlinked with link, and only while no other path links to it.
+        """
+        if self._reflinks is not False:
+            if _reflink(src, dst):
+                self._reflinks = True
+                shutil.copystat(src, dst)
+                return "reflink"
+            self._reflinks = False
+        if link and os.stat(src).st_nlink == 1:
+            try:
+                os.link(src, dst)
+                return "hardlink"
+            except OSError:
+                # another filesystem
+                pass
+        shutil.copy2(src, dst)
+        return "copy"
+
+    def create(self, mod_name: str, folder: str, reason: str = "", auto: bool = False,
+               link: bool = False) -> Dict[str, Any]:
+        """Snapshot a folder and return the new snapshot's record; link allows hardlinks into it."""
+        folder = os.path.abspath(folder)
+        files, dirs = scan_tree(folder)
+        snapshots = self.list(mod_name)
+        previous = next((s for s in reversed(snapshots) if s["folder"] == folder), None)
+        previous_files = previous["files"] if previous else {}
+        mod_dir = os.path.join(self.root, mod_name)
+        tmp = os.path.join(mod_dir, f".tmp-{os.getpid()}-{threading.get_ident()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tree = os.path.join(tmp, "files")
+        os.makedirs(tree)
+        for rel in sorted(dirs):
+            os.makedirs(os.path.join(tree, rel), exist_ok=True)
+
+        snapshot: Dict[str, Any] = {"mod": mod_name, "folder": folder, "reason": reason, "auto": auto,
+                                    "created": time.time(), "files": {}, "dirs": dirs, "bytes": 0,
+                                    "copied_bytes": 0, "hardlink": 0, "reflink": 0, "copy": 0, "shared": 0}
+        try:
+            for rel, (size, mtime) in files.items():
+                dst = os.path.join(tree, rel)
+                method = None
+                if previous_files.get(rel) == [size, mtime]:
+                    try:
+                        os.link(os.path.join(self.path(previous), "files", rel), dst)
+                        method = "shared"
+                    except OSError:
+                        pass
+                if method is None:
+                    try:
+                        method = self._place(os.path.join(folder, rel), dst,
+                                             link and not rel.lower().endswith(SNAPSHOT_COPY_EXTENSIONS))
+                    except FileNotFoundError:
+                        # deleted while the snapshot was being taken
+                        continue
+                snapshot[method] += 1
+                snapshot["files"][rel] = [size, mtime]
+                snapshot["bytes"] += size
+                if method == "copy":
+                    snapshot["copied_bytes"] += size
+
+            # ids are claimed by renaming the finished tree into place
+            snapshot_id = snapshots[-1]["id"] + 1 if snapshots else 1
+            while True:
+                snapshot["id"] = snapshot_id
+                atomic_write_json(os.path.join(tmp, "snapshot.json"), snapshot)
+                try:
+                    os.rename(tmp, os.path.join(mod_dir, str(snapshot_id)))
+                    return snapshot
+                except OSError:
+                    if not os.path.exists(os.path.join(mod_dir, str(snapshot_id))):
+                        raise
+                    snapshot_id += 1
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def restore(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Make the snapshot's folder match the snapshot again.
+
+        Files whose size and mtime already match are left alone; files the snapshot does
+        not have are deleted. Files are reflinked or copied back, never hardlinked.
+        "damaged" lists snapshot files that were changed after the snapshot was taken,
+        which only happens when a program wrote into a linked file; those are not restored.
+        """
+        folder, tree = snapshot["folder"], os.path.join(self.path(snapshot), "files")
+        current, current_dirs = scan_tree(folder)
+        summary: Dict[str, Any] = {"restored": 0, "unchanged": 0, "removed": 0, "damaged": []}
+        for rel in sorted(snapshot["dirs"]):
+            os.makedirs(os.path.join(folder, rel), exist_ok=True)
+        for rel, (size, mtime) in snapshot["files"].items():
+            src = os.path.join(tree, rel)
+            st = os.stat(src)
+            if (st.st_size, st.st_mtime_ns) != (size, mtime):
+                summary["damaged"].append(rel)
+                continue
+            if current.get(rel) == (size, mtime):
+                summary["unchanged"] += 1
+                continue
+            dst = os.path.join(folder, rel)
+            tmp = f"{dst}.modmanager-tmp"
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            self._place(src, tmp)
+            os.utime(tmp, ns=(mtime, mtime))
+            os.replace(tmp, dst)
+            summary["restored"] += 1
+
+        for rel in current:
+            if rel not in snapshot["files"]:
+                os.remove(os.path.join(folder, rel))
+                summary["removed"] += 1
+        kept_dirs = set(snapshot["dirs"])
+        for rel in sorted(current_dirs, key=len, reverse=True):
+            if rel not in kept_dirs:
+                try:
+                    os.rmdir(os.path.join(folder, rel))
+                except OSError:
+                    pass
+        return summary
+
+    def prune(self, mod_name: str, keep: int, folder: Optional[str] = None, auto_only: bool = False) -> List[int]:
+        """Delete all but the newest keep snapshots of a mod (or of one of its folders) and return their ids."""
+        snapshots = [s for s in self.list(mod_name, folder) if s["auto"] or not auto_only]
+        dropped = snapshots[:-keep] if keep > 0 else snapshots
+        for snapshot in dropped:
+            shutil.rmtree(self.path(snapshot))
+        return [snapshot["id"] for snapshot in dropped]
+
+
+class RegistryStore(ABC):
+    """Storage backend for the mod registry.
+
+    Changes are applied as {mod name: entry} mappings where an entry of None deletes the mod,
+    so several upserts and deletes can be committed in one transaction.
+    """
+
+    @abstractmethod
+    def load(self) -> Dict[str, Any]:
+        """Return the whole registry."""
+
+    @abstractmethod
+    def apply(self, changes: Dict[str, Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Commit upserts/deletes atomically.
+
+        Returns the registry as stored afterwards when the backend had to read all of it
+        anyway, otherwise None and the caller applies the changes to its own copy.
+        """
+
+    @abstractmethod
+    def replace(self, registry: Dict[str, Any]) -> None:
+        """Replace the whole registry."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every mod from the registry."""
+
+    @abstractmethod
+    def version(self) -> Any:
+        """Return a token that changes whenever the stored registry changes."""
+
+
+class JsonRegistryStore(RegistryStore):
+    """Registry kept in the human-readable modmanager_registry.json file.
+
+    Every change re-reads the file under a cross-process lock, merges the change and
+    renames a fully written temp file over the original, so concurrent managers do not
+    lose each other's updates and a crash never leaves a truncated file.
+    """
+
+    def __init__(self, path: str = REGISTRY_FILE):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise json.JSONDecodeError("Registry is not a JSON object", "", 0)
+            return data
+        except FileNotFoundError:
+            logging.info("Config file not found. Creating new one.")
+            atomic_write_json(self.path, {}, indent=4)
+            return {}
+        except json.JSONDecodeError:
+            # keep the damaged file for recovery instead of overwriting it
+            backup = f"{self.path}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+            os.replace(self.path, backup)
+            logging.error(f"Config file is corrupted. Moved it to {backup} and created a new one.")
+            print(f"Warning: registry file was corrupted and has been moved to {backup}")
+            atomic_write_json(self.path, {}, indent=4)
+            return {}
+
+    def load(self) -> Dict[str, Any]:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with file_lock(self.lock_path):
+            return self._read()
+
+    def apply(self, changes: Dict[str, Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        with file_lock(self.lock_path):
+            registry = self._read()
+            for mod_name, entry in changes.items():
+                if entry is None:
+                    registry.pop(mod_name, None)
+                else:
+                    registry[mod_name] = entry
+            atomic_write_json(self.path, registry, indent=4)
+            return registry
+
+    def replace(self, registry: Dict[str, Any]) -> None:
+        with file_lock(self.lock_path):
+            atomic_write_json(self.path, registry, indent=4)
+
+    def clear(self) -> None:
+        self.replace({})
+
+    def version(self) -> Any:
+        # every write renames a new file into place, so the inode changes as well as the mtime
+        try:
+            st = os.stat(self.path)
+            return st.st_ino, st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+
+class SqliteRegistryStore(RegistryStore):
+    """Registry kept in a SQLite database in WAL mode with one row per mod.
+
+    On first use an existing JSON registry is imported, which is the migration path
+    from the JSON format; the JSON file itself is left untouched. The import is recorded
+    in a meta row and never repeated, so an emptied registry stays empty.
+    """
+
+    def __init__(self, path: str = REGISTRY_DB, json_path: Optional[str] = REGISTRY_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS mods (name TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            migrated = conn.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone() is not None
+            empty = conn.execute("SELECT COUNT(*) FROM mods").fetchone()[0] == 0
+        if migrated:
+            return
+        if empty and json_path and os.path.exists(json_path):
+            self.migrate_from_json(json_path)
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', ?)", (json_path or "",))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def migrate_from_json(self, json_path: str) -> int:
+        """Import every entry of a JSON registry file and return how many were imported."""
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.error(f"Could not migrate registry from {json_path}: {e}")
+            return 0
+        if not isinstance(data, dict):
+            return 0
+        self.apply(data)
+        logging.info(f"Migrated {len(data)} mods from {json_path} to {self.path}")
+        return len(data)
+
+    def load(self) -> Dict[str, Any]:
+        rows = self._connect().execute("SELECT name, data FROM mods").fetchall()
+        return {name: json.loads(data) for name, data in rows}
+
+    def apply(self, changes: Dict[str, Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            for mod_name, entry in changes.items():
+                if entry is None:
+                    conn.execute("DELETE FROM mods WHERE name = ?", (mod_name,))
+                else:
+                    conn.execute("INSERT OR REPLACE INTO mods (name, data) VALUES (?, ?)",
+                                 (mod_name, json.dumps(entry)))
+        return None
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM mods")
+
+    def version(self) -> Any:
+        # commits land in the WAL file first, so its stat changes with every write
+        stats = []
+        for path in (self.path, f"{self.path}-wal"):
+            try:
+                st = os.stat(path)
+                stats.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stats.append(None)
+        return tuple(stats)
+
+    def replace(self, registry: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM mods")
+            conn.executemany("INSERT INTO mods (name, data) VALUES (?, ?)",
+                             [(name, json.dumps(entry)) for name, entry in registry.items()])
+
+
+def open_registry_store(backend: Optional[str] = None) -> RegistryStore:
+    """Create the registry store for a backend name, defaulting to $MODMANAGER_REGISTRY_BACKEND or json."""
+    backend = (backend or os.environ.get(REGISTRY_BACKEND_ENV) or "json").lower()
+    if backend == "json":
+        return JsonRegistryStore()
+    if backend == "sqlite":
+        return SqliteRegistryStore()
+    raise ValueError(f"Unknown registry backend '{backend}'. Use 'json' or 'sqlite'.")
+
+
+# Mod manager class
+class ModManager:
+    """
+    Main mod manager class that handles all mod-related operations.
+    """
+    def __init__(self, registry_store: Optional[RegistryStore] = None):
+        """Initialize the mod manager with platform detection and registry loading."""
+        self.platform = self._get_platform()
+        self._store = registry_store
+        self._registry: Optional[Dict[str, Any]] = None
+        self._registry_version: Any = None
+        self.mods_dir = PZ_MODS_DIR
+        self.script_index: Optional[ScriptIndex] = None
+        self._parse_cache: Optional[ParseCache] = None
+        self._search_index: Optional[SearchIndex] = None
+        self._export_state: Optional[ExportState] = None
+        self.recipe_graph: Optional[RecipeGraph] = None
+        self._install_locks: Dict[str, threading.Lock] = {}
+        self._install_locks_guard = threading.Lock()
+        self.script_writer = ScriptWriter(self.snapshot_script_files)
+        # the asset store is off unless MODMANAGER_ASSET_STORE is set or install --dedupe is used
+        store_setting = os.environ.get(ASSET_STORE_ENV, "")
+        self.use_asset_store = store_setting not in ("", "0")
+        self.asset_store_dir: Optional[str] = store_setting if store_setting not in ("", "0", "1") else None
+        self._asset_store: Optional[AssetStore] = None
+        # installs stop on Lua syntax errors when MODMANAGER_LUA_CHECK is set or install --check-lua is used
+        self.check_lua_on_install = os.environ.get(LUA_CHECK_ENV, "") not in ("", "0")
+        self._lua_cache: Optional[LuaCheckCache] = None
+        # installs and script edits snapshot the folder first when MODMANAGER_SNAPSHOTS is a number of snapshots to keep
+        keep = os.environ.get(SNAPSHOT_ENV, "")
+        self.auto_snapshots = int(keep) if keep.isdigit() else 0
+        self.snapshot_dir: Optional[str] = None
+        self._snapshot_store: Optional[SnapshotStore] = None
+        self.item_types = ["Weapon", "Food", "Clothing", "Literature", "Drainable", "Radio", "Alarm Clock", "Key", "Tool"]
+
+    @property
+    def store(self) -> RegistryStore:
+        """The registry store, opened on first use."""
+        if self._store is None:
+            self._store = open_registry_store()
+        return self._store
+
+    @property
+    def registry(self) -> Dict[str, Any]:
+        """The registered mods, loaded from the store on first use."""
+        if self._registry is None:
+            self._registry = self.load_config()
+        return self._registry
+
+    @registry.setter
+    def registry(self, value: Dict[str, Any]) -> None:
+        self._registry = value
+
+    @property
+    def asset_store(self) -> Optional[AssetStore]:
+        """The shared asset store installs link from, or None when installs copy every file."""
+        if not self.use_asset_store:
+            return None
+        root = self.asset_store_dir or os.path.join(os.path.dirname(os.path.abspath(self.mods_dir)),
+                                                    ASSET_STORE_DIRNAME)
+        if self._asset_store is None or self._asset_store.root != root:
+            self._asset_store = AssetStore(root)
+        return self._asset_store
+
+    @property
+    def snapshot_store(self) -> SnapshotStore:
+        """The snapshot folder, next to the mods folder unless snapshot_dir is set."""
+        root = self.snapshot_dir or os.path.join(os.path.dirname(os.path.abspath(self.mods_dir)), SNAPSHOT_DIRNAME)
+        if self._snapshot_store is None or self._snapshot_store.root != root:
+            self._snapshot_store = SnapshotStore(root)
+        return self._snapshot_store
+
+    @property
+    def lua_cache(self) -> LuaCheckCache:
+        """The on-disk cache of Lua check results, opened on first use."""
+        if self._lua_cache is None:
+            self._lua_cache = LuaCheckCache()
+        return self._lua_cache
+
+    @staticmethod
+    def _get_platform() -> str:
+        """Detects the platform (Windows or Unix)."""
+        if os.name == 'nt':
+            return 'windows'
+        elif os.name == 'posix':
+            return 'unix'
+        raise EnvironmentError("Unsupported Operating System")
+    
+    def load_config(self) -> Dict[str, Any]:
+        """Load the registry from the registry store, creating it if needed."""
+        with span("registry.load") as record:
+            registry = self.store.load()
+            record["entries"] = len(registry)
+        self._registry_version = self.store.version()
+        return registry
+
+    def reload_registry_if_changed(self) -> bool:
+        """Drop the in-memory registry if another process changed the stored one."""
+        if self._registry is not None and self.store.version() != self._registry_version:
+            self._registry = None
+            logging.info("Registry changed on disk; reloading.")
+            return True
+        return False
+
+    def update_registry(self, changes: Dict[str, Optional[Dict[str, Any]]]) -> None:
+        """Commit mod upserts (entry dict) and deletes (None) to the store in one transaction."""
+        try:
+            # pick up other processes' writes first, since only this change is applied in memory
+            self.reload_registry_if_changed()
+            with span("registry.save", entries=len(changes)):
+                stored = self.store.apply(changes)
+            if stored is not None:
+                self.registry = stored
+            else:
+                registry = self.registry
+                for mod_name, entry in changes.items():
+                    if entry is None:
+                        registry.pop(mod_name, None)
+                    else:
+                        registry[mod_name] = entry
+            self._registry_version = self.store.version()
+            logging.info("Configuration saved successfully.")
+        except Exception as e:
+            logging.error(f"Failed to save configuration: {e}")
+            raise
+
+    def _install_lock(self, target_dir: str) -> threading.Lock:
+        """Return the lock serializing installs into one target folder."""
+        key = os.path.normcase(os.path.abspath(target_dir))
+        with self._install_locks_guard:
+            return self._install_locks.setdefault(key, threading.Lock())
+
+    @timed
+    def install_mod(self, mod_name: str, dry_run: bool = False, verbose: bool = True) -> bool:
+        """Install a mod into the Project Zomboid mods folder, copying only changed files.
+
+        With dry_run the file-level diff is printed and nothing is written.
+        """
+        if mod_name not in self.registry:
+            logging.error(f"Mod '{mod_name}' not found in config.")
+            print(f"Error: Mod '{mod_name}' is not registered.")
+            return False
+
+        mod_path = self.registry[mod_name].get("mod_path")
+        if not mod_path or not os.path.isdir(mod_path):
+            logging.error(f"Invalid or missing mod path for '{mod_name}': {mod_path}")
+            print(f"Error: Invalid mod path for '{mod_name}'")
+            return False
+
+        if self.check_lua_on_install:
+            with span("install.luacheck") as record:
+                summary = check_lua_files(list(iter_mod_lua_files(mod_path)), self.lua_cache)
+                record.update(files=summary["files"], checked=summary["checked"], errors=len(summary["errors"]))
+            if summary["errors"]:
+                print_lua_errors(summary["errors"])
+                logging.error(f"Install of '{mod_name}' stopped: {len(summary['errors'])} Lua files have errors")
+                print(f"Install of '{mod_name}' stopped: {len(summary['errors'])} Lua file(s) have errors.")
+                return False
+
+        target_dir = os.path.join(self.mods_dir, mod_name)
+        try:
+            with self._install_lock(target_dir):
+                with span("install.plan") as record:
+                    plan = plan_install(mod_path, target_dir)
+                    record["files"] = len(plan["files"])
+                if dry_run:
+                    print(f"Dry run for '{mod_name}' -> {target_dir}")
+                    print_install_plan(plan)
+                    return True
+                if plan["added"] or plan["changed"] or plan["touched"] or plan["removed"]:
+                    self.auto_snapshot(mod_name, target_dir, "install")
+                with span("install.apply") as record:
+                    apply_install_plan(plan, self.asset_store)
+                    record.update(files=plan["copied"] + plan.get("linked", 0), bytes=plan["bytes"],
+                                  removed=len(plan["removed"]))
+
+            copied = plan["copied"]
+            linked = f", {plan['linked']} linked from the asset store" if plan.get("linked") else ""
+            logging.info(f"Successfully installed mod: {mod_name} ({copied} copied, "
+                         f"{len(plan['removed'])} removed, {plan['bytes']} bytes{linked})")
+            if verbose:
+                print(f"Successfully installed mod: {mod_name} ({copied} copied, "
+                      f"{len(plan['removed'])} removed{linked})")
+            return True
+        except OSError as e:
+            logging.error(f"Installation failed for '{mod_name}': {e}")
+            print(f"Installation failed for '{mod_name}'. Check logs for details.")
+        except Exception as e:
+            logging.error(f"Unexpected error during installation: {e}")
+            print(f"An unexpected error occurred: {e}")
+        return False
+
+    @timed
+    def install_mods(self, mod_names: Optional[List[str]] = None, workers: int = 4,
+                     dry_run: bool = False) -> Dict[str, Any]:
+        """Install several registered mods (all of them by default) on a bounded thread pool.
+
+        Prints progress as each mod finishes and returns the timings and failed mod names.
+        """
+        if mod_names is None:
+            mod_names = list(self.registry)
+        # keep the order but install each mod only once
+        mod_names = list(dict.fromkeys(mod_names))
+        if not mod_names:
+            print("No mods to install.")
+            return {"installed": [], "failed": [], "seconds": 0.0, "timings": {}}
+
+        timings: Dict[str, float] = {}
+        failed: List[str] = []
+        start = time.perf_counter()
+
+        def run(name: str) -> Tuple[str, bool, float]:
+            mod_start = time.perf_counter()
+            try:
+                ok = self.install_mod(name, dry_run=dry_run, verbose=False)
+            except Exception as e:
+                logging.error(f"Unexpected error installing '{name}': {e}")
+                ok = False
+            return name, ok, time.perf_counter() - mod_start
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(mod_names)))) as pool:
+            futures = [pool.submit(run, name) for name in mod_names]
+            for done, future in enumerate(as_completed(futures), 1):
+                name, ok, elapsed = future.result()
+                timings[name] = elapsed
+                if not ok:
+                    failed.append(name)
+                status = "ok" if ok else "FAILED"
+                print(f"[{done}/{len(mod_names)}] {name}: {status} ({elapsed:.2f}s)")
+
+        total = time.perf_counter() - start
+        installed = [name for name in mod_names if name not in failed]
+        logging.info(f"Installed {len(installed)}/{len(mod_names)} mods in {total:.2f}s")
+        print(f"Installed {len(installed)} of {len(mod_names)} mods in {total:.2f}s")
+        if failed:
+            print("Failed mods:")
+            for name in failed:
+                print(f"- {name}")
+        return {"installed": installed, "failed": failed, "seconds": total, "timings": timings}
+
+    @timed
+    def pack_mod(self, mod_name: str, output_path: Optional[str] = None, workers: int = 4,
+                 level: int = 6) -> Optional[Dict[str, Any]]:
+        """Pack a registered mod into a reproducible zip archive, <mod>.zip by default."""
+        if mod_name not in self.registry:
+            logging.error(f"Mod '{mod_name}' not found in config.")
+            print(f"Error: Mod '{mod_name}' is not registered.")
+            return None
+
+        mod_path = self.registry[mod_name].get("mod_path")
+        if not mod_path or not os.path.isdir(mod_path):
+            logging.error(f"Invalid or missing mod path for '{mod_name}': {mod_path}")
+            print(f"Error: Invalid mod path for '{mod_name}'")
+            return None
+
+        output_path = output_path or f"{mod_name}.zip"
+        start = time.perf_counter()
+        try:
+            with span("pack.write") as record:
+                summary = pack_tree(mod_path, output_path, mod_name, workers=workers, level=level)
+                record.update(files=summary["files"], bytes=summary["bytes"], compressed=summary["compressed"])
+        except OSError as e:
+            logging.error(f"Packing failed for '{mod_name}': {e}")
+            print(f"Packing failed for '{mod_name}'. Check logs for details.")
+            return None
+        summary["seconds"] = time.perf_counter() - start
+        logging.info(f"Packed mod {mod_name} into {output_path} ({summary['files']} files, "
+                     f"{summary['bytes']} -> {summary['compressed']} bytes)")
+        print(f"Packed '{mod_name}' into {output_path}: {summary['files']} files, "
+              f"{summary['bytes']} -> {summary['compressed']} bytes in {summary['seconds']:.2f}s")
+        return summary
+
+    @timed
+    def install_from_archive(self, archive_path: str, dry_run: bool = False, verbose: bool = True) -> bool:
+        """Install a packed mod archive into the mods folder, extracting only changed files."""
+        try:
+            with zipfile.ZipFile(archive_path) as archive:
+                pack = read_pack_manifest(archive)
+                mod_name = pack["mod"]
+                target_dir = os.path.join(self.mods_dir, mod_name)
+                if os.path.dirname(os.path.realpath(target_dir)) != os.path.realpath(self.mods_dir):
+                    raise ValueError(f"archive mod folder '{mod_name}' is outside {self.mods_dir}")
+                with self._install_lock(target_dir):
+                    with span("install.plan") as record:
+                        plan = plan_archive_install(archive_path, pack, target_dir)
+                        record["files"] = len(plan["files"])
+                    if dry_run:
+                        print(f"Dry run for '{mod_name}' from {archive_path} -> {target_dir}")
+                        print_install_plan(plan)
+                        return True
+                    with span("install.extract") as record:
+                        apply_archive_plan(archive, plan)
+                        record.update(files=len(plan["added"]) + len(plan["changed"]), bytes=plan["bytes"],
+                                      removed=len(plan["removed"]))
+        except (OSError, zipfile.BadZipFile, ValueError, KeyError) as e:
+            logging.error(f"Installation from archive '{archive_path}' failed: {e}")
+            print(f"Installation from '{archive_path}' failed: {e}")
+            return False
+
+        extracted = len(plan["added"]) + len(plan["changed"])
+        logging.info(f"Installed mod {mod_name} from {archive_path} ({extracted} extracted, "
+                     f"{len(plan['removed'])} removed, {plan['bytes']} bytes)")
+        if verbose:
+            print(f"Successfully installed mod: {mod_name} from {archive_path} "
+                  f"({extracted} extracted, {len(plan['removed'])} removed)")
+        return True
+
+    @timed
+    def gc_asset_store(self, dry_run: bool = False) -> Dict[str, int]:
+        """Delete asset store blobs no installed mod uses any more and print the bytes saved."""
+        use_asset_store, self.use_asset_store = self.use_asset_store, True
+        try:
+            store = self.asset_store
+        finally:
+            self.use_asset_store = use_asset_store
+        if not os.path.isdir(store.root):
+            print(f"No asset store at {store.root}")
+            return {"blobs": 0, "removed": 0, "freed": 0, "stored": 0, "saved": 0}
+        report = store.gc(dry_run=dry_run)
+        action = "Would remove" if dry_run else "Removed"
+        logging.info(f"Asset store gc: {report}")
+        print(f"{action} {report['removed']} unused blobs ({report['freed']} bytes)")
+        print(f"{report['blobs']} blobs in use ({report['stored']} bytes), "
+              f"saving {report['saved']} bytes across installed mods")
+        return report
+
+    def auto_snapshot(self, mod_name: str, folder: str, reason: str) -> Optional[Dict[str, Any]]:
+        """Snapshot a mod folder before changing it when automatic snapshots are on, then prune old ones.
+
+        A failed snapshot is logged and does not stop the change.
+        """
+        if not self.auto_snapshots or not os.path.isdir(folder):
+            return None
+        store = self.snapshot_store
+        try:
+            with span("snapshot.auto", reason=reason) as record:
+                snapshot = store.create(mod_name, folder, reason, auto=True,
+                                        link=self._is_installed_copy(mod_name, folder))
+                pruned = store.prune(mod_name, self.auto_snapshots, snapshot["folder"], auto_only=True)
+                record.update(files=len(snapshot["files"]), pruned=len(pruned))
+        except OSError as e:
+            logging.error(f"Automatic snapshot of '{mod_name}' before {reason} failed: {e}")
+            return None
+        logging.info(f"Snapshot {snapshot['id']} of '{mod_name}' taken before {reason}")
+        return snapshot
+
+    def snapshot_script_files(self, script_files: List[str], reason: str = "script edit") -> None:
+        """Take one automatic snapshot of every registered mod that owns one of these script files."""
+        if not self.auto_snapshots:
+            return
+        paths = [os.path.abspath(path) for path in script_files]
+        for mod_name, mod_data in list(self.registry.items()):
+            mod_path = mod_data.get("mod_path")
+            if not mod_path:
+                continue
+            prefix = os.path.join(os.path.abspath(mod_path), "")
+            if any(path.startswith(prefix) for path in paths):
+                self.auto_snapshot(mod_name, mod_path, reason)
+
+    def _is_installed_copy(self, mod_name: str, folder: str) -> bool:
+        """Whether folder is the mod's copy in the mods folder, which snapshots may hardlink."""
+        return os.path.abspath(folder) == os.path.abspath(os.path.join(self.mods_dir, mod_name))
+
+    def _snapshot_folder(self, mod_name: str, installed: bool) -> Optional[str]:
+        """The folder snapshots of a mod are taken of: its source folder or its installed copy."""
+        if installed:
+            return os.path.join(self.mods_dir, mod_name)
+        if mod_name not in self.registry:
+            print(f"Error: Mod '{mod_name}' is not registered.")
+            return None
+        return self.registry[mod_name].get("mod_path")
+
+    @timed
+    def snapshot_mod(self, mod_name: str, installed: bool = False, reason: str = "manual",
+                     verbose: bool = True) -> Optional[Dict[str, Any]]:
+        """Snapshot a mod's source folder, or its installed copy, without copying unchanged data."""
+        folder = self._snapshot_folder(mod_name, installed)
+        if folder is None:
+            return None
+        if not os.path.isdir(folder):
+            print(f"Error: '{folder}' does not exist.")
+            return None
+        started = time.perf_counter()
+        try:
+            snapshot = self.snapshot_store.create(mod_name, folder, reason, link=installed)
+        except OSError as e:
+            logging.error(f"Snapshot of '{mod_name}' failed: {e}")
+            print(f"Snapshot of '{mod_name}' failed. Check logs for details.")
+            return None
+        elapsed = time.perf_counter() - started
+        logging.info(f"Snapshot {snapshot['id']} of '{mod_name}' ({folder}): {len(snapshot['files'])} files, "
+                     f"{snapshot['copied_bytes']} bytes copied in {elapsed:.2f}s")
+        if verbose:
+            print(f"Snapshot {snapshot['id']} of '{mod_name}': {len(snapshot['files'])} files "
+                  f"({snapshot['bytes']} bytes), {snapshot['copy']} copied ({snapshot['copied_bytes']} bytes) "
+                  f"in {elapsed:.2f}s")
+        return snapshot
+
+    def list_snapshots(self, mod_name: str) -> List[Dict[str, Any]]:
+        """Print and return the snapshots of a mod, oldest first."""
+        snapshots = self.snapshot_store.list(mod_name)
+        if not snapshots:
+            print(f"No snapshots of '{mod_name}'.")
+        installed_dir = os.path.abspath(os.path.join(self.mods_dir, mod_name))
+        for snapshot in snapshots:
+            created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot["created"]))
+            where = "installed" if snapshot["folder"] == installed_dir else "source"
+            kind = "auto" if snapshot["auto"] else "manual"
+            print(f"{snapshot['id']:>4}  {created}  {where:<9}  {kind:<6}  {snapshot['reason']:<12}  "
+                  f"{len(snapshot['files'])} files, {snapshot['bytes']} bytes")
+        return snapshots
+
+    def prune_snapshots(self, mod_name: str, keep: int) -> List[int]:
+        """Delete all but the newest keep snapshots of a mod."""
+        try:
+            pruned = self.snapshot_store.prune(mod_name, keep)
+        except OSError as e:
+            logging.error(f"Pruning snapshots of '{mod_name}' failed: {e}")
+            print(f"Pruning snapshots of '{mod_name}' failed. Check logs for details.")
+            return []
+        print(f"Deleted {len(pruned)} snapshot(s) of '{mod_name}'.")
+        return pruned
+
+    @timed
+    def rollback_mod(self, mod_name: str, snapshot_id: int, verbose: bool = True) -> bool:
+        """Put a mod folder back the way a snapshot recorded it.
+
+        The folder is snapshotted first, so a rollback can itself be rolled back.
+        """
+        snapshot = next((s for s in self.snapshot_store.list(mod_name) if s["id"] == snapshot_id), None)
+        if snapshot is None:
+            print(f"Error: '{mod_name}' has no snapshot {snapshot_id}.")
+            return False
+        folder = snapshot["folder"]
+        try:
+            with self._install_lock(folder):
+                if os.path.isdir(folder):
+                    self.snapshot_store.create(mod_name, folder, f"rollback {snapshot_id}", auto=True,
+                                               link=self._is_installed_copy(mod_name, folder))
+                with span("snapshot.restore") as record:
+                    summary = self.snapshot_store.restore(snapshot)
+                    record.update(restored=summary["restored"], removed=summary["removed"])
+        except OSError as e:
+            logging.error(f"Rollback of '{mod_name}' to snapshot {snapshot_id} failed: {e}")
+            print(f"Rollback of '{mod_name}' failed. Check logs for details.")
+            return False
+        if self.auto_snapshots:
+            self.snapshot_store.prune(mod_name, self.auto_snapshots, folder, auto_only=True)
+
+        logging.info(f"Rolled back '{mod_name}' ({folder}) to snapshot {snapshot_id}: {summary['restored']} restored, "
+                     f"{summary['removed']} removed, {len(summary['damaged'])} damaged")
+        if verbose:
+            for rel in summary["damaged"]:
+                print(f"Error: {rel} was modified in place after the snapshot and was not restored")
+            print(f"Rolled back '{mod_name}' to snapshot {snapshot_id}: {summary['restored']} files restored, "
+                  f"{summary['removed']} removed, {summary['unchanged']} unchanged")
+        return not summary["damaged"]
+
+    def _prompt_recipe_details(self, result_item: str) -> Optional[Tuple[List[str], int, int, str, str]]:
+        """Ask for a recipe's ingredients, result count, time and skill."""
+        ingredients = []
+        print("\nAdd ingredients for the recipe (type 'done' when finished):")
+        
+        # while loop for capturing user input to be placed in the ingredients array
+        while True:
+            ingredient = input("Ingredient name (or 'done' to finish): ").strip()
+            if ingredient.lower() == 'done':
+                break
+                
+            count = input(f"How many '{ingredient}' are needed? ").strip()
+            try:
+                count = int(count)
+            except ValueError:
+                print("Please enter a valid number.")
+                continue
+                
+            ingredients.append(f"{ingredient}:{count}")
+        
+        if not ingredients:
+            print("Error: At least one ingredient is required.")
+            return None
+        
+        result_count = input(f"How many '{result_item}' does this recipe produce? ").strip()
+        try:
+            result_count = int(result_count)
+        except ValueError:
+            print("Using default value of 1.")
+            result_count = 1
+        
+        recipe_time = input("How much time does this recipe take (in minutes)? ").strip()
+        try:
+            recipe_time = int(recipe_time)
+        except ValueError:
+            print("Using default value of 100.")
+            recipe_time = 100
+        
+        skill_type = input("Required skill (leave blank for none): ").strip()
+        skill_level = "0"
+        
+        if skill_type:
+            skill_level_input = input(f"Required level for {skill_type}: ").strip()
+            try:
+                skill_level = str(int(skill_level_input))
+            except ValueError:
+                print("Using default value of 0.")
+                skill_level = "0"
+
+        return ingredients, result_count, recipe_time, skill_type, skill_level
+
+    def watch_mod(self, mod_name: str, interval: float = 0.25, debounce: float = 0.2,
+                  max_syncs: Optional[int] = None) -> None:
+        """Keep a mod's installed copy in sync with its source folder until interrupted.
+
+        The source folder is polled with os.scandir snapshots. Once a change is seen, polling
+        continues until the folder has been quiet for the debounce time, then only the
+        added, changed and deleted files are applied to the installed copy.
+        """
+        if not self.install_mod(mod_name):
+            return
+        mod_path = self.registry[mod_name]["mod_path"]
+        target_dir = os.path.join(self.mods_dir, mod_name)
+        manifest_files = load_install_manifest(target_dir).get("files", {})
+        synced, synced_dirs = scan_tree(mod_path)
+        syncs = 0
+        print(f"Watching '{mod_name}' ({len(synced)} files). Press Ctrl+C to stop.")
+
+        try:
+            while max_syncs is None or syncs < max_syncs:
+                time.sleep(interval)
+                current, current_dirs = scan_tree(mod_path)
+                if current == synced and current_dirs == synced_dirs:
+                    continue
+                # wait for a burst of saves to settle, re-checking only the files that changed;
+                # edits elsewhere in the tree are picked up by the next poll
+                pending = [rel for rel in set(current) | set(synced) if current.get(rel) != synced.get(rel)]
+                while True:
+                    time.sleep(debounce)
+                    settled = True
+                    for rel in pending:
+                        try:
+                            st = os.stat(os.path.join(mod_path, *rel.split("/")))
+                            stat = (st.st_size, st.st_mtime_ns)
+                        except FileNotFoundError:
+                            stat = None
+                        if stat != current.get(rel):
+                            settled = False
+                            if stat is None:
+                                current.pop(rel, None)
+                            else:
+                                current[rel] = stat
+                    if settled:
+                        break
+
+                start = time.perf_counter()
+                try:
+                    with self._install_lock(target_dir), span("watch.sync", mod=mod_name) as record:
+                        plan = plan_sync(mod_path, target_dir, manifest_files, synced,
+                                         current, synced_dirs, current_dirs)
+                        apply_install_plan(plan)
+                        record.update(files=plan["copied"], bytes=plan["bytes"], removed=len(plan["removed"]))
+                except OSError as e:
+                    # a file vanished or is still being written; retry on the next poll
+                    logging.warning(f"Sync of '{mod_name}' failed, retrying: {e}")
+                    manifest_files = load_install_manifest(target_dir).get("files", {})
+                    continue
+                synced, synced_dirs = current, current_dirs
+                syncs += 1
+                elapsed = (time.perf_counter() - start) * 1000
+                copied = len(plan["added"]) + len(plan["changed"])
+                logging.info(f"Synced '{mod_name}': {copied} copied, {len(plan['removed'])} removed in {elapsed:.0f}ms")
+                print(f"Synced {copied} copied, {len(plan['removed'])} removed ({elapsed:.0f}ms)")
+        except KeyboardInterrupt:
+            print(f"\nStopped watching '{mod_name}'.")
+
+    @timed
+    def create_recipe(self, mod_name: str, recipe_name: str, recipe_type: str, result_item: str,
+                      ingredients: Optional[List[str]] = None, result_count: int = 1, recipe_time: int = 100,
+                      skill_type: str = "", skill_level: str = "0") -> bool:
+        """Create a new recipe for a mod.
+
+        Ingredients are 'name:count' strings; when they are not given, the details are asked for interactively.
+        """
+        if mod_name not in self.registry:
+            print(f"Error: Mod '{mod_name}' is not registered.")
+            return False
+        
+        mod_path = os.path.abspath(self.registry[mod_name]["mod_path"])
+        
+        if not os.path.exists(mod_path):
+            print(f"Error: Mod path does not exist: {mod_path}")
+            return False
+        
+        if recipe_type not in RECIPE_TYPES:
+            print(f"Error: Invalid recipe type. Choose from: {', '.join(RECIPE_TYPES)}")
+            return False
+        
+        if ingredients is None:
+            details = self._prompt_recipe_details(result_item)
+            if details is None:
+                return False
+            ingredients, result_count, recipe_time, skill_type, skill_level = details
+        elif not ingredients:
+            print("Error: At least one ingredient is required.")
+            return False
+
+        # build the recipe block and insert it before the closing brace of the recipe file
+        recipe_file = os.path.join(mod_path, "media", "scripts", f"{mod_name}_Recipes.txt")
+        block = format_recipe_block(recipe_name, recipe_type, result_item, result_count,
+                                    recipe_time, ingredients, skill_type, skill_level)
+        try:
+            self.script_writer.add(recipe_file, block, base_file_header(),
+                                   f"Successfully created recipe: {recipe_name}\n"
+                                   f"Recipe file location: {recipe_file}")
+            return True
+        except (OSError, ValueError) as e:
+            print(f"Failed to create recipe: {e}")
+            logging.error(f"Recipe creation failed for {mod_name}: {e}")
+            return False
+
+    @timed
+    def create_model(self, mod_name: str, model_name: str) -> bool:
+        """Create a new model for a mod."""
+        if mod_name not in self.registry:
+            print(f"Error: Mod '{mod_name}' is not registered")
+            logging.error(f"Mod '{mod_name}' not found in registry")
+            return False
+
+        mod_path = self.registry[mod_name]["mod_path"]
+        model_file = os.path.join(mod_path, "media", "scripts", "models.txt")
+
+        try:
+            self.script_writer.add(model_file, format_model_block(model_name), base_file_header(),
+                                   f"Successfully created model: {model_name}")
+            logging.info(f"Queued model: {model_name} for mod: {mod_name}")
+            return True
+        except (OSError, ValueError) as e:
+            logging.error(f"Model creation failed for '{mod_name}': {e}")
+            print(f"Model creation failed for '{mod_name}'. Check logs for details.")
+            return False
+
+    @timed
+    def create_sound(self, mod_name: str, sound_type: str, sound_name: str, **kwargs) -> bool:
+        """Create a new sound for a mod."""
+        if mod_name not in self.registry:
+            print(f"Error: Mod '{mod_name}' is not registered")
+            logging.error(f"Mod '{mod_name}' not found in registry")
+            return False
+
+        mod_path = self.registry[mod_name]["mod_path"]
+        sound_file = os.path.join(mod_path, "media", "scripts", f"sounds_{sound_type}.txt")
+
+        # extra key=value arguments either override clip properties or are added to the sound block
+        try:
+            self.script_writer.add(sound_file, format_sound_block(sound_name, kwargs), sound_file_header(mod_name),
+                                   f"Successfully created or updated sound: {sound_name}")
+            logging.info(f"Queued sound: {sound_name} for mod: {mod_name}")
+            return True
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to create sound '{sound_name}': {e}")
+            print(f"Failed to create sound '{sound_name}'. Check logs for details.")
+            return False
+
+    @timed
+    def ingest_sounds(self, mod_name: str, source_dir: str, sound_type: str = "General",
+                      sidecar: Optional[str] = None, workers: int = 8, verbose: bool = True) -> Dict[str, Any]:
+        """Add every .ogg/.wav file under a folder to a mod as sounds.
+
+        Headers are read and files copied into media/sound on a thread pool; files in a
+        subfolder use the subfolder name as their sound type. The blocks for each type
+        are written to sounds_<Type>.txt in one insertion. A sidecar CSV/JSONL (default:
+        sounds.csv or sounds.jsonl in the folder) overrides volume, loop, distanceMax
+        and the rest of the block per file. Sounds already defined in the target file
+        only have their audio file refreshed.
+        """
+        summary: Dict[str, Any] = {"sounds": [], "errors": [], "files": {}, "copied": 0, "skipped": 0}
+        if mod_name not in self.registry:
+            print(f"Error: Mod '{mod_name}' is not registered")
+            logging.error(f"Mod '{mod_name}' not found in registry")
+            return summary
+        if not os.path.isdir(source_dir):
+            print(f"Error: '{source_dir}' is not a folder")
+            return summary
+
+        if sidecar is None:
+            sidecar = next((candidate for candidate in (os.path.join(source_dir, "sounds.csv"),
+                                                        os.path.join(source_dir, "sounds.jsonl"))
+                            if os.path.isfile(candidate)), None)
+        try:
+            overrides = load_sound_sidecar(sidecar) if sidecar else {}
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not read sound sidecar '{sidecar}': {e}")
+            print(f"Error: {e}")
+            return summary
+
+        start = time.perf_counter()
+        mod_path = self.registry[mod_name]["mod_path"]
+        self.auto_snapshot(mod_name, mod_path, "sounds")
+        sound_dir = os.path.join(mod_path, "media", "sound")
+        os.makedirs(sound_dir, exist_ok=True)
+        files, _ = scan_tree(source_dir)
+        audio = sorted(rel for rel in files if rel.lower().endswith(SOUND_EXTENSIONS))
+
+        names: Dict[str, str] = {}
+        for rel in audio:
+            name = _sound_name(os.path.basename(rel))
+            if name in names:
+                summary["errors"].append((rel, f"sound name '{name}' is already used by {names[name]}"))
+            else:
+                names[name] = rel
+
+        # sidecar rows without their type, and the type: sidecar, then subfolder, then sound_type
+        properties_of: Dict[str, Dict[str, Any]] = {}
+        types: Dict[str, str] = {}
+        for name, rel in list(names.items()):
+            properties = dict(overrides.get(rel) or overrides.get(os.path.basename(rel)) or overrides.get(name) or {})
+            folder = rel.split("/")[0] if "/" in rel else ""
+            try:
+                # the type names the script file, so it must not lead out of media/scripts
+                types[name] = check_sound_type(properties.pop("type", "") or folder or sound_type)
+            except ValueError as e:
+                summary["errors"].append((rel, str(e)))
+                del names[name]
+                continue
+            properties_of[name] = properties
+
+        def ingest(name: str, rel: str) -> Dict[str, Any]:
+            src = os.path.join(source_dir, rel)
+            info = probe_audio(src)
+            file_name = name + os.path.splitext(rel)[1].lower()
+            dst = os.path.join(sound_dir, file_name)
+            try:
+                st = os.stat(dst)
+                copied = (st.st_size, st.st_mtime_ns) != files[rel]
+            except FileNotFoundError:
+                copied = True
+            if copied:
+                fast_copy(src, dst)
+            info.update(name=name, source=rel, file=f"media/sound/{file_name}", copied=copied)
+            return info
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(ingest, name, rel): rel for name, rel in names.items()}
+            for future in as_completed(futures):
+                try:
+                    summary["sounds"].append(future.result())
+                except (OSError, ValueError) as e:
+                    summary["errors"].append((futures[future], str(e)))
+
+        pending: Dict[str, List[str]] = {}
+        for info in sorted(summary["sounds"], key=lambda info: info["source"]):
+            info["type"] = types[info["name"]]
+            properties = properties_of[info["name"]]
+            properties["file"] = info["file"]
+            pending.setdefault(info["type"], []).append((info["name"], format_sound_block(info["name"], properties)))
+            summary["copied"] += info["copied"]
+
+        try:
+            # queued like any other script edit: written once per file, or later in a batch
+            with self.script_writer.deferred():
+                for type_name, named_blocks in pending.items():
+                    sound_file = os.path.join(mod_path, "media", "scripts", f"sounds_{type_name}.txt")
+                    try:
+                        defined = set()
+                        if os.path.exists(sound_file):
+                            defined = {definition["name"] for definition in iter_script_definitions(sound_file)
+                                       if definition["kind"] == "sound"}
+                    except (OSError, ValueError) as e:
+                        logging.error(f"Failed to read sounds from '{sound_file}': {e}")
+                        summary["errors"].append((sound_file, str(e)))
+                        continue
+                    blocks = [block for name, block in named_blocks if name not in defined]
+                    summary["skipped"] += len(named_blocks) - len(blocks)
+                    message = f"Wrote {len(blocks)} sounds to {sound_file}" if verbose else None
+                    for block in blocks:
+                        self.script_writer.add(sound_file, block, sound_file_header(mod_name), message)
+                        message = None
+                    if blocks:
+                        summary["files"][sound_file] = len(blocks)
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to write sounds for '{mod_name}': {e}")
+            summary["errors"].append((os.path.join(mod_path, "media", "scripts"), str(e)))
+
+        elapsed = time.perf_counter() - start
+        written = sum(summary["files"].values())
+        logging.info(f"Ingested {written} sounds from {source_dir} into {mod_name} "
+                     f"({summary['copied']} copied, {len(summary['errors'])} errors) in {elapsed:.2f}s")
+        if verbose:
+            for info in sorted(summary["sounds"], key=lambda info: info["name"]):
+                channels = {1: "mono", 2: "stereo"}.get(info["channels"], f"{info['channels']} channels")
+                print(f"{info['name']}: {info['format']}, {channels}, {info['sample_rate']} Hz, "
+                      f"{info['duration']:.2f}s -> sounds_{info['type']}.txt")
+            for rel, message in sorted(summary["errors"]):
+                print(f"Error in {rel}: {message}")
+            print(f"Added {written} sounds, {summary['skipped']} already defined ({summary['copied']} files copied, "
+                  f"{len(summary['errors'])} errors) in {elapsed:.2f}s")
+        return summary
+
+    def list_recipe_types(self) -> None:
+        """Display all supported recipe types."""
+        print("\nSupported Recipe Types:")
+        for i, recipe_type in enumerate(RECIPE_TYPES, 1):
+            print(f"{i}. {recipe_type}")
+
+    @timed
+    def create_mod(self, mod_name: str, mod_path: str, mod_types: Optional[List[str]] = None) -> bool:
+        """Create a new mod folder and register it in the configuration.
+
+        When mod_types is not given, the MOD_TYPES to add are asked for interactively.
+        """
+        if mod_name in self.registry:
+            logging.warning(f"Mod '{mod_name}' already exists.")
+            print(f"Warning: Mod '{mod_name}' already exists.")
+            return False
+
+        if not os.path.exists(mod_path):
+            logging.error(f"Invalid path provided: {mod_path}")
+            print(f"Error: The path '{mod_path}' does not exist.")
+            return False
+
+        if mod_types is None:
+            print("\nAvailable mod types:")
+            for i, mod_type in enumerate(MOD_TYPES.keys(), 1):
+                print(f"{i}. {mod_type}")
+
+            selected_types = []
+            while True:
+                selected = input("Enter a mod type to add (or type 'quit' to finish): ").strip().capitalize()
+                if selected == 'Quit':
+                    break
+                if selected not in MOD_TYPES:
+                    print(f"Invalid mod type '{selected}'. Try again.")
+                    continue
+                selected_types.append(selected)
+        else:
+            selected_types = [mod_type.capitalize() for mod_type in mod_types]
+            invalid = [mod_type for mod_type in selected_types if mod_type not in MOD_TYPES]
+            if invalid:
+                print(f"Invalid mod type(s) ignored: {', '.join(invalid)}")
+                selected_types = [mod_type for mod_type in selected_types if mod_type in MOD_TYPES]
+
+        try:
+            with span("scaffold.tree", folders=len(mod_type_folders(selected_types))):
+                full_path = scaffold_mod_tree(mod_name, mod_path, selected_types)
+        except OSError as e:
+            logging.error(f"Failed to create mod folder for '{mod_name}': {e}")
+            print(f"Error: Could not create the folder for mod '{mod_name}'.")
+            return False
+
+        entry: Dict[str, Any] = {"mod_path": full_path}
+        if selected_types:
+            # remember the selected types so 'validate --deep' can check their folders
+            entry["mod_types"] = selected_types
+        self.update_registry({mod_name: entry})
+        if selected_types:
+            logging.info(f"Created structure for mod: {mod_name} with folders: "
+                         f"{', '.join(mod_type_folders(selected_types))}")
+            print(f"Successfully created mod structure for: {mod_name}")
+
+        logging.info(f"Created new mod: {mod_name}")
+        print(f"Successfully registered mod: {mod_name}")
+        return True
+
+    @timed
+    def scaffold_mods(self, manifest_path: str, workers: int = 8, dry_run: bool = False,
+                      verbose: bool = True) -> Dict[str, Any]:
+        """Create and register every mod listed in a JSON or TOML manifest.
+
+        Folders are created in parallel and all new mods are registered in one registry
+        transaction. Mods that are already registered are skipped.
+        """
+        summary: Dict[str, Any] = {"created": [], "skipped": [], "errors": []}
+        try:
+            mods = load_scaffold_manifest(manifest_path)
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not read scaffold manifest '{manifest_path}': {e}")
+            print(f"Error: {e}")
+            summary["errors"].append(str(e))
+            return summary
+
+        pending = []
+        for mod in mods:
+            if mod["name"] in self.registry:
+                summary["skipped"].append(mod["name"])
+            else:
+                pending.append(mod)
+
+        if dry_run:
+            for mod in pending:
+                print(f"Would create {os.path.join(mod['path'], mod['name'])} "
+                      f"({', '.join(mod['types']) or 'no mod types'})")
+            for name in summary["skipped"]:
+                print(f"Already registered: {name}")
+            return summary
+
+        started = time.perf_counter()
+        changes: Dict[str, Optional[Dict[str, Any]]] = {}
+        with span("scaffold.tree", mods=len(pending)):
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = {pool.submit(scaffold_mod_tree, mod["name"], mod["path"], mod["types"]): mod
+                           for mod in pending}
+                for future in as_completed(futures):
+                    mod = futures[future]
+                    try:
+                        entry: Dict[str, Any] = {"mod_path": future.result()}
+                    except OSError as e:
+                        logging.error(f"Failed to create mod folder for '{mod['name']}': {e}")
+                        summary["errors"].append(f"{mod['name']}: {e}")
+                        continue
+                    if mod["types"]:
+                        entry["mod_types"] = mod["types"]
+                    changes[mod["name"]] = entry
+
+        if changes:
+            self.update_registry(changes)
+        # keep the manifest order in the report rather than completion order
+        summary["created"] = [mod["name"] for mod in pending if mod["name"] in changes]
+        elapsed = time.perf_counter() - started
+        logging.info(f"Scaffolded {len(changes)} mods from {manifest_path} in {elapsed:.2f}s")
+        if verbose:
+            for error in summary["errors"]:
+                print(f"Error: {error}")
+            for name in summary["skipped"]:
+                print(f"Skipped '{name}': already registered")
+            print(f"Created {len(summary['created'])} mods, {len(summary['skipped'])} skipped, "
+                  f"{len(summary['errors'])} errors in {elapsed:.2f}s")
+        return summary
+
+    @timed
+    def register_mod(self, mod_name: str, mod_path: str) -> bool:
+        """Register an existing mod in the registry."""
+        if mod_name in self.registry:
+            logging.warning(f"Mod '{mod_name}' already exists in registry.")
+            print(f"Warning: Mod '{mod_name}' already exists in registry.")
+            return False
+        
+        full_path = os.path.abspath(mod_path)
+        if not os.path.exists(full_path):
+            logging.error(f"Invalid path provided: {full_path}")
+            print(f"Error: The path '{full_path}' does not exist.")
+            return False
+        
+        self.update_registry({mod_name: {"mod_path": full_path}})
+        
+        logging.info(f"Registered existing mod: {mod_name} at {full_path}")
+        print(f"Successfully registered mod: {mod_name}")
+        return True
+
+    @timed
+    def flush_registry(self):
+        """Clear the mod registry."""
+        try:
+            self.store.clear()
+            self.registry = {}
+            self._registry_version = self.store.version()
+            print("Flushed registry.")
+        except Exception as e:
+            print(f"Error occurred while flushing registry: {e}")
+
+    @timed
+    def create_item(self, mod_name: str, item_type: str, item_name: str, **properties) -> bool:
+        """Create a new item for a mod."""
+        if mod_name not in self.registry:
+            print(f"Error: Mod '{mod_name}' is not registered.")
+            return False
+
+        if item_type not in self.item_types:
+            print(f"Error: Invalid item type. Choose from: {', '.join(self.item_types)}")
+            return False
+
+        mod_path = self.registry[mod_name]["mod_path"]
+        item_file = os.path.join(mod_path, "media", "scripts", f"items_{item_type}.txt")
+
+        try:
+            self.script_writer.add(item_file, format_item_block(item_name, properties), item_file_header(mod_name),
+                                   f"Successfully created {item_type} item: {item_name}")
+            return True
+        except (OSError, ValueError) as e:
+            print(f"Failed to create item: {e}")
+            logging.error(f"Item creation failed for {mod_name}: {e}")
+            return False
+
+    def list_item_types(self) -> None:
+        """Display all supported item types."""
+        print("\nSupported Item Types:")
+        for i, item_type in enumerate(self.item_types, 1):
+            print(f"{i}. {item_type}")
+
+    @timed
+    def list_mods(self) -> None:
+        """List all registered mods."""
+        if not self.registry:
+            print("No mods registered.")
+            return
+
+        print("\nRegistered Mods:")
+        for i, (mod_name, mod_data) in enumerate(self.registry.items(), 1):
+            print(f"{i}. {mod_name}: {mod_data['mod_path']}")
+
+    @timed
+    def delete_mod(self, mod_name: str) -> bool:
+        """Remove a mod from the configuration."""
+        if mod_name not in self.registry:
+            print(f"Error: Mod '{mod_name}' not found.")
+            return False
+
+        self.update_registry({mod_name: None})
+        print(f"Removed mod: {mod_name}")
+        return True
+
+    def _validate_mod_deep(self, mod_name: str, mod_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Check one mod's layout and script references against a single directory snapshot."""
+        mod_path = mod_data.get("mod_path", "")
+        result = {"mod": mod_name, "path": mod_path, "errors": [], "warnings": []}
+        if not mod_path or not os.path.isdir(mod_path):
+            result["errors"].append("Mod path does not exist")
+            return result
+
+        files, dirs = scan_tree(mod_path)
+        # game paths are matched case-insensitively, with and without the file extension
+        lower_files = {rel.lower() for rel in files}
+        lower_stems = {os.path.splitext(rel)[0] for rel in lower_files}
+        lower_dirs = {rel.lower() for rel in dirs}
+
+        if "mod.info" not in files:
+            result["errors"].append("Missing mod.info")
+        if "media" not in dirs:
+            result["errors"].append("Missing media folder")
+        for mod_type in mod_data.get("mod_types", []):
+            for folder in MOD_TYPES.get(mod_type, []):
+                if f"media/{folder}".lower() not in lower_dirs:
+                    result["warnings"].append(f"Missing media/{folder} folder for {mod_type} mod type")
+
+        for rel in sorted(files):
+            if not (rel.startswith("media/scripts/") and rel.lower().endswith(".txt")):
+                continue
+            path = os.path.join(mod_path, *rel.split("/"))
+            try:
+                definitions = self.parse_cache.get_definitions(path, *files[rel])
+            except OSError as e:
+                result["errors"].append(f"Could not read {rel}: {e}")
+                continue
+            for definition in definitions:
+                where = f"{rel}:{definition['line']}"
+                properties = definition["properties"]
+                if definition["kind"] == "sound" and properties.get("clip.file"):
+                    sound_file = properties["clip.file"].replace("\\", "/").lower()
+                    if sound_file not in lower_files:
+                        result["errors"].append(f"Sound {definition['name']} references missing file "
+                                                f"{properties['clip.file']} ({where})")
+                elif definition["kind"] == "model":
+                    mesh = properties.get("mesh", "").replace("\\", "/").lower()
+                    if mesh and not any(f"media/{folder}/{mesh}" in lower_stems for folder in ("models", "models_x")):
+                        result["errors"].append(f"Model {definition['name']} references missing mesh "
+                                                f"{properties['mesh']} ({where})")
+                    texture = properties.get("texture", "").replace("\\", "/").lower()
+                    if texture and f"media/textures/{texture}" not in lower_stems:
+                        result["warnings"].append(f"Model {definition['name']} references missing texture "
+                                                  f"{properties['texture']} ({where})")
+        return result
+
+    @timed
+    def validate_mod_paths(self, deep: bool = False, as_json: bool = False,
+                           workers: int = 16) -> List[Dict[str, Any]]:
+        """Check if all registered mod paths still exist and return one result per mod.
+
+        With deep, every mod is walked on a thread pool and checked for mod.info, the media
+        folders of its mod types and files referenced by its sound and model definitions.
+        """
+        if deep:
+            mods = list(self.registry.items())
+            results = []
+            if mods:
+                with ThreadPoolExecutor(max_workers=max(1, min(workers, len(mods)))) as pool:
+                    results = list(pool.map(lambda mod: self._validate_mod_deep(*mod), mods))
+                self.parse_cache.flush()
+            if as_json:
+                print(json.dumps(results, indent=4))
+                return results
+            for result in results:
+                status = "OK" if not result["errors"] else "INVALID"
+                print(f"{result['mod']}: {status}")
+                for error in result["errors"]:
+                    print(f"  error: {error}")
+                for warning in result["warnings"]:
+                    print(f"  warning: {warning}")
+            invalid = sum(1 for result in results if result["errors"])
+            print(f"Validated {len(results)} mods: {invalid} with errors.")
+            return results
+
+        results = []
+        invalid_mods = []
+        for mod_name, mod_data in self.registry.items():
+            result = {"mod": mod_name, "path": mod_data["mod_path"], "errors": [], "warnings": []}
+            if not os.path.exists(mod_data["mod_path"]):
+                result["errors"].append("Mod path does not exist")
+                invalid_mods.append(mod_name)
+            results.append(result)
+
+        if invalid_mods:
+            print("Warning: The following mods have invalid paths:")
+            for mod in invalid_mods:
+                print(f"- {mod}")
+            print("Check mod manager registry file for invalid entry.")
         else:
-            subprocess.run(['bash', script_path], check=True, shell=False)
-    except Exception as e:
-        print(f"Error displaying help: {e}")
+            print("All mod paths are valid.")
+        return results
+
+    @property
+    def parse_cache(self) -> ParseCache:
+        """The on-disk parse cache, opened on first use."""
+        if self._parse_cache is None:
+            self._parse_cache = ParseCache()
+        return self._parse_cache
+
+    @timed
+    def build_script_index(self, mod_names: Optional[List[str]] = None, use_cache: bool = True) -> ScriptIndex:
+        """Parse the media/scripts files of registered mods (all by default) into a ScriptIndex.
+
+        With use_cache, unchanged files are loaded from the parse cache instead of being re-parsed.
+        """
+        index = ScriptIndex()
+        for mod_name in mod_names if mod_names is not None else list(self.registry):
+            mod_path = self.registry.get(mod_name, {}).get("mod_path")
+            if not mod_path:
+                continue
+            for path, size, mtime in iter_mod_script_files(mod_path):
+                try:
+                    definitions = self.parse_cache.get_definitions(path, size, mtime) if use_cache else None
+                    index.add_file(mod_name, path, definitions, (size, mtime))
+                except OSError as e:
+                    logging.error(f"Could not parse script file {path}: {e}")
+        if use_cache:
+            self.parse_cache.flush()
+        self.script_index = index
+        # the recipe graph was built from the replaced index's files
+        self.recipe_graph = None
+        return index
+
+    @timed
+    def refresh_script_index(self) -> Tuple[List[str], List[str]]:
+        """Bring the script index up to date, re-reading only script files whose size or mtime changed.
+
+        Returns the (changed or added, removed) file paths.
+        """
+        if self.script_index is None:
+            index = self.build_script_index()
+            return list(index.files), []
+
+        index = self.script_index
+        changed = []
+        seen = set()
+        for mod_name, mod_data in list(self.registry.items()):
+            mod_path = mod_data.get("mod_path")
+            if not mod_path:
+                continue
+            for path, size, mtime in iter_mod_script_files(mod_path):
+                seen.add(path)
+                if index.stats.get(path) == (size, mtime):
+                    continue
+                try:
+                    index.add_file(mod_name, path, self.parse_cache.get_definitions(path, size, mtime), (size, mtime))
+                    changed.append(path)
+                except OSError as e:
+                    logging.error(f"Could not parse script file {path}: {e}")
+        removed = [path for path in index.files if path not in seen]
+        for path in removed:
+            index.remove_file(path)
+        self.parse_cache.flush()
+        return changed, removed
+
+    @timed
+    def check_recipes(self, verbose: bool = True) -> Dict[str, Any]:
+        """Validate recipe ingredients and results against the items defined by all registered mods.
+
+        The recipe graph is kept between calls and only files that changed since the last
+        check are re-read. Vanilla items are only known if the game's own scripts folder is
+        registered as a mod.
+        """
+        changed, removed = self.refresh_script_index()
+        if self.recipe_graph is None:
+            self.recipe_graph = RecipeGraph()
+            changed = list(self.script_index.files)
+        for path in removed:
+            self.recipe_graph.remove_file(path)
+        for path in changed:
+            self.recipe_graph.update_file(path, self.script_index.files.get(path, []))
+        report = self.recipe_graph.analyze()
+
+        if verbose:
+            print(f"Checked {report['recipes']} recipes against {report['items']} items.")
+            for recipe, name in report["unknown_ingredients"]:
+                print(f"Unknown ingredient '{name}' in recipe {recipe['name']} ({recipe['file']}:{recipe['line']})")
+            for recipe, name in report["unknown_results"]:
+                if name:
+                    print(f"Unknown result '{name}' in recipe {recipe['name']} ({recipe['file']}:{recipe['line']})")
+                else:
+                    print(f"Recipe {recipe['name']} has no result ({recipe['file']}:{recipe['line']})")
+            for cycle in report["cycles"]:
+                print(f"Cycle between items: {' -> '.join(cycle)}")
+            if report["unreachable"]:
+                print(f"Unreachable items: {', '.join(report['unreachable'])}")
+        return report
+
+    @timed
+    def find_definition(self, name: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Print and return where a definition name is defined across the registered mods."""
+        self.refresh_script_index()
+        matches = self.script_index.find(name, kind)
+        if not matches:
+            print(f"No definition named '{name}' found.")
+        for definition in matches:
+            print(f"{definition['kind']} {definition['module']}.{definition['name']} in mod "
+                  f"{definition['mod']}: {definition['file']}:{definition['line']}")
+        return matches
+
+    @property
+    def search_index(self) -> SearchIndex:
+        """The on-disk search index, opened on first use."""
+        if self._search_index is None:
+            self._search_index = SearchIndex()
+        return self._search_index
+
+    def refresh_search_index(self, rebuild: bool = False) -> Tuple[List[str], List[str]]:
+        """Re-index the script files of registered mods that changed since the last search.
+
+        Returns the (changed or added, removed) file paths.
+        """
+        if rebuild:
+            self.search_index.clear()
+        files = []
+        for mod_name, mod_data in list(self.registry.items()):
+            mod_path = mod_data.get("mod_path")
+            if mod_path:
+                files.extend((mod_name, path, size, mtime) for path, size, mtime in iter_mod_script_files(mod_path))
+        with span("search.sync", files=len(files)) as record:
+            changed, removed = self.search_index.sync(files, self.parse_cache.get_definitions)
+            record.update(changed=len(changed), removed=len(removed))
+        if changed:
+            self.parse_cache.flush()
+        return changed, removed
+
+    @timed
+    def search_definitions(self, query: List[str], kind: Optional[str] = None, mod: Optional[str] = None,
+                           fuzzy: bool = False, limit: int = 50, as_json: bool = False,
+                           rebuild: bool = False) -> List[Dict[str, Any]]:
+        """Print and return the definitions across registered mods that match a search query.
+
+        See parse_search_query for the query syntax. The index is brought up to date first.
+        """
+        try:
+            conditions = parse_search_query(query, fuzzy)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return []
+        self.refresh_search_index(rebuild)
+        try:
+            with span("search.query", conditions=len(conditions)) as record:
+                total, results = self.search_index.search(conditions, kind, mod, limit)
+                record["matches"] = total
+        except ValueError as e:
+            print(f"Error: {e}")
+            return []
+
+        if as_json:
+            print(json.dumps({"total": total, "results": results}, indent=2))
+            return results
+        if not results:
+            print("No matching definitions found.")
+        for definition in results:
+            print(f"{definition['kind']} {definition['module']}.{definition['name']} in mod "
+                  f"{definition['mod']}: {definition['file']}:{definition['line']}")
+        if total > len(results):
+            print(f"... {total - len(results)} more (showing {len(results)} of {total}, use --limit to see more)")
+        return results
+
+    @timed
+    def check_lua(self, mod_names: Optional[List[str]] = None, workers: Optional[int] = None,
+                  verbose: bool = True) -> Dict[str, Any]:
+        """Check the .lua files of registered mods (all by default) for unbalanced blocks, brackets and strings.
+
+        Files whose content was checked before are answered from the cache.
+        """
+        paths = []
+        for mod_name in mod_names if mod_names else list(self.registry):
+            mod_path = self.registry.get(mod_name, {}).get("mod_path")
+            if mod_name not in self.registry:
+                print(f"Error: Mod '{mod_name}' is not registered.")
+            elif mod_path and os.path.isdir(mod_path):
+                paths.extend(iter_mod_lua_files(mod_path))
+        started = time.perf_counter()
+        summary = check_lua_files(paths, self.lua_cache, workers)
+        elapsed = time.perf_counter() - started
+        logging.info(f"Checked {summary['files']} Lua files ({summary['cached']} cached) in {elapsed:.2f}s, "
+                     f"{len(summary['errors'])} with errors")
+        if verbose:
+            print_lua_errors(summary["errors"])
+            for path in summary["unreadable"]:
+                print(f"Could not read {path}")
+            print(f"Checked {summary['files']} Lua files ({summary['cached']} unchanged since the last check) "
+                  f"in {elapsed:.2f}s: {len(summary['errors'])} with errors")
+        return summary
+
+    @timed
+    def balance_report(self, properties: Optional[List[str]] = None, item_type: Optional[str] = None,
+                       mods: Optional[List[str]] = None, z_threshold: float = 3.0, output: Optional[str] = None,
+                       verbose: bool = True) -> Optional[Dict[str, Any]]:
+        """Print and return distributions, outliers and per-mod differences of numeric item properties.
+
+        Items are compared within their item type. With output the full report is written as
+        JSON, or CSV when the file name ends in .csv. Needs NumPy.
+        """
+        if np is None:
+            print("Error: the balance report needs NumPy (pip install numpy).")
+            return None
+        unknown = [mod_name for mod_name in mods or [] if mod_name not in self.registry]
+        if unknown:
+            print(f"Error: Mod(s) not registered: {', '.join(unknown)}")
+            return None
+
+        self.refresh_script_index()
+        with span("balance.load") as record:
+            definitions = self.script_index.definitions("item")
+            if mods:
+                definitions = (d for d in definitions if d["mod"] in mods)
+            columns = load_balance_columns(definitions, self.item_types, properties, item_type)
+            record.update(items=len(columns["items"]), values=len(columns["value"]))
+        started = time.perf_counter()
+        with span("balance.compute"):
+            report = compute_balance(columns, z_threshold)
+        elapsed = time.perf_counter() - started
+
+        if output:
+            try:
+                write_balance_report(report, output)
+            except OSError as e:
+                logging.error(f"Could not write balance report to {output}: {e}")
+                print(f"Error: Could not write {output}: {e}")
+                return None
+        if not verbose:
+            return report
+
+        if not report["stats"]:
+            print("No numeric item properties found.")
+            return report
+        print(f"{'Property':<18} {'Type':<12} {'Count':>7} {'Min':>9} {'P5':>9} {'P50':>9} {'P95':>9} {'Max':>9} {'Mean':>9}")
+        for row in report["stats"]:
+            print(f"{row['property'][:18]:<18} {row['type'][:12]:<12} {row['count']:>7} {row['min']:>9.4g} "
+                  f"{row['p5']:>9.4g} {row['p50']:>9.4g} {row['p95']:>9.4g} {row['max']:>9.4g} {row['mean']:>9.4g}")
+        shifted = [row for row in report["mods"] if abs(row["mean_z"] or 0) >= 1 and row["count"] > 1]
+        if len(report["mods"]) > len(report["stats"]) and shifted:
+            print("\nMods whose average is at least one standard deviation from their item type's:")
+            for row in sorted(shifted, key=lambda row: -abs(row["mean_z"]))[:20]:
+                print(f"  {row['mod']}: {row['property']} ({row['type']}) mean {row['mean']:.4g}, "
+                      f"{row['mean_z']:+.2f} std, {row['count']} items")
+        if report["outliers"]:
+            print(f"\n{len(report['outliers'])} outliers beyond {z_threshold} standard deviations:")
+            for row in report["outliers"][:20]:
+                print(f"  {row['item']} ({row['mod']}, {row['type']}): {row['property']} = {row['value']:.4g} "
+                      f"(z {row['z']:+.2f}) {row['file']}:{row['line']}")
+            if len(report["outliers"]) > 20:
+                print(f"  ... {len(report['outliers']) - 20} more" + (f" in {output}" if output else ""))
+        print(f"\n{report['items']} items, {report['values']} values analysed in {elapsed * 1000:.1f} ms")
+        if output:
+            print(f"Wrote balance report to {output}")
+        return report
+
+    @property
+    def export_state(self) -> ExportState:
+        """What the last export saw, opened on first use."""
+        if self._export_state is None:
+            self._export_state = ExportState()
+        return self._export_state
+
+    @timed
+    def export_definitions(self, output: str, fmt: Optional[str] = None, incremental: bool = False,
+                           mod_names: Optional[List[str]] = None, verbose: bool = True) -> Optional[Dict[str, int]]:
+        """Stream every definition of the registered mods (or of mod_names) to a JSON Lines or Parquet file.
+
+        Records go straight from the parse cache to the file, so memory does not grow with
+        the catalog. The format follows the extension (.jsonl, .jsonl.gz, .parquet) unless
+        fmt is given, and output '-' writes JSON Lines to stdout. With incremental only
+        definitions added, changed or removed since the last export are written.
+        """
+        fmt = fmt or ("parquet" if output.lower().endswith(".parquet") else "jsonl")
+        if fmt == "parquet" and (pa is None or output == "-"):
+            print("Error: Parquet export needs PyArrow (pip install pyarrow) and an output file.")
+            return None
+        unknown = [mod_name for mod_name in mod_names or [] if mod_name not in self.registry]
+        if unknown:
+            print(f"Error: Mod(s) not registered: {', '.join(unknown)}")
+            return None
+
+        started = time.perf_counter()
+        state = self.export_state
+        records = state.records(iter_export_files(self.registry, mod_names), self.parse_cache.get_definitions,
+                                incremental, mod_names)
+        try:
+            with span("export.write", format=fmt, incremental=incremental) as record:
+                if output == "-":
+                    write_jsonl_records(records, sys.stdout)
+                else:
+                    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+                    tmp = f"{output}.modmanager-tmp"
+                    try:
+                        if fmt == "parquet":
+                            write_parquet_records(records, tmp, incremental)
+                        else:
+                            opener = gzip.open if output.lower().endswith(".gz") else open
+                            with opener(tmp, "wt", encoding="utf-8", newline="\n") as f:
+                                write_jsonl_records(records, f)
+                        os.replace(tmp, output)
+                    except BaseException:
+                        try:
+                            os.remove(tmp)
+                        except FileNotFoundError:
+                            pass
+                        raise
+                state.commit()
+                record.update(state.stats)
+        except BaseException as e:
+            records.close()
+            state.rollback()
+            if not isinstance(e, OSError):
+                raise
+            logging.error(f"Export to '{output}' failed: {e}")
+            print(f"Export to '{output}' failed. Check logs for details.")
+            return None
+        self.parse_cache.flush()
+
+        stats = dict(state.stats)
+        elapsed = time.perf_counter() - started
+        logging.info(f"Exported {stats['records']} definitions from {stats['files']} script files to {output} "
+                     f"in {elapsed:.2f}s ({stats})")
+        if verbose and output != "-":
+            changes = (f" ({stats['added']} added, {stats['changed']} changed, {stats['removed']} removed)"
+                       if incremental else "")
+            print(f"Exported {stats['records']} definitions{changes} from {stats['files']} script files "
+                  f"({stats['files'] - stats['read']} unchanged and skipped) to {output} in {elapsed:.2f}s")
+        return stats
+
+    @timed
+    def report_duplicates(self, kind: Optional[str] = None) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        """Print and return definitions that are defined more than once across the registered mods."""
+        self.refresh_script_index()
+        duplicates = self.script_index.duplicates(kind)
+        if not duplicates:
+            print("No duplicate definitions found.")
+        for (def_kind, name), definitions in sorted(duplicates.items()):
+            print(f"{def_kind} {name} is defined {len(definitions)} times:")
+            for definition in definitions:
+                print(f"  - {definition['mod']}: {definition['file']}:{definition['line']}")
+        return duplicates
+
+    def conflict_sources(self) -> Dict[str, Tuple[str, bool]]:
+        """Return {mod name: (folder, installed only)} for every registered mod and every mod in the mods folder.
+
+        Registered mods are read from their source folder; installed mods that are not
+        registered are read from their installed copy.
+        """
+        sources = {}
+        for mod_name, mod_data in self.registry.items():
+            mod_path = mod_data.get("mod_path")
+            if mod_path and os.path.isdir(mod_path):
+                sources[mod_name] = (mod_path, False)
+        try:
+            entries = sorted(os.scandir(self.mods_dir), key=lambda entry: entry.name)
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            if entry.is_dir() and entry.name not in sources:
+                sources[entry.name] = (entry.path, True)
+        return sources
+
+    def _scan_for_conflicts(self, mod_name: str, mod_path: str,
+                            installed: bool) -> Tuple[Dict[str, Tuple[int, int]], List[Dict[str, Any]], Dict[str, Any]]:
+        """Scan one mod's media folder once for its files, definitions and manifest hashes."""
+        media_dir = os.path.join(mod_path, "media")
+        files, _ = scan_tree(media_dir)
+        files = {f"media/{rel}": stat for rel, stat in files.items()}
+        definitions = []
+        for rel in sorted(files):
+            if rel.startswith("media/scripts/") and rel.lower().endswith(".txt"):
+                path = os.path.join(mod_path, *rel.split("/"))
+                try:
+                    definitions.extend(self.parse_cache.get_definitions(path, *files[rel]))
+                except OSError as e:
+                    logging.error(f"Could not parse script file {path}: {e}")
+        for definition in definitions:
+            definition["mod"] = mod_name
+        known = manifest_hashes(mod_path if installed else os.path.join(self.mods_dir, mod_name), installed)
+        return files, definitions, known
+
+    @timed
+    def find_conflicts(self, workers: int = 8, show_identical: bool = False, as_json: bool = False,
+                       verbose: bool = True) -> Dict[str, Any]:
+        """Find files and definitions that more than one registered or installed mod provides.
+
+        Every mod is scanned once, in parallel, into a path index and a definition-name index.
+        Overlapping files are compared by content hash so identical copies are told apart from
+        real conflicts; only files whose size matches another copy are hashed, and hashes are
+        taken from install manifests or the parse cache whenever size and mtime are unchanged.
+        """
+        started = time.perf_counter()
+        sources = self.conflict_sources()
+        paths: Dict[str, List[Tuple[str, int, int]]] = {}
+        names: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        known: Dict[str, Dict[str, Tuple[int, int, str]]] = {}
+        with span("conflicts.scan", mods=len(sources)) as record:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(sources) or 1))) as pool:
+                scans = pool.map(lambda item: (item[0],) + self._scan_for_conflicts(item[0], *item[1]),
+                                 sources.items())
+                for mod_name, files, definitions, mod_known in scans:
+                    known[mod_name] = mod_known
+                    for rel, (size, mtime) in files.items():
+                        paths.setdefault(rel, []).append((mod_name, size, mtime))
+                    for definition in definitions:
+                        name = f"{definition['module']}.{definition['name']}" if definition.get("module") \
+                            else definition["name"]
+                        names.setdefault((definition["kind"], name), []).append(definition)
+            self.parse_cache.flush()
+            record.update(files=len(paths), definitions=len(names))
+
+        overlapping = {rel: copies for rel, copies in paths.items() if len(copies) > 1}
+        digests: Dict[Tuple[str, str], str] = {}
+        with span("conflicts.hash") as record:
+            to_hash = []
+            for rel, copies in overlapping.items():
+                sizes = [size for _, size, _ in copies]
+                for mod_name, size, mtime in copies:
+                    if sizes.count(size) < 2:
+                        continue
+                    entry = known[mod_name].get(rel)
+                    if entry is not None and entry[0] == size and entry[1] == mtime:
+                        digests[(mod_name, rel)] = entry[2]
+                    else:
+                        to_hash.append((mod_name, rel, size, mtime))
+            by_path = {}
+            for mod_name, rel, size, mtime in to_hash:
+                by_path[os.path.join(sources[mod_name][0], *rel.split("/"))] = (mod_name, rel, size, mtime)
+            misses = self.parse_cache.misses
+            hashed = self.parse_cache.get_hashes([(path, size, mtime) for path, (_, _, size, mtime)
+                                                  in by_path.items()], workers)
+            for path, digest in hashed.items():
+                digests[by_path[path][:2]] = digest
+            read = self.parse_cache.misses - misses
+            record.update(manifest=len(digests) - len(hashed), cached=len(hashed) - read, read=read)
+
+        report: Dict[str, Any] = {
+            "mods": {mod_name: {"path": path, "installed_only": installed}
+                     for mod_name, (path, installed) in sources.items()},
+            "files": [], "identical_files": [], "definitions": [], "identical_definitions": [],
+        }
+        for rel in sorted(overlapping):
+            groups: Dict[Any, List[str]] = {}
+            for mod_name, size, _ in overlapping[rel]:
+                # a file that could not be hashed is only equal to itself
+                content = digests.get((mod_name, rel), (mod_name, size))
+                groups.setdefault(content, []).append(mod_name)
+            entry = {"path": rel, "mods": sorted(mod for mods in groups.values() for mod in mods),
+                     "groups": sorted(sorted(mods) for mods in groups.values())}
+            report["files" if len(groups) > 1 else "identical_files"].append(entry)
+        for (kind, name) in sorted(names):
+            definitions = names[(kind, name)]
+            if len({definition["mod"] for definition in definitions}) < 2:
+                continue
+            # definitions with equal properties and ingredients share a variant number
+            variants: List[Tuple[Any, Any]] = []
+            locations = []
+            for definition in definitions:
+                body = (definition["properties"], definition.get("ingredients"))
+                try:
+                    variant = variants.index(body)
+                except ValueError:
+                    variant = len(variants)
+                    variants.append(body)
+                locations.append({"mod": definition["mod"], "file": definition["file"], "line": definition["line"],
+                                  "variant": variant})
+            entry = {"kind": kind, "name": name, "locations": locations}
+            report["definitions" if len(variants) > 1 else "identical_definitions"].append(entry)
+        elapsed = time.perf_counter() - started
+        logging.info(f"Checked {len(sources)} mods for conflicts in {elapsed:.2f}s: {len(report['files'])} files, "
+                     f"{len(report['definitions'])} definitions")
+
+        if as_json:
+            print(json.dumps(report, indent=2))
+            return report
+        if not verbose:
+            return report
+        for entry in report["files"]:
+            print(f"File {entry['path']} differs between: {' | '.join(', '.join(mods) for mods in entry['groups'])}")
+        if show_identical:
+            for entry in report["identical_files"]:
+                print(f"File {entry['path']} is identical in: {', '.join(entry['mods'])}")
+        sections = [("differs between", report["definitions"])]
+        if show_identical:
+            sections.append(("is identical in", report["identical_definitions"]))
+        for verb, entries in sections:
+            for entry in entries:
+                print(f"{entry['kind']} {entry['name']} {verb}:")
+                for location in entry["locations"]:
+                    print(f"  - [{location['variant'] + 1}] {location['mod']}: {location['file']}:{location['line']}")
+        print(f"Scanned {len(sources)} mods in {elapsed:.2f}s: {len(report['files'])} conflicting files "
+              f"({len(report['identical_files'])} identical copies), {len(report['definitions'])} conflicting "
+              f"definitions ({len(report['identical_definitions'])} identical)")
+        return report
+
+    def _build_import_block(self, row: Dict[str, Any], default_mod: Optional[str]) -> Tuple[str, str, str]:
+        """Validate one import row and return its (target file, module header, block)."""
+        kind = str(row.get("kind", "item")).strip().lower()
+        mod_name = str(row.get("mod") or default_mod or "").strip()
+        name = str(row.get("name", "")).strip()
+        def_type = str(row.get("type", "")).strip()
+
+        if not mod_name:
+            raise ValueError("No mod given and no default mod set")
+        if mod_name not in self.registry:
+            raise ValueError(f"Mod '{mod_name}' is not registered")
+        if not name or any(c.isspace() for c in name):
+            raise ValueError(f"Invalid name '{name}'")
+        scripts_dir = os.path.join(self.registry[mod_name]["mod_path"], "media", "scripts")
+
+        if kind == "item":
+            if def_type not in self.item_types:
+                raise ValueError(f"Invalid item type '{def_type}'")
+            properties = {k: v for k, v in row.items() if k not in IMPORT_ITEM_FIELDS}
+            extra = row.get("properties") or {}
+            if isinstance(extra, str):
+                # CSV cells are always text; the column holds a JSON object such as {"Weight": "2.5"}
+                try:
+                    extra = json.loads(extra)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"properties is not valid JSON: {e}")
+            if not isinstance(extra, dict):
+                raise ValueError("properties must be an object")
+            properties.update(extra)
+            item_file = os.path.join(scripts_dir, f"items_{def_type}.txt")
+            return item_file, item_file_header(mod_name), format_item_block(name, properties)
+
+        if kind == "recipe":
+            if def_type not in RECIPE_TYPES:
+                raise ValueError(f"Invalid recipe type '{def_type}'")
+            result_item = str(row.get("result", "")).strip()
+            if not result_item:
+                raise ValueError("Recipe has no result item")
+            ingredients = _parse_ingredients(row.get("ingredients", ""))
+            if not ingredients:
+                raise ValueError("At least one ingredient is required")
+            try:
+                result_count = int(row.get("result_count", 1))
+                recipe_time = int(row.get("time", 100))
+                skill_level = str(int(row.get("skill_level", 0)))
+            except (TypeError, ValueError):
+                raise ValueError("result_count, time and skill_level must be integers")
+            skill_type = str(row.get("skill", "")).strip()
+            recipe_file = os.path.join(scripts_dir, f"{mod_name}_Recipes.txt")
+            block = format_recipe_block(name, def_type, result_item, result_count, recipe_time,
+                                        ingredients, skill_type, skill_level)
+            return recipe_file, base_file_header(), block
+
+        raise ValueError(f"Unknown kind '{kind}', expected item or recipe")
+
+    @timed
+    def import_definitions(self, source_path: str, default_mod: Optional[str] = None,
+                           verbose: bool = True) -> Dict[str, Any]:
+        """Bulk import items and recipes from a CSV or JSONL file.
+
+        Rows are validated and grouped by target script file, then each file is written once.
+        Invalid rows are reported and skipped without aborting the batch.
+        """
+        pending: Dict[str, Tuple[str, List[str]]] = {}
+        errors: List[Tuple[int, str]] = []
+        rows = 0
+        start = time.perf_counter()
+
+        try:
+            with span("import.parse") as record:
+                for line_no, row, error in iter_import_rows(source_path):
+                    rows += 1
+                    if error:
+                        errors.append((line_no, error))
+                        continue
+                    try:
+                        target, header, block = self._build_import_block(row, default_mod)
+                    except ValueError as e:
+                        errors.append((line_no, str(e)))
+                        continue
+                    pending.setdefault(target, (header, []))[1].append(block)
+                record["rows"] = rows
+        except (OSError, ValueError) as e:
+            logging.error(f"Import from '{source_path}' failed: {e}")
+            print(f"Error: {e}")
+            return {"rows": rows, "imported": 0, "errors": errors, "files": {}}
+
+        files = {}
+        try:
+            with self.script_writer.deferred():
+                for target, (header, blocks) in pending.items():
+                    message = f"Wrote {len(blocks)} definitions to {target}" if verbose else None
+                    for block in blocks:
+                        self.script_writer.add(target, block, header, message)
+                        message = None
+                    files[target] = len(blocks)
+        except (OSError, ValueError) as e:
+            logging.error(f"Import from '{source_path}' failed to write script files: {e}")
+            # line 0: the failure belongs to no single row
+            errors.append((0, f"Could not write script files: {e}"))
+
+        errors.sort()
+        imported = sum(files.values())
+        elapsed = time.perf_counter() - start
+        logging.info(f"Imported {imported}/{rows} rows from {source_path} into {len(files)} files in {elapsed:.2f}s")
+
+        if verbose:
+            for line_no, message in errors:
+                print(f"Line {line_no}: {message}" if line_no else f"Error: {message}")
+            print(f"Imported {imported} of {rows} rows ({len(errors)} errors) in {elapsed:.2f}s")
+
+        return {"rows": rows, "imported": imported, "errors": errors, "files": files}
+
+
+def benchmark_import(row_counts=(10_000, 100_000), manager: Optional[ModManager] = None) -> List[Dict[str, Any]]:
+    """Measure import_definitions throughput on synthetic CSV files in a temp directory."""
+    results = []
+    manager = manager or ModManager()
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in row_counts:
+            mod_path = os.path.join(tmp, f"BenchMod{count}")
+            manager.registry = {"BenchMod": {"mod_path": mod_path}}
+            source = os.path.join(tmp, f"rows_{count}.csv")
+            with open(source, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["kind", "mod", "type", "name", "result", "ingredients", "Weight"])
+                for i in range(count):
+                    if i % 4 == 3:
+                        writer.writerow(["recipe", "BenchMod", "Crafting", f"MakeItem{i}", f"Item{i - 1}",
+                                         f"Item{i - 2}:2,Item{i - 3}:1", ""])
+                    else:
+                        writer.writerow(["item", "BenchMod", manager.item_types[i % 4], f"Item{i}", "", "", "0.5"])
+
+            start = time.perf_counter()
+            summary = manager.import_definitions(source, verbose=False)
+            elapsed = time.perf_counter() - start
+            results.append({
+                "rows": count,
+                "imported": summary["imported"],
+                "files": len(summary["files"]),
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(count / elapsed) if elapsed else None,
+            })
+    for result in results:
+        print(f"{result['rows']} rows: {result['seconds']}s ({result['rows_per_second']} rows/s)")
+    return results
+
+
+def benchmark_scan(manager: Optional[ModManager] = None) -> Dict[str, Any]:
+    """Time a cold scan (empty parse cache) against a warm scan of every registered mod."""
+    manager = manager or ModManager()
+    with tempfile.TemporaryDirectory() as tmp:
+        manager._parse_cache = ParseCache(os.path.join(tmp, "parse_cache.db"))
+        start = time.perf_counter()
+        index = manager.build_script_index()
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        manager.build_script_index()
+        warm = time.perf_counter() - start
+        manager._parse_cache.conn.close()
+        manager._parse_cache = None
+
+    result = {"mods": len(manager.registry), "files": len(index.files), "definitions": len(index),
+              "cold_seconds": round(cold, 3), "warm_seconds": round(warm, 3)}
+    print(f"{result['definitions']} definitions in {result['files']} files: "
+          f"cold {result['cold_seconds']}s, warm {result['warm_seconds']}s")
+    return result
+
+
+HELP_TEXT = """Project Zomboid Mod Manager
+----------------------------
+Commands:
+  create      - Create a new mod
+  scaffold    - Create and register many mods at once from a JSON or TOML manifest
+  register    - Register an existing mod from somewhere else into the registry
+  flush       - Deletes all mods within the registry
+  item        - Create a new item for a mod
+  recipe      - Create a new recipe for a mod
+  import      - Bulk import items and recipes from a CSV or JSONL file
+  model       - Create a new model for a mod
+  sound       - Create a new sound for a mod
+  sounds      - Add every .ogg/.wav file in a folder to a mod as sounds
+  list        - List all registered mods
+  install     - Install a registered mod (install --dry-run shows the changes only)
+  install --all - Install every registered mod in parallel
+  install --from-archive - Install a mod from an archive made by pack
+  install --dedupe - Install, sharing identical assets between mods through hardlinks
+  install --check-lua - Check the mod's Lua files first and stop the install on errors
+  gc          - Delete unused files from the shared asset store and show the space saved
+  snapshot    - Snapshot a mod folder, sharing unchanged files (snapshot --list shows them)
+  rollback    - Put a mod folder back the way a snapshot recorded it
+  pack        - Pack a mod into a reproducible .zip archive
+  watch       - Keep an installed mod in sync while you edit it (Ctrl+C to stop)
+  delete      - Remove a mod from registry
+  luacheck    - Check the .lua files of mods for missing 'end's, unbalanced brackets and unfinished strings
+  validate    - Check all mod paths (validate --deep [--json] checks mod contents)
+  find        - Find which mod defines an item, recipe, model or sound
+  search      - Search definitions by name, property and ingredient (search axe* Weight>2 --kind item)
+  duplicates  - List definitions that are defined more than once
+  export      - Stream every definition to a JSON Lines or Parquet file (export --incremental: only changes)
+  conflicts   - List files and definitions that several registered or installed mods provide
+  balance     - Show percentiles, outliers and per-mod differences of numeric item properties (needs NumPy)
+  recipes     - Check recipe ingredients and results against defined items
+  serve       - Run as a background daemon (command line only, see below)
+  bench       - Time the main operations on synthetic mods in temp folders (JSON report)
+  stats       - Show how long operations took recently (stats --window 1h --op install_mod)
+  exit        - Quit the program
+  help        - Show this help message
+
+Every command can also be run directly, e.g. 'modmanager.py item MyMod Food Apple Calories=50',
+and 'modmanager.py --batch commands.txt' runs one such command per line in a single process.
+'modmanager.py serve' keeps a daemon running on a Unix socket; add --remote to any command
+to run it through the daemon instead of starting from scratch.
+"""
+
+
+def display_help():
+    """Display help information."""
+    print(HELP_TEXT)
+
+
+def _key_value(pair: str) -> Tuple[str, str]:
+    """argparse type for a 'key=value' command line argument."""
+    key, sep, value = pair.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected key=value, got '{pair}'")
+    return key, value
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for non-interactive use."""
+    parser = argparse.ArgumentParser(prog="modmanager.py", description="Project Zomboid Mod Manager")
+    parser.add_argument("--batch", metavar="FILE", help="run one command per line from FILE")
+    parser.add_argument("--remote", action="store_true", help="send the command to a running daemon")
+    parser.add_argument("--socket", default=DAEMON_SOCKET, help="daemon socket path")
+    commands = parser.add_subparsers(dest="command")
+
+    create = commands.add_parser("create", help="create a new mod")
+    create.add_argument("mod_name")
+    create.add_argument("mod_path")
+    create.add_argument("--types", nargs="*", default=[], help=f"mod types: {', '.join(MOD_TYPES)}")
+
+    scaffold = commands.add_parser("scaffold", help="create many mods from a JSON or TOML manifest")
+    scaffold.add_argument("manifest")
+    scaffold.add_argument("--workers", type=int, default=8)
+    scaffold.add_argument("--dry-run", action="store_true", help="only list the mods that would be created")
+
+    register = commands.add_parser("register", help="register an existing mod")
+    register.add_argument("mod_name")
+    register.add_argument("mod_path")
+
+    item = commands.add_parser("item", help="create a new item")
+    item.add_argument("mod_name")
+    item.add_argument("item_type")
+    item.add_argument("item_name")
+    item.add_argument("properties", nargs="*", type=_key_value, help="extra Key=Value properties")
+
+    recipe = commands.add_parser("recipe", help="create a new recipe")
+    recipe.add_argument("mod_name")
+    recipe.add_argument("recipe_name")
+    recipe.add_argument("recipe_type", choices=RECIPE_TYPES)
+    recipe.add_argument("result_item")
+    recipe.add_argument("--ingredient", action="append", required=True, help="name:count, repeatable")
+    recipe.add_argument("--count", type=int, default=1, help="number of result items")
+    recipe.add_argument("--time", type=int, default=100)
+    recipe.add_argument("--skill", default="")
+    recipe.add_argument("--skill-level", type=int, default=0)
+
+    import_cmd = commands.add_parser("import", help="bulk import items and recipes from CSV or JSONL")
+    import_cmd.add_argument("source_path")
+    import_cmd.add_argument("--mod", help="default mod for rows without a mod column")
+
+    model = commands.add_parser("model", help="create a new model")
+    model.add_argument("mod_name")
+    model.add_argument("model_name")
+
+    sound = commands.add_parser("sound", help="create a new sound")
+    sound.add_argument("mod_name")
+    sound.add_argument("sound_type")
+    sound.add_argument("sound_name")
+    sound.add_argument("properties", nargs="*", type=_key_value,
+                       help="extra key=value properties, e.g. volume=0.5")
+
+    sounds = commands.add_parser("sounds", help="add every .ogg/.wav file in a folder as sounds")
+    sounds.add_argument("mod_name")
+    sounds.add_argument("source_dir")
+    sounds.add_argument("--type", default="General", help="sound type for files not in a subfolder")
+    sounds.add_argument("--sidecar", help="CSV/JSONL with per-file overrides (default: sounds.csv in the folder)")
+    sounds.add_argument("--workers", type=int, default=8)
+
+    commands.add_parser("list", help="list registered mods")
+    commands.add_parser("itemtypes", help="list item types")
+
+    install = commands.add_parser("install", help="install registered mods")
+    install.add_argument("mod_names", nargs="*")
+    install.add_argument("--all", action="store_true", help="install every registered mod")
+    install.add_argument("--dry-run", action="store_true", help="only print what would change")
+    install.add_argument("--workers", type=int, default=4)
+    install.add_argument("--from-archive", metavar="ARCHIVE", help="install from an archive made by pack")
+    install.add_argument("--dedupe", action="store_true",
+                         help=f"link identical assets from a shared store (or set {ASSET_STORE_ENV})")
+    install.add_argument("--check-lua", action="store_true",
+                         help=f"stop if the mod's Lua files have syntax errors (or set {LUA_CHECK_ENV}=1)")
+
+    luacheck = commands.add_parser("luacheck", help="check .lua files for unbalanced blocks, brackets and strings")
+    luacheck.add_argument("mod_names", nargs="*", help="mods to check (default: all registered mods)")
+    luacheck.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+
+    gc = commands.add_parser("gc", help="delete unused blobs from the shared asset store")
+    gc.add_argument("--dry-run", action="store_true", help="only report what would be deleted")
+
+    snapshot = commands.add_parser("snapshot", help="snapshot a mod folder, sharing unchanged files with the last snapshot")
+    snapshot.add_argument("mod_name")
+    snapshot.add_argument("--installed", action="store_true", help="snapshot the installed copy, not the source")
+    snapshot.add_argument("--list", action="store_true", help="list the mod's snapshots instead")
+    snapshot.add_argument("--prune", type=int, metavar="KEEP", help="delete all but the newest KEEP snapshots instead")
+
+    rollback = commands.add_parser("rollback", help="restore a mod folder from a snapshot")
+    rollback.add_argument("mod_name")
+    rollback.add_argument("snapshot_id", type=int)
+
+    pack = commands.add_parser("pack", help="pack a mod into a reproducible zip archive")
+    pack.add_argument("mod_name")
+    pack.add_argument("--output", "-o", help="archive path (default: <mod>.zip)")
+    pack.add_argument("--workers", type=int, default=4, help="threads compressing large files")
+    pack.add_argument("--level", type=int, default=6, choices=range(0, 10), metavar="0-9")
+
+    watch = commands.add_parser("watch", help="live-sync a mod into the mods folder while it is edited")
+    watch.add_argument("mod_name")
+    watch.add_argument("--interval", type=float, default=0.25, help="seconds between scans")
+    watch.add_argument("--debounce", type=float, default=0.2, help="quiet seconds before syncing")
+
+    delete = commands.add_parser("delete", help="remove a mod from the registry")
+    delete.add_argument("mod_name")
+
+    commands.add_parser("flush", help="remove every mod from the registry")
+
+    validate = commands.add_parser("validate", help="check registered mods")
+    validate.add_argument("--deep", action="store_true")
+    validate.add_argument("--json", action="store_true")
+
+    find = commands.add_parser("find", help="find where a definition is defined")
+    find.add_argument("name")
+    find.add_argument("--kind")
+
+    search = commands.add_parser("search", help="search definitions by name, property and ingredient")
+    search.add_argument("query", nargs="*", help="terms (axe, axe*, *axe*, axe~, DisplayName:axe) "
+                                                  "and filters (Weight>2, Type=Food)")
+    search.add_argument("--kind")
+    search.add_argument("--mod")
+    search.add_argument("--fuzzy", action="store_true", help="allow small typos in every term")
+    search.add_argument("--limit", type=int, default=50)
+    search.add_argument("--json", action="store_true")
+    search.add_argument("--rebuild", action="store_true", help="re-index every script file first")
+
+    commands.add_parser("duplicates", help="list definitions defined more than once")
+    export = commands.add_parser("export", help="stream every definition to a JSON Lines or Parquet file")
+    export.add_argument("output", help="output file (.jsonl, .jsonl.gz or .parquet), or - for stdout")
+    export.add_argument("--format", choices=["jsonl", "parquet"], help="default: from the file extension")
+    export.add_argument("--incremental", action="store_true",
+                        help="only definitions added, changed or removed since the last export")
+    export.add_argument("--mod", nargs="+", help="only these mods")
+    conflicts = commands.add_parser("conflicts", help="files and definitions provided by more than one mod")
+    conflicts.add_argument("--all", action="store_true", help="also list identical copies")
+    conflicts.add_argument("--json", action="store_true", help="print the full report as JSON")
+    conflicts.add_argument("--workers", type=int, default=8, help="mods scanned and files hashed in parallel")
+
+    balance = commands.add_parser("balance", help="percentiles, outliers and per-mod differences of item properties")
+    balance.add_argument("--property", nargs="+", help="only these properties (default: every numeric one)")
+    balance.add_argument("--type", help="only this item type")
+    balance.add_argument("--mod", nargs="+", help="only these mods")
+    balance.add_argument("--z", type=float, default=3.0, help="z-score beyond which a value is an outlier")
+    balance.add_argument("-o", "--output", help="write the full report to a .json or .csv file")
+    commands.add_parser("recipes", help="check recipes against defined items")
+    commands.add_parser("serve", help="run as a daemon answering JSON-RPC requests on --socket")
+    bench = commands.add_parser("bench", help="benchmark operations on synthetic mods in temp folders")
+    bench.add_argument("--scale", nargs="+", choices=list(BENCH_SCALES), default=["small"])
+    bench.add_argument("--output", "-o", help="write the JSON report to a file instead of stdout")
+    bench.add_argument("--compare", metavar="BASELINE", help="compare with an earlier JSON report")
+    bench.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    bench.add_argument("--no-daemon", action="store_true", help="skip the daemon latency benchmark")
+
+    stats = commands.add_parser("stats", help="show timing percentiles per operation from the span log")
+    stats.add_argument("--window", default="24h", help="how far back to look, e.g. 30m, 12h, 7d")
+    stats.add_argument("--op", help="only this operation or path prefix, e.g. install_mod")
+    stats.add_argument("--json", action="store_true")
+
+    commands.add_parser("help", help="show the command list")
+    return parser
+
+
+def _run_install(manager: "ModManager", args: argparse.Namespace) -> int:
+    """Run the install command and return its exit status."""
+    if args.from_archive:
+        return 0 if manager.install_from_archive(args.from_archive, dry_run=args.dry_run) else 1
+    if args.all or len(args.mod_names) > 1:
+        summary = manager.install_mods(None if args.all else args.mod_names, args.workers, args.dry_run)
+        return 1 if summary["failed"] else 0
+    if not args.mod_names:
+        print("Error: Give a mod name or --all.")
+        return 2
+    return 0 if manager.install_mod(args.mod_names[0], dry_run=args.dry_run) else 1
+
+
+def run_command(manager: "ModManager", args: argparse.Namespace) -> int:
+    """Run one parsed command and return its exit status.
+
+    Script file edits made by the command are buffered and each file is written once at the end.
+    """
+    status = None
+    try:
+        with manager.script_writer.deferred():
+            status = _dispatch_command(manager, args)
+    except (OSError, ValueError) as e:
+        if status is None:
+            raise
+        print(f"Error: could not write script files: {e}")
+        return 1
+    return status
+
+
+def _dispatch_command(manager: "ModManager", args: argparse.Namespace) -> int:
+    """Call the manager method for one parsed command."""
+    command = args.command
+    if command == "create":
+        return 0 if manager.create_mod(args.mod_name, args.mod_path, args.types) else 1
+    elif command == "scaffold":
+        summary = manager.scaffold_mods(args.manifest, args.workers, args.dry_run)
+        return 1 if summary["errors"] else 0
+    elif command == "register":
+        return 0 if manager.register_mod(args.mod_name, args.mod_path) else 1
+    elif command == "item":
+        created = manager.create_item(args.mod_name, args.item_type, args.item_name, **dict(args.properties))
+        return 0 if created else 1
+    elif command == "recipe":
+        created = manager.create_recipe(args.mod_name, args.recipe_name, args.recipe_type, args.result_item,
+                                        ingredients=args.ingredient, result_count=args.count,
+                                        recipe_time=args.time, skill_type=args.skill,
+                                        skill_level=str(args.skill_level))
+        return 0 if created else 1
+    elif command == "import":
+        summary = manager.import_definitions(args.source_path, args.mod)
+        return 1 if summary["errors"] else 0
+    elif command == "model":
+        return 0 if manager.create_model(args.mod_name, args.model_name) else 1
+    elif command == "sound":
+        created = manager.create_sound(args.mod_name, args.sound_type, args.sound_name,
+                                       **dict(args.properties))
+        return 0 if created else 1
+    elif command == "sounds":
+        summary = manager.ingest_sounds(args.mod_name, args.source_dir, args.type, args.sidecar, args.workers)
+        return 1 if summary["errors"] or not summary["sounds"] else 0
+    elif command == "list":
+        manager.list_mods()
+    elif command == "itemtypes":
+        manager.list_item_types()
+    elif command == "install":
+        # --dedupe and --check-lua apply to this command only, so a daemon or batch keeps its settings
+        use_asset_store, check_lua = manager.use_asset_store, manager.check_lua_on_install
+        manager.use_asset_store = use_asset_store or args.dedupe
+        manager.check_lua_on_install = check_lua or args.check_lua
+        try:
+            return _run_install(manager, args)
+        finally:
+            manager.use_asset_store, manager.check_lua_on_install = use_asset_store, check_lua
+    elif command == "luacheck":
+        summary = manager.check_lua(args.mod_names, args.workers)
+        return 1 if summary["errors"] or summary["unreadable"] else 0
+    elif command == "stats":
+        try:
+            print_span_stats(args.window, args.op, args.json)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 2
+    elif command == "bench":
+        return run_bench_command(args)
+    elif command == "gc":
+        manager.gc_asset_store(dry_run=args.dry_run)
+    elif command == "snapshot":
+        if args.list:
+            manager.list_snapshots(args.mod_name)
+        elif args.prune is not None:
+            manager.prune_snapshots(args.mod_name, args.prune)
+        else:
+            return 0 if manager.snapshot_mod(args.mod_name, args.installed) else 1
+    elif command == "rollback":
+        return 0 if manager.rollback_mod(args.mod_name, args.snapshot_id) else 1
+    elif command == "pack":
+        return 0 if manager.pack_mod(args.mod_name, args.output, args.workers, args.level) else 1
+    elif command == "watch":
+        manager.watch_mod(args.mod_name, args.interval, args.debounce)
+    elif command == "delete":
+        return 0 if manager.delete_mod(args.mod_name) else 1
+    elif command == "flush":
+        manager.flush_registry()
+    elif command == "validate":
+        results = manager.validate_mod_paths(deep=args.deep or args.json, as_json=args.json)
+        return 1 if results and any(result["errors"] for result in results) else 0
+    elif command == "find":
+        return 0 if manager.find_definition(args.name, args.kind) else 1
+    elif command == "search":
+        return 0 if manager.search_definitions(args.query, args.kind, args.mod, args.fuzzy, args.limit,
+                                               args.json, args.rebuild) else 1
+    elif command == "balance":
+        report = manager.balance_report(args.property, args.type, args.mod, args.z, args.output)
+        return 0 if report is not None else 1
+    elif command == "duplicates":
+        return 1 if manager.report_duplicates() else 0
+    elif command == "export":
+        stats = manager.export_definitions(args.output, args.format, args.incremental, args.mod)
+        return 0 if stats is not None else 1
+    elif command == "conflicts":
+        report = manager.find_conflicts(args.workers, args.all, args.json)
+        return 1 if report["files"] or report["definitions"] else 0
+    elif command == "recipes":
+        report = manager.check_recipes()
+        return 1 if report["unknown_ingredients"] or report["unknown_results"] else 0
+    else:
+        display_help()
+    return 0
+
+
+def run_bench_command(args: argparse.Namespace) -> int:
+    """Run the bench command; returns 1 when --compare finds a regression."""
+    report = run_benchmarks(args.scale, include_daemon=not args.no_daemon)
+    if args.output:
+        atomic_write_json(args.output, report, indent=2)
+        print(f"Wrote benchmark report to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_benchmarks(baseline, report, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+# Batch commands that only queue script blocks; consecutive lines of these share one write
+BATCH_DEFERRED_COMMANDS = ("item", "recipe", "model", "sound")
+
+
+def run_batch(manager: "ModManager", batch_file: str, parser: argparse.ArgumentParser) -> int:
+    """Run every command line in a batch file with one manager; '#' starts a comment."""
+    failures = None
+    with open(batch_file, "r", encoding="utf-8") as f:
+        try:
+            # a run of generator lines writes each script file it touches once
+            with manager.script_writer.deferred():
+                failures = _run_batch_lines(manager, f, parser)
+        except (OSError, ValueError) as e:
+            if failures is None:
+                raise
+            print(f"Error: could not write script files: {e}")
+            failures += 1
+    if failures:
+        print(f"{failures} batch command(s) failed.")
+    return 1 if failures else 0
+
+
+def _run_batch_lines(manager: "ModManager", lines, parser: argparse.ArgumentParser) -> int:
+    """Run batch file lines and return the number of failed commands."""
+    failures = 0
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            args = parser.parse_args(shlex.split(line))
+            if args.batch or not args.command:
+                raise ValueError("expected a command")
+            if args.command not in BATCH_DEFERRED_COMMANDS:
+                # this command may read the mod files, so write what earlier lines queued first
+                failures += _flush_batch_writes(manager)
+            status = run_command(manager, args)
+        except SystemExit as e:
+            # argparse already printed the usage error
+            status = e.code if isinstance(e.code, int) else 2
+        except Exception as e:
+            logging.error(f"Batch line {line_no} failed: {e}")
+            print(f"Error on line {line_no}: {e}")
+            status = 1
+        if status:
+            failures += 1
+            print(f"Line {line_no} failed: {line}")
+    return failures
+
+
+def _flush_batch_writes(manager: "ModManager") -> int:
+    """Write the script blocks queued by earlier batch lines; returns 1 when a file could not be written."""
+    try:
+        manager.script_writer.flush()
+    except (OSError, ValueError) as e:
+        print(f"Error: could not write script files: {e}")
+        return 1
+    return 0
+
+
+# Command arguments holding paths, which the daemon resolves against the client's working directory
+DAEMON_PATH_ARGS = {
+    "create": ("mod_path",),
+    "register": ("mod_path",),
+    "scaffold": ("manifest",),
+    "import": ("source_path",),
+    "sounds": ("source_dir", "sidecar"),
+    "install": ("from_archive",),
+    "pack": ("output",),
+    "export": ("output",),
+    "balance": ("output",),
+}
+
+
+def _resolve_client_paths(args: argparse.Namespace, cwd: str) -> None:
+    """Make the path arguments of a daemon command absolute against the client's cwd."""
+    for name in DAEMON_PATH_ARGS.get(args.command, ()):
+        value = getattr(args, name, None)
+        # '-' is stdout for export
+        if value and value != "-":
+            setattr(args, name, os.path.join(cwd, value))
+    if args.command == "pack" and not args.output:
+        args.output = os.path.join(cwd, f"{args.mod_name}.zip")
+
+
+class _ThreadLocalStdout:
+    """sys.stdout replacement that lets each daemon request thread capture its own print output.
+
+    While a command runs, shared is its buffer too, so threads the command starts (such as
+    the install --all pool) are captured with it.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        self.shared: Optional[io.StringIO] = None
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            buffer = self.shared
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+
+class ModManagerDaemon:
+    """JSON-RPC 2.0 server over a Unix domain socket, one JSON object per line.
+
+    Keeps one ModManager (registry, parse cache, script index and recipe graph) in memory.
+    Clients are served on their own threads; commands run one at a time because they share
+    that state. The registry is reloaded whenever it changes on disk.
+
+    Methods:
+      ping                      -> "pong"
+      command  {"argv": [...], "cwd"} -> {"status": int, "output": str}, same arguments as the CLI;
+                                paths in argv are relative to cwd when it is given
+      find     {"name", "kind"} -> list of definitions
+      shutdown                  -> stops the server
+    """
+
+    def __init__(self, manager: "ModManager", socket_path: str = DAEMON_SOCKET):
+        self.manager = manager
+        self.socket_path = socket_path
+        self.parser = build_parser()
+        self.lock = threading.Lock()
+        self.server: Optional[socketserver.UnixStreamServer] = None
+        self.ready = threading.Event()  # set once the socket is listening
+
+    def dispatch(self, request: Any) -> Optional[Dict[str, Any]]:
+        """Handle one decoded JSON-RPC request and return the response (None for notifications)."""
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params") or {}
+        try:
+            if method == "ping":
+                result: Any = "pong"
+            elif method == "command":
+                result = self._run_command(list(params.get("argv", [])), params.get("cwd"))
+            elif method == "find":
+                with self.lock:
+                    self.manager.reload_registry_if_changed()
+                    self.manager.refresh_script_index()
+                    result = self.manager.script_index.find(params.get("name", ""), params.get("kind"))
+            elif method == "shutdown":
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                result = "shutting down"
+            else:
+                return {"jsonrpc": "2.0", "id": request_id,
+                        "error": {"code": -32601, "message": f"Method not found: {method}"}}
+        except Exception as e:
+            logging.error(f"Daemon request {method} failed: {e}")
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32603, "message": str(e)}}
+        if "id" not in request:
+            return None
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def _run_command(self, argv: List[str], cwd: Optional[str] = None) -> Dict[str, Any]:
+        """Run CLI arguments against the resident manager and capture what they print."""
+        buffer = io.StringIO()
+        stdout = sys.stdout
+        if isinstance(stdout, _ThreadLocalStdout):
+            stdout.local.buffer = buffer
+        try:
+            try:
+                args = self.parser.parse_args(argv)
+            except SystemExit as e:
+                return {"status": e.code if isinstance(e.code, int) else 2, "output": buffer.getvalue()}
+            if args.command in (None, "serve", "watch", "bench") or args.batch:
+                return {"status": 2, "output": "Error: the daemon only runs single commands.\n"}
+            if cwd:
+                _resolve_client_paths(args, cwd)
+            with self.lock:
+                if isinstance(stdout, _ThreadLocalStdout):
+                    stdout.shared = buffer
+                try:
+                    self.manager.reload_registry_if_changed()
+                    status = run_command(self.manager, args)
+                finally:
+                    if isinstance(stdout, _ThreadLocalStdout):
+                        stdout.shared = None
+            return {"status": status, "output": buffer.getvalue()}
+        finally:
+            if isinstance(stdout, _ThreadLocalStdout):
+                stdout.local.buffer = None
+
+    def serve_forever(self) -> None:
+        """Listen on the socket until a shutdown request arrives."""
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Daemon mode needs Unix domain socket support")
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        response = daemon.dispatch(json.loads(line))
+                    except json.JSONDecodeError:
+                        response = {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}}
+                    if response is not None:
+                        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                        self.wfile.flush()
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        if os.path.exists(self.socket_path):
+            self._remove_stale_socket()
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        if not isinstance(sys.stdout, _ThreadLocalStdout):
+            sys.stdout = _ThreadLocalStdout(sys.stdout)
+        self.server = Server(self.socket_path, Handler)
+        self.ready.set()
+        logging.info(f"Daemon listening on {self.socket_path}")
+        print(f"Mod manager daemon listening on {self.socket_path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            try:
+                os.remove(self.socket_path)
+            except FileNotFoundError:
+                pass
+            logging.info("Daemon stopped")
+
+    def _remove_stale_socket(self) -> None:
+        """Remove a socket left behind by a daemon that is gone; refuse if one still answers."""
+        if not stat.S_ISSOCK(os.stat(self.socket_path).st_mode):
+            raise OSError(f"{self.socket_path} exists and is not a socket")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(self.socket_path)
+            return
+        finally:
+            probe.close()
+        raise OSError(f"A mod manager daemon is already listening on {self.socket_path}")
+
+
+class DaemonClient:
+    """Thin JSON-RPC client for a running ModManagerDaemon."""
+
+    def __init__(self, socket_path: str = DAEMON_SOCKET, timeout: Optional[float] = None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        self.reader = self.sock.makefile("rb")
+        self.next_id = 0
+
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Send one request and return its result, raising RuntimeError on a JSON-RPC error."""
+        self.next_id += 1
+        request = {"jsonrpc": "2.0", "id": self.next_id, "method": method, "params": params or {}}
+        self.sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        response = json.loads(self.reader.readline())
+        if "error" in response:
+            raise RuntimeError(response["error"]["message"])
+        return response["result"]
+
+    def close(self) -> None:
+        self.reader.close()
+        self.sock.close()
+
+
+def _strip_client_options(argv: List[str]) -> List[str]:
+    """Remove --remote and --socket from arguments before forwarding them to the daemon."""
+    forwarded = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg == "--remote":
+            continue
+        elif arg == "--socket":
+            skip = True
+        elif not arg.startswith("--socket="):
+            forwarded.append(arg)
+    return forwarded
+
+
+def run_remote(argv: List[str], socket_path: str) -> Optional[int]:
+    """Run a command on the daemon; returns None when no daemon is reachable."""
+    try:
+        client = DaemonClient(socket_path)
+    except (OSError, AttributeError):
+        return None
+    try:
+        result = client.call("command", {"argv": _strip_client_options(argv), "cwd": os.getcwd()})
+    finally:
+        client.close()
+    print(result["output"], end="")
+    return result["status"]
+
+
+def benchmark_daemon(requests: int = 200, argv: Optional[List[str]] = None,
+                     manager: Optional[ModManager] = None, cwd: Optional[str] = None) -> Dict[str, Any]:
+    """Compare per-request latency through the daemon with cold 'modmanager.py' invocations.
+
+    The cold invocations run in cwd, which needs the log folder (and the registry) they use.
+    Raises OSError when the daemon cannot start listening.
+    """
+    argv = argv or ["list"]
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "bench.sock")
+        daemon = ModManagerDaemon(manager or ModManager(), socket_path)
+        thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not daemon.ready.wait(0.05):
+            # serve_forever ends early when it cannot bind the socket
+            if not thread.is_alive() or time.monotonic() > deadline:
+                raise OSError(f"Daemon did not start listening on {socket_path}")
+
+        client = DaemonClient(socket_path)
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.call("command", {"argv": argv})
+            latencies.append(time.perf_counter() - start)
+        client.call("shutdown")
+        client.close()
+        thread.join()
+
+    cold = []
+    for _ in range(5):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.abspath(__file__)] + argv, capture_output=True, cwd=cwd)
+        cold.append(time.perf_counter() - start)
+
+    latencies.sort()
+    result = {
+        "command": " ".join(argv),
+        "daemon_p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "daemon_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+        "cold_median_ms": round(sorted(cold)[len(cold) // 2] * 1000, 1),
+    }
+    print(f"'{result['command']}': daemon p50 {result['daemon_p50_ms']}ms, p95 {result['daemon_p95_ms']}ms; "
+          f"cold invocation {result['cold_median_ms']}ms")
+    return result
+
+
+# Sizes of the synthetic mods generated by the bench command
+BENCH_SCALES = {
+    "small": {"mods": 5, "items": 200, "recipes": 100, "models": 50, "sounds": 50,
+              "assets": 50, "asset_size": 16 * 1024, "registry": 1_000, "import_rows": 10_000},
+    "medium": {"mods": 20, "items": 2_000, "recipes": 1_000, "models": 500, "sounds": 500,
+               "assets": 500, "asset_size": 64 * 1024, "registry": 10_000, "import_rows": 100_000},
+    "large": {"mods": 50, "items": 20_000, "recipes": 10_000, "models": 2_000, "sounds": 2_000,
+              "assets": 2_000, "asset_size": 256 * 1024, "registry": 50_000, "import_rows": 500_000},
+}
+BENCH_FORMAT_VERSION = 1
+
+
+@contextmanager
+def _quiet_stdout():
+    """Discard stdout, including output of child processes such as the mod scripts."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(io.StringIO()):
+            os.dup2(devnull.fileno(), 1)
+            yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def _timing(name: str, scale: str, count: int, seconds: float) -> Dict[str, Any]:
+    """Build one benchmark record."""
+    return {
+        "name": name,
+        "scale": scale,
+        "count": count,
+        "seconds": round(seconds, 6),
+        "per_op_ms": round(seconds * 1000 / count, 4) if count else None,
+        "ops_per_second": round(count / seconds, 1) if seconds else None,
+    }
+
+
+def _bench(results: List[Dict[str, Any]], name: str, scale: str, count: int, func, *args, **kwargs) -> Any:
+    """Run func with its output hidden and append a timing record for count operations."""
+    start = time.perf_counter()
+    with _quiet_stdout():
+        value = func(*args, **kwargs)
+    results.append(_timing(name, scale, count, time.perf_counter() - start))
+    return value
+
+
+def generate_assets(mod_path: str, count: int, size: int, seed: int = 0) -> int:
+    """Write count pseudo-random asset files of size bytes into a mod's media/textures; returns bytes written."""
+    folder = os.path.join(mod_path, "media", "textures", "bench")
+    os.makedirs(folder, exist_ok=True)
+    block = hashlib.blake2b(str(seed).encode(), digest_size=64).digest() * (size // 64 + 1)
+    for i in range(count):
+        with open(os.path.join(folder, f"asset_{i:05d}.png"), "wb") as f:
+            # a unique prefix keeps every file distinct for hashing
+            f.write(i.to_bytes(8, "little") + block[8:size])
+    return count * size
+
+
+def generate_synthetic_mod(manager: "ModManager", mod_name: str, scale: Dict[str, int],
+                           results: Optional[List[Dict[str, Any]]] = None, label: str = "") -> None:
+    """Fill a registered mod with synthetic items, recipes, models, sounds and assets.
+
+    Each generator is timed into results when it is given.
+    """
+    results = results if results is not None else []
+    item_types = manager.item_types
+    items, recipes, models, sounds = scale["items"], scale["recipes"], scale["models"], scale["sounds"]
+
+    def make_items():
+        for i in range(items):
+            manager.create_item(mod_name, item_types[i % len(item_types)], f"BenchItem{i}",
+                                Weight=round(0.1 + (i % 50) / 10, 1), DisplayName=f"Bench Item {i}")
+
+    def make_recipes():
+        for i in range(recipes):
+            manager.create_recipe(mod_name, f"MakeBench{i}", RECIPE_TYPES[i % len(RECIPE_TYPES)],
+                                  f"BenchItem{i % max(items, 1)}",
+                                  ingredients=[f"BenchItem{(i + 1) % max(items, 1)}:2",
+                                               f"BenchItem{(i + 2) % max(items, 1)}:1"],
+                                  result_count=1, recipe_time=50, skill_type="Woodwork", skill_level="1")
+
+    def make_models():
+        for i in range(models):
+            manager.create_model(mod_name, f"BenchModel{i}")
+
+    def make_sounds():
+        for i in range(sounds):
+            manager.create_sound(mod_name, ("SFX", "Ambient")[i % 2], f"BenchSound{i}", volume=0.5)
+
+    _bench(results, "create_item", label, items, make_items)
+    _bench(results, "create_recipe", label, recipes, make_recipes)
+    _bench(results, "create_model", label, models, make_models)
+    _bench(results, "create_sound", label, sounds, make_sounds)
+    generate_assets(manager.registry[mod_name]["mod_path"], scale["assets"], scale["asset_size"])
+
+
+def _bench_registry(results: List[Dict[str, Any]], label: str, tmp: str, entries: int) -> None:
+    """Time saving, loading and updating a registry of synthetic entries with both stores."""
+    registry = {f"BenchMod{i}": {"mod_path": os.path.join(tmp, "src", f"BenchMod{i}"), "mod_types": ["Items"]}
+                for i in range(entries)}
+    for backend, store in (("json", JsonRegistryStore(os.path.join(tmp, "bench_registry.json"))),
+                           ("sqlite", SqliteRegistryStore(os.path.join(tmp, "bench_registry.db"), json_path=None))):
+        _bench(results, f"registry_save_{backend}", label, entries, store.replace, registry)
+        _bench(results, f"registry_load_{backend}", label, entries, store.load)
+        _bench(results, f"registry_update_{backend}", label, 100,
+               lambda: [store.apply({f"BenchMod{i}": {"mod_path": "/tmp/moved"}}) for i in range(100)])
+
+
+def run_benchmarks(scales: Optional[List[str]] = None, include_daemon: bool = True) -> Dict[str, Any]:
+    """Run every benchmark at each scale against temp folders and return a comparable report.
+
+    Each scale gets its own registry store, mods folder and parse cache inside a temp
+    directory; the real registry and ~/Zomboid are never read or written.
+    """
+    scales = scales or ["small"]
+    results: List[Dict[str, Any]] = []
+    span_path = configure_span_log(None)
+    try:
+        for label in scales:
+            _run_bench_scale(label, results, include_daemon)
+    finally:
+        configure_span_log(span_path)
+
+    return {
+        "format": BENCH_FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "cpus": os.cpu_count(),
+        "scales": {label: BENCH_SCALES[label] for label in scales},
+        "results": results,
+    }
+
+
+def _run_bench_scale(label: str, results: List[Dict[str, Any]], include_daemon: bool) -> None:
+    """Run the benchmarks of one scale in a fresh temp directory."""
+    scale = BENCH_SCALES[label]
+    print(f"Running {label} benchmarks...", file=sys.stderr)
+    with tempfile.TemporaryDirectory() as tmp:
+        for folder in ("src", "mods", "log", "core"):
+            os.makedirs(os.path.join(tmp, folder))
+        # spans go to the temp folder so the timings include their cost without filling the real log
+        configure_span_log(os.path.join(tmp, "log", "spans.jsonl"))
+        manager = ModManager(JsonRegistryStore(os.path.join(tmp, "core", "registry.json")))
+        manager.mods_dir = os.path.join(tmp, "mods")
+        manager.use_asset_store = False
+        parse_cache = manager._parse_cache = ParseCache(os.path.join(tmp, "parse_cache.db"))
+        mod_names = [f"BenchMod{i}" for i in range(scale["mods"])]
+
+        _bench(results, "create_mod", label, len(mod_names),
+               lambda: [manager.create_mod(name, os.path.join(tmp, "src"), ["Items", "Sound", "Textures"])
+                        for name in mod_names])
+        generate_synthetic_mod(manager, mod_names[0], scale, results, label)
+        # the remaining mods get the same content without timing it again
+        for name in mod_names[1:]:
+            shutil.copytree(manager.registry[mod_names[0]]["mod_path"], manager.registry[name]["mod_path"],
+                            dirs_exist_ok=True)
+
+        files = sum(len(scan_tree(manager.registry[name]["mod_path"])[0]) for name in mod_names)
+        _bench(results, "install_mod_cold", label, len(mod_names),
+               lambda: [manager.install_mod(name) for name in mod_names])
+        _bench(results, "install_mod_noop", label, len(mod_names),
+               lambda: [manager.install_mod(name) for name in mod_names])
+        asset_dir = os.path.join(manager.registry[mod_names[0]]["mod_path"], "media", "textures", "bench")
+        for name in sorted(os.listdir(asset_dir))[::10]:
+            with open(os.path.join(asset_dir, name), "r+b") as f:
+                f.write(b"changed!")
+        _bench(results, "install_mod_10pct_changed", label, 1, manager.install_mod, mod_names[0])
+        _bench(results, "install_mods_parallel_cold", label, len(mod_names),
+               lambda: (shutil.rmtree(manager.mods_dir), manager.install_mods(mod_names)))
+        results[-1]["files"] = files
+        mod_files = files // len(mod_names)
+        _bench(results, "snapshot_mod", label, mod_files, manager.snapshot_mod, mod_names[0])
+        _bench(results, "rollback_mod_noop", label, mod_files, manager.rollback_mod, mod_names[0], 1)
+
+        _bench(results, "validate_mod_paths", label, len(mod_names), manager.validate_mod_paths)
+        _bench(results, "validate_mod_paths_deep", label, len(mod_names), manager.validate_mod_paths, deep=True)
+        with _quiet_stdout():
+            scan = benchmark_scan(manager)
+        results.append(_timing("scan_index_cold", label, scan["files"], scan["cold_seconds"]))
+        results.append(_timing("scan_index_warm", label, scan["files"], scan["warm_seconds"]))
+        # every mod is a copy of the first, so each asset and definition overlaps with all the others
+        _bench(results, "find_conflicts", label, files, manager.find_conflicts)
+        _bench(results, "find_conflicts_warm", label, files, manager.find_conflicts)
+
+        # search over the first mod only; the others are copies of it
+        search_manager = ModManager(JsonRegistryStore(os.path.join(tmp, "core", "search_registry.json")))
+        search_manager.registry = {mod_names[0]: manager.registry[mod_names[0]]}
+        search_manager._parse_cache = parse_cache
+        search_index = search_manager._search_index = SearchIndex(os.path.join(tmp, "search.db"))
+        definitions = scale["items"] + scale["recipes"] + scale["models"] + scale["sounds"]
+        _bench(results, "search_index_build", label, definitions, search_manager.refresh_search_index)
+        _bench(results, "search_index_noop", label, 1, search_manager.refresh_search_index)
+        queries = [["BenchItem1*"], ["bench", "Weight>4.5"], ["ingredient:BenchItem7"], ["*ench*"], ["bnech~"]]
+        _bench(results, "search_query", label, len(queries),
+               lambda: [search_manager.search_definitions(query, limit=20) for query in queries])
+        search_index.conn.close()
+        export_state = search_manager._export_state = ExportState(os.path.join(tmp, "export.db"))
+        export_path = os.path.join(tmp, "export.jsonl")
+        _bench(results, "export_definitions", label, definitions, search_manager.export_definitions, export_path)
+        _bench(results, "export_definitions_incremental_noop", label, 1, search_manager.export_definitions,
+               export_path, incremental=True)
+        export_state.conn.close()
+
+        _bench_registry(results, label, tmp, scale["registry"])
+
+        scaffold_count = scale["registry"] // 10
+        manifest = os.path.join(tmp, "scaffold.json")
+        with open(manifest, "w", encoding="utf-8") as f:
+            json.dump({"path": "scaffold", "types": ["Items", "Sound", "Textures"],
+                       "mods": [{"name": "ScaffoldMod{n}", "count": scaffold_count}]}, f)
+        scaffold_manager = ModManager(JsonRegistryStore(os.path.join(tmp, "core", "scaffold_registry.json")))
+        _bench(results, "scaffold_mods", label, scaffold_count, scaffold_manager.scaffold_mods, manifest)
+
+        import_manager = ModManager(JsonRegistryStore(os.path.join(tmp, "core", "import_registry.json")))
+        with _quiet_stdout():
+            rows = benchmark_import((scale["import_rows"],), import_manager)
+        results.append(_timing("import_definitions", label, scale["import_rows"], rows[0]["seconds"]))
+
+        # the daemon needs Unix domain sockets, which Windows Python lacks
+        if include_daemon and hasattr(socket, "AF_UNIX"):
+            with _quiet_stdout():
+                daemon = benchmark_daemon(200, ["list"], manager, tmp)
+            # per-request medians; seconds is the p50 latency of one request
+            results.append(_timing("daemon_request_p50", label, 1, daemon["daemon_p50_ms"] / 1000))
+            results.append(_timing("daemon_request_p95", label, 1, daemon["daemon_p95_ms"] / 1000))
+            results.append(_timing("cold_invocation", label, 1, daemon["cold_median_ms"] / 1000))
+        parse_cache.conn.close()
+        configure_span_log(None)
+
+
+def compare_benchmarks(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 1.25) -> List[str]:
+    """Print per-benchmark time ratios against a baseline report to stderr and return the regressions."""
+    previous = {(result["name"], result["scale"]): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get((result["name"], result["scale"]))
+        if not old or not old.get("seconds") or result["count"] != old["count"]:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        flag = ""
+        # very short timings are mostly noise
+        if ratio > threshold and result["seconds"] - old["seconds"] > 0.005:
+            flag = "  REGRESSION"
+            regressions.append(f"{result['name']} ({result['scale']})")
+        print(f"{result['name']:<28} {result['scale']:<7} {old['seconds']:>9.4f}s -> "
+              f"{result['seconds']:>9.4f}s  x{ratio:.2f}{flag}", file=sys.stderr)
+    return regressions
+
 
 def show_ascii_logo():
     """Display the ASCII logo."""
@@ -554,8 +6262,33 @@ def show_ascii_logo():
     except FileNotFoundError:
         print("Project Zomboid Mod Manager")
 
-def main():
-    """Main application entry point."""
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main application entry point.
+
+    With arguments a single command (or a --batch file) runs non-interactively,
+    otherwise the interactive prompt starts.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        parser = build_parser()
+        args = parser.parse_args(argv)
+        if args.remote:
+            status = run_remote(argv, args.socket)
+            if status is not None:
+                return status
+            print("No mod manager daemon is running; running the command locally.", file=sys.stderr)
+        manager = ModManager()
+        if args.command == "serve":
+            try:
+                ModManagerDaemon(manager, args.socket).serve_forever()
+            except OSError as e:
+                print(f"Error: {e}")
+                return 1
+            return 0
+        if args.batch:
+            return run_batch(manager, args.batch, parser)
+        return run_command(manager, args)
+
     manager = ModManager()
     print(f"Project Zomboid Mod Manager (Running on {manager.platform})")
     show_ascii_logo()
@@ -567,13 +6300,16 @@ def main():
             
             if command in ('exit', 'quit'):
                 print("Goodbye!")
-                break
+                return 0
             elif command == 'help':
                 display_help()
             elif command == 'create':
                 mod_name = input("Mod name: ").strip()
                 mod_path = input("Mod directory path: ").strip()
                 manager.create_mod(mod_name, mod_path)
+            elif command == 'scaffold':
+                manifest_path = input("Manifest file (.json or .toml): ").strip()
+                manager.scaffold_mods(manifest_path)
             elif command == 'register':
                 mod_name = input("Mod name: ").strip()
                 mod_path = input("Existing mod directory path: ").strip()
@@ -594,6 +6330,33 @@ def main():
                 item_type = input("Item type: ").strip()
                 item_name = input("Item name: ").strip()
                 manager.create_item(mod_name, item_type, item_name)
+            elif command == 'import':
+                source_path = input("Import file path (.csv or .jsonl): ").strip()
+                default_mod = input("Default mod name (leave blank to use the mod column): ").strip()
+                manager.import_definitions(source_path, default_mod or None)
+            elif command == 'find':
+                name = input("Definition name: ").strip()
+                kind = input("Kind (item/recipe/model/sound, leave blank for any): ").strip().lower()
+                manager.find_definition(name, kind or None)
+            elif command == 'search':
+                query = input("Search (e.g. axe* Weight>2 ingredient:Plank): ").strip()
+                kind = input("Kind (item/recipe/model/sound, leave blank for any): ").strip().lower()
+                manager.search_definitions(shlex.split(query), kind or None)
+            elif command == 'duplicates':
+                manager.report_duplicates()
+            elif command.split()[:1] == ['export']:
+                # 'export --incremental' writes only what changed since the last export
+                output = input("Export to (.jsonl, .jsonl.gz or .parquet): ").strip()
+                manager.export_definitions(output, incremental='--incremental' in command.split()[1:])
+            elif command == 'conflicts':
+                show_identical = input("Also list identical copies? (y/N): ").strip().lower() == 'y'
+                manager.find_conflicts(show_identical=show_identical)
+            elif command == 'balance':
+                item_type = input("Item type (leave blank for all): ").strip()
+                output = input("Write report to (.json/.csv, leave blank to only print): ").strip()
+                manager.balance_report(item_type=item_type or None, output=output or None)
+            elif command == 'recipes':
+                manager.check_recipes()
             elif command == 'itemtypes':
                 manager.list_item_types()
             elif command == 'model':
@@ -608,23 +6371,93 @@ def main():
                 volume = input("Volume (default is 1.0): ").strip() or "1.0"
                 looping = input("Looping (true/false, default is false): ").strip().lower() or "false"
                 manager.create_sound(mod_name, sound_type, sound_name, sound_path=sound_path, volume=volume, looping=looping)
+            elif command == 'sounds':
+                mod_name = input("Mod name: ").strip()
+                source_dir = input("Folder with .ogg/.wav files: ").strip()
+                sound_type = input("Sound type for files not in a subfolder (default is General): ").strip()
+                manager.ingest_sounds(mod_name, source_dir, sound_type or "General")
             elif command == 'list':
                 manager.list_mods()
-            elif command == 'install':
-                mod_name = input("Mod name to install: ").strip()
-                manager.install_mod(mod_name)
+            elif command.split()[:1] == ['install']:
+                # 'install --dry-run' only prints what would be copied or deleted
+                # 'install --all' installs every registered mod in parallel
+                # 'install --from-archive' installs a mod from an archive made by pack
+                # 'install --dedupe' links identical assets from the shared asset store
+                # 'install --check-lua' stops the install when the mod's Lua files have errors
+                options = command.split()[1:]
+                # the options apply to this install only, like on the command line
+                use_asset_store, check_lua = manager.use_asset_store, manager.check_lua_on_install
+                if '--dedupe' in options:
+                    manager.use_asset_store = True
+                if '--check-lua' in options:
+                    manager.check_lua_on_install = True
+                try:
+                    if '--from-archive' in options:
+                        archive_path = input("Archive to install: ").strip()
+                        manager.install_from_archive(archive_path, dry_run='--dry-run' in options)
+                    elif '--all' in options:
+                        manager.install_mods(dry_run='--dry-run' in options)
+                    else:
+                        mod_name = input("Mod name to install: ").strip()
+                        manager.install_mod(mod_name, dry_run='--dry-run' in options)
+                finally:
+                    manager.use_asset_store, manager.check_lua_on_install = use_asset_store, check_lua
+            elif command == 'luacheck':
+                mod_name = input("Mod name (leave blank for all mods): ").strip()
+                manager.check_lua([mod_name] if mod_name else None)
+            elif command.split()[:1] == ['stats']:
+                # 'stats 1h' limits the report to the last hour
+                options = command.split()[1:]
+                try:
+                    print_span_stats(options[0] if options else "24h")
+                except ValueError as e:
+                    print(f"Error: {e}")
+            elif command == 'bench':
+                print(json.dumps(run_benchmarks(["small"]), indent=2))
+            elif command.split()[:1] == ['gc']:
+                manager.gc_asset_store(dry_run='--dry-run' in command.split()[1:])
+            elif command.split()[:1] == ['snapshot']:
+                # 'snapshot --installed' snapshots the installed copy, 'snapshot --list' lists snapshots
+                options = command.split()[1:]
+                mod_name = input("Mod name: ").strip()
+                if '--list' in options:
+                    manager.list_snapshots(mod_name)
+                else:
+                    manager.snapshot_mod(mod_name, installed='--installed' in options)
+            elif command == 'rollback':
+                mod_name = input("Mod name: ").strip()
+                manager.list_snapshots(mod_name)
+                snapshot_id = input("Snapshot to restore: ").strip()
+                if snapshot_id.isdigit():
+                    manager.rollback_mod(mod_name, int(snapshot_id))
+                else:
+                    print("Error: enter a snapshot number.")
+            elif command == 'pack':
+                mod_name = input("Mod name to pack: ").strip()
+                output_path = input(f"Archive path (default is {mod_name}.zip): ").strip()
+                manager.pack_mod(mod_name, output_path or None)
+            elif command == 'watch':
+                mod_name = input("Mod name to watch: ").strip()
+                manager.watch_mod(mod_name)
             elif command == 'delete':
                 mod_name = input("Mod name to remove: ").strip()
                 manager.delete_mod(mod_name)
             elif command == 'flush':
                 manager.flush_registry()
-            elif command == 'validate':
-                manager.validate_mod_paths()
+            elif command.split()[:1] == ['validate']:
+                # 'validate --deep' checks mod contents, '--json' prints the results as JSON
+                options = command.split()[1:]
+                manager.validate_mod_paths(deep='--deep' in options or '--json' in options,
+                                           as_json='--json' in options)
             else:
                 print("Unknown command. Type 'help' for available commands.")
                 
         except KeyboardInterrupt:
             print("\nUse 'exit' to quit the program.")
+        except EOFError:
+            # input was piped in and has run out
+            print("\nGoodbye!")
+            return 0
         except Exception as e:
             logging.error(f"Unexpected error: {e}")
             print(f"An error occurred. See {LOG_FILE} for details.")
@@ -632,7 +6465,7 @@ def main():
 # catch all that runs the main program (main menu) on startup unless their was an exception
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except Exception as e:
         logging.critical(f"Critical error: {e}")
         print(f"A critical error occurred. Check {LOG_FILE} for details.")
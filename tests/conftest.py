@@ -0,0 +1,47 @@
+"""Shared fixtures: modmanager is imported from the repository root and every test runs in a temp folder."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# modmanager opens log/modmanager.log relative to the working directory when it is imported
+_import_dir = tempfile.mkdtemp(prefix="modmanager-tests-")
+os.makedirs(os.path.join(_import_dir, "log"))
+_cwd = os.getcwd()
+os.chdir(_import_dir)
+try:
+    import modmanager  # noqa: E402
+finally:
+    os.chdir(_cwd)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """An empty working directory with the log and core folders modmanager expects."""
+    (tmp_path / "log").mkdir()
+    (tmp_path / "core").mkdir()
+    monkeypatch.chdir(tmp_path)
+    for name in (modmanager.REGISTRY_BACKEND_ENV, modmanager.SNAPSHOT_ENV,
+                 modmanager.ASSET_STORE_ENV, modmanager.LUA_CHECK_ENV):
+        monkeypatch.delenv(name, raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def manager(workdir):
+    """A ModManager with its own JSON registry in the working directory."""
+    return modmanager.ModManager(modmanager.JsonRegistryStore(os.path.join("core", "registry.json")))
+
+
+@pytest.fixture
+def mod_folder(workdir, manager):
+    """A registered, empty mod named TestMod."""
+    path = workdir / "TestMod"
+    path.mkdir()
+    (path / "mod.info").write_text("name=TestMod\nid=TestMod\n")
+    assert manager.register_mod("TestMod", str(path))
+    return path
@@ -0,0 +1,57 @@
+import pytest
+
+from modmanager import iter_script_definitions, main
+
+
+@pytest.fixture
+def mod_path(workdir):
+    path = workdir / "TestMod"
+    path.mkdir()
+    (path / "mod.info").write_text("name=TestMod\nid=TestMod\n")
+    return path
+
+
+def run_batch_file(workdir, *lines):
+    batch = workdir / "batch.txt"
+    batch.write_text("\n".join(lines) + "\n")
+    return main(["--batch", str(batch)])
+
+
+def _items(mod_path):
+    script_file = mod_path / "media" / "scripts" / "items_Food.txt"
+    return [definition["name"] for definition in iter_script_definitions(str(script_file))]
+
+
+def test_batch_succeeds(workdir, mod_path):
+    status = run_batch_file(workdir, "# comment", f"register TestMod {mod_path}",
+                            "item TestMod Food Pear Weight=0.5", "item TestMod Food Apple")
+    assert status == 0
+    assert _items(mod_path) == ["Pear", "Apple"]
+
+
+@pytest.mark.parametrize("bad_line", [
+    "item TestMod Food Plum Calories",  # argparse error: property without '='
+    "item Missing Food Plum",           # unregistered mod
+    "frobnicate",                       # unknown command
+    "--batch other.txt",                # batches do not nest
+])
+def test_batch_failure_exits_1_and_runs_the_other_lines(workdir, mod_path, bad_line, capsys):
+    status = run_batch_file(workdir, f"register TestMod {mod_path}", "item TestMod Food Pear",
+                            bad_line, "item TestMod Food Apple")
+    assert status == 1
+    assert "1 batch command(s) failed." in capsys.readouterr().out
+    assert _items(mod_path) == ["Pear", "Apple"]
+
+
+def test_batch_write_failure_exits_1(workdir, mod_path, capsys):
+    # a folder where the script file should be makes the deferred write fail
+    (mod_path / "media" / "scripts" / "items_Food.txt").mkdir(parents=True)
+    status = run_batch_file(workdir, f"register TestMod {mod_path}", "item TestMod Food Pear")
+    assert status == 1
+    assert "could not write script files" in capsys.readouterr().out
+
+
+def test_bad_property_is_a_usage_error(workdir, mod_path):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["item", "TestMod", "Food", "Pear", "Calories"])
+    assert exit_info.value.code == 2
@@ -0,0 +1,48 @@
+import os
+import zipfile
+
+import pytest
+
+import modmanager
+from modmanager import PACK_CHUNK_SIZE, PACK_MANIFEST, pack_tree
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "TestMod"
+    (root / "media" / "scripts").mkdir(parents=True)
+    (root / "media" / "sound").mkdir()
+    (root / "media" / "textures").mkdir()
+    (root / "mod.info").write_text("name=TestMod\nid=TestMod\n")
+    (root / "media" / "scripts" / "items_Food.txt").write_text("module TestMod {\n}\n")
+    (root / "media" / "sound" / "boom.ogg").write_bytes(os.urandom(4096))
+    # larger than one chunk, so it is deflated in parallel pieces
+    (root / "media" / "big.txt").write_bytes(b"0123456789abcdef" * (PACK_CHUNK_SIZE // 8))
+    return root
+
+
+def test_pack_is_byte_identical_on_repeat(source, tmp_path):
+    first = tmp_path / "first.zip"
+    second = tmp_path / "second.zip"
+    pack_tree(str(source), str(first), "TestMod")
+    # a newer mtime must not change the archive
+    os.utime(source / "mod.info", (1_000_000_000, 1_000_000_000))
+    pack_tree(str(source), str(second), "TestMod", workers=1)
+
+    assert first.read_bytes() == second.read_bytes()
+    with zipfile.ZipFile(first) as archive:
+        assert archive.testzip() is None
+        names = archive.namelist()
+        assert PACK_MANIFEST in names
+        assert "TestMod/media/big.txt" in names
+        assert archive.read("TestMod/media/big.txt") == (source / "media" / "big.txt").read_bytes()
+
+
+def test_failed_pack_leaves_no_temp_file(source, tmp_path, monkeypatch):
+    def broken(*args):
+        raise OSError("read failed")
+
+    monkeypatch.setattr(modmanager, "_pack_file", broken)
+    with pytest.raises(OSError):
+        pack_tree(str(source), str(tmp_path / "out" / "TestMod.zip"), "TestMod")
+    assert os.listdir(tmp_path / "out") == []
@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+from modmanager import JsonRegistryStore, RegistryStore, SqliteRegistryStore
+
+
+def test_sqlite_store_migrates_json_registry_once(workdir):
+    registry = {"ModA": {"mod_path": "/mods/ModA"}, "ModB": {"mod_path": "/mods/ModB", "installed": True}}
+    json_path = workdir / "core" / "registry.json"
+    json_path.write_text(json.dumps(registry))
+    db_path = str(workdir / "core" / "registry.db")
+
+    assert SqliteRegistryStore(db_path, str(json_path)).load() == registry
+
+    # later opens keep the database even when the JSON file changes
+    json_path.write_text(json.dumps({"ModC": {"mod_path": "/mods/ModC"}}))
+    store = SqliteRegistryStore(db_path, str(json_path))
+    assert store.load() == registry
+    store.apply({"ModA": None, "ModC": {"mod_path": "/mods/ModC"}})
+    assert SqliteRegistryStore(db_path, str(json_path)).load() == {
+        "ModB": registry["ModB"], "ModC": {"mod_path": "/mods/ModC"}}
+
+
+WORKER = """
+import sys
+sys.path.insert(0, {root!r})
+import modmanager
+store = modmanager.JsonRegistryStore({path!r})
+for i in range({count}):
+    store.apply({{f"Mod{{sys.argv[1]}}_{{i}}": {{"mod_path": f"/mods/{{i}}"}}}})
+"""
+
+
+def test_json_store_keeps_concurrent_updates_from_other_processes(workdir):
+    path = str(workdir / "core" / "registry.json")
+    script = WORKER.format(root=ROOT, path=path, count=30)
+    workers = [subprocess.Popen([sys.executable, "-c", script, str(n)], cwd=workdir) for n in range(4)]
+    assert [worker.wait(timeout=120) for worker in workers] == [0, 0, 0, 0]
+
+    registry = JsonRegistryStore(path).load()
+    assert set(registry) == {f"Mod{n}_{i}" for n in range(4) for i in range(30)}
+    assert not [name for name in os.listdir(workdir / "core") if name.endswith(".tmp")]
+
+
+def test_registry_store_needs_every_method():
+    class LoadOnly(RegistryStore):
+        def load(self):
+            return {}
+
+    with pytest.raises(TypeError):
+        LoadOnly()
@@ -0,0 +1,47 @@
+import threading
+
+from modmanager import ScriptWriter, format_item_block, item_file_header, iter_script_definitions
+
+
+def _item_names(script_file):
+    return [definition["name"] for definition in iter_script_definitions(str(script_file))
+            if definition["kind"] == "item"]
+
+
+def test_concurrent_writers_keep_every_block(tmp_path):
+    script_file = tmp_path / "media" / "scripts" / "items_Food.txt"
+    writers = [ScriptWriter() for _ in range(4)]
+    errors = []
+
+    def add_items(thread_no):
+        writer = writers[thread_no % len(writers)]
+        try:
+            for i in range(25):
+                name = f"Item{thread_no}_{i}"
+                writer.add(str(script_file), format_item_block(name), item_file_header("TestMod"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=add_items, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    names = _item_names(script_file)
+    assert len(names) == 200
+    assert set(names) == {f"Item{n}_{i}" for n in range(8) for i in range(25)}
+
+
+def test_deferred_writes_each_file_once(tmp_path):
+    script_file = str(tmp_path / "items_Food.txt")
+    written = []
+    writer = ScriptWriter(written.append)
+    with writer.deferred():
+        with writer.deferred():
+            writer.add(script_file, format_item_block("Pear"), item_file_header("TestMod"))
+        writer.add(script_file, format_item_block("Apple"), item_file_header("TestMod"))
+        assert not written
+    assert written == [[script_file]]
+    assert _item_names(script_file) == ["Pear", "Apple"]